@@ -1,22 +1,93 @@
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, render_template, request, jsonify, send_file, Response
 import os
+import json
+import queue
+import time
+import atexit
+import threading
 from docx import Document  # <-- This line was missing
 
 # Import the new test case generation function
-from test_case_generation import generate_test_cases
+from test_case_generation import generate_test_cases, stream_test_cases
 # --- NEW: Import from our new document parser file ---
-from document_parser import read_file_content, parse_document_for_tests
-from test_executor import run_tests
+from document_parser import parse_file_for_tests, embed_tests_payload
+from exporters import FORMATS, TEST_COLUMNS, RESULT_COLUMNS, iter_ndjson, iter_csv, iter_junit, result_duration
+from test_executor import resolve_workers, run_tests
+from driver_pool import create_pool_from_env
+from job_manager import JobQueueFull, create_job_manager_from_env
+from metrics import REGISTRY, gauge_lines
+from llm_cache import get_cache
+from extraction_cache import get_extraction_cache
+from auth_sessions import get_auth_store
+from distributed import run_distributed
+from work_queue import get_work_queue
+from run_history import get_history, run_with_history
 
 
 app = Flask(__name__)
 
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 
+# Warm browser pool shared by /api/run-test (enabled with DRIVER_POOL_SIZE > 0)
+driver_pool = create_pool_from_env()
+if driver_pool:
+    driver_pool.start()
+    atexit.register(driver_pool.close)
+app.extensions['driver_pool'] = driver_pool
+
+
+def _run_suite(website_url, test_cases, distributed=False, rerun=False, **options):
+    """run_tests in this process, or on remote workers via WORK_QUEUE_URL when `distributed`.
+    Runs are recorded in RUN_HISTORY_DB; `rerun` executes only failed, new or changed tests."""
+    runner = run_distributed if distributed else run_tests
+    return run_with_history(runner, website_url, test_cases, get_history(), rerun=rerun, **options)
+
+
+# Background executor for /api/jobs (bounded queue, finished jobs expire)
+job_manager = create_job_manager_from_env(_run_suite)
+app.extensions['job_manager'] = job_manager
+
+
+def _collect_runtime_gauges():
+    """Scrape-time gauges for caches, the browser pool and the job queue."""
+    lines = gauge_lines("bugzy_jobs", "Retained jobs by status (pending = waiting in queue).",
+                        job_manager.stats(), "status")
+    if driver_pool:
+        lines += gauge_lines("bugzy_driver_pool", "Browser pool occupancy.", driver_pool.stats(), "state")
+    llm_cache = get_cache()
+    if llm_cache:
+        lines += gauge_lines("bugzy_llm_cache", "LLM response cache counters.", llm_cache.stats(), "field")
+    extraction_cache = get_extraction_cache()
+    if extraction_cache:
+        lines += gauge_lines("bugzy_extraction_cache", "Upload extraction cache counters.",
+                             extraction_cache.stats(), "field")
+    auth_store = get_auth_store()
+    if auth_store:
+        lines += gauge_lines("bugzy_auth_sessions", "Login snapshots and how often they were reused.",
+                             auth_store.stats(), "field")
+    work_queue = get_work_queue()
+    if work_queue:
+        lines += gauge_lines("bugzy_work_queue_shards", "Distributed run shards by state.", work_queue.stats(), "state")
+    return lines
+
+
+REGISTRY.add_collector(_collect_runtime_gauges)
+
+
+def _sse(event, payload):
+    """Format one Server-Sent Events frame."""
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
 @app.route('/')
 def index():
     return render_template('index.html')
 
+@app.route('/metrics')
+def metrics():
+    """Prometheus text exposition of test, phase, LLM and runtime metrics."""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/pipeline')
 def pipeline():
     return render_template('pipeline.html')
@@ -94,6 +165,33 @@ def handle_generate_test():
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
+@app.route('/api/generate-test/stream', methods=['POST'])
+def handle_generate_test_stream():
+    """
+    Streams generated test cases as SSE `test` events while the LLM is still writing,
+    then a `done` event with the count (or an `error` event).
+    """
+    data = request.get_json(silent=True) or {}
+    test_type = data.get('test_type')
+    if not test_type:
+        return jsonify({'status': 'error', 'message': 'test_type is required'}), 400
+
+    def _stream():
+        count = 0
+        try:
+            for test in stream_test_cases(test_type, data):
+                count += 1
+                yield _sse('test', test)
+            if count:
+                yield _sse('done', {'count': count})
+            else:
+                yield _sse('error', {'message': 'Could not extract valid test cases from the AI response. Please try again.'})
+        except Exception as e:
+            yield _sse('error', {'message': str(e)})
+
+    return Response(_stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/api/parse-tests-from-file', methods=['POST'])
 def parse_tests_from_file_endpoint():
     """
@@ -110,38 +208,69 @@ def parse_tests_from_file_endpoint():
         file.seek(0)
         if file_size > app.config['MAX_CONTENT_LENGTH']:
             return jsonify({'status': 'error', 'message': f"File exceeds the {app.config['MAX_CONTENT_LENGTH'] / 1024 / 1024}MB size limit."}), 413
-        file_content = read_file_content(file)
-        if not file_content.strip():
+        use_cache = request.form.get('bypass_cache', '').lower() not in ('1', 'true', 'yes')
+        report = {}
+        file_content, all_tests = parse_file_for_tests(file, use_cache=use_cache, report=report)
+        if not file_content.strip() and not all_tests:
             return jsonify({'status': 'error', 'message': 'Could not extract any text from the uploaded file or the file type is unsupported.'}), 400
-        all_tests = parse_document_for_tests(file_content)
         if not all_tests:
             return jsonify({'status': 'error', 'message': 'No valid test cases could be extracted from the document.'}), 500
         return jsonify({
             'status': 'success',
             'message': 'Test cases parsed successfully!',
-            'tests': all_tests
+            'tests': all_tests,
+            'chunks': report.get('chunks', []),
+            'cache': {k: report[k] for k in ('extraction_cache', 'tests_cache') if k in report}
         })
     except Exception as e:
         return jsonify({'status': 'error', 'message': f"An unexpected server error occurred: {str(e)}"}), 500
 
 
+def _validate_run_request(data):
+    """Return an error response for an invalid run payload, or None if it is usable."""
+    if not data:
+        return jsonify({'status': 'error', 'message': 'JSON body is required'}), 400
+    if not data.get('website_url'):
+        return jsonify({'status': 'error', 'message': 'website_url is required'}), 400
+    test_cases = data.get('test_cases', [])
+    if not isinstance(test_cases, list) or len(test_cases) == 0:
+        return jsonify({'status': 'error', 'message': 'test_cases must be a non-empty array'}), 400
+    if data.get('rerun') and get_history() is None:
+        return jsonify({'status': 'error',
+                        'message': 'rerun needs run history; set RUN_HISTORY_DB (e.g. run_history.db)'}), 400
+    return None
+
+
+def _requested_workers(data):
+    """The request's `workers`, clamped to SELENIUM_MAX_WORKERS; None leaves the default."""
+    workers = data.get('workers')
+    return None if workers is None else resolve_workers(workers)
+
+
 @app.route('/api/run-test', methods=['POST'])
 def run_test():
     """API endpoint for running test cases"""
     try:
         data = request.get_json()
+        error = _validate_run_request(data)
+        if error:
+            return error
         website_url = data.get('website_url')
         test_cases = data.get('test_cases', [])
-        if not website_url:
-            return jsonify({'status': 'error', 'message': 'website_url is required'}), 400
-        if not isinstance(test_cases, list) or len(test_cases) == 0:
-            return jsonify({'status': 'error', 'message': 'test_cases must be a non-empty array'}), 400
 
-        results = run_tests(website_url, test_cases)
+        workers = _requested_workers(data)
+        report = {}
+        results = _run_suite(website_url, test_cases, distributed=bool(data.get('distributed')),
+                             rerun=bool(data.get('rerun')), workers=workers, report=report, pool=driver_pool,
+                             fail_fast=bool(data.get('fail_fast')))
         return jsonify({
             'status': 'success',
             'message': f'Tests executed on website: {website_url}',
-            'results': results
+            'results': results,
+            'shards': report.get('shards', []),
+            'schedule': report.get('schedule', {}),
+            'distributed': report.get('distributed'),
+            'history': report.get('history')
         })
         
     except Exception as e:
@@ -150,6 +279,112 @@ def run_test():
             'message': str(e)
         }), 500
 
+def _summarize(results, elapsed):
+    counts = {}
+    for r in results:
+        counts[r.get('status', 'unknown')] = counts.get(r.get('status', 'unknown'), 0) + 1
+    return {'total': len(results), 'counts': counts, 'elapsed': round(elapsed, 3)}
+
+
+@app.route('/api/run-test/stream', methods=['POST'])
+def run_test_stream():
+    """Run tests and stream each result as an SSE `result` event the moment it finishes,
+    followed by a `summary` event (or an `error` event). Closing the connection cancels
+    the remaining tests."""
+    data = request.get_json(silent=True)
+    error = _validate_run_request(data)
+    if error:
+        return error
+    website_url = data['website_url']
+    test_cases = data['test_cases']
+    workers = _requested_workers(data)
+    fail_fast = bool(data.get('fail_fast'))
+    distributed = bool(data.get('distributed'))
+    rerun = bool(data.get('rerun'))
+
+    events = queue.Queue()
+    cancel = threading.Event()
+    done = object()
+
+    def _produce():
+        start = time.perf_counter()
+        report = {}
+        try:
+            results = _run_suite(website_url, test_cases, distributed=distributed, rerun=rerun, workers=workers,
+                                 report=report, pool=driver_pool,
+                                 on_result=lambda r: events.put(('result', r)), cancel=cancel, fail_fast=fail_fast)
+            summary = _summarize(results, time.perf_counter() - start)
+            summary['shards'] = report.get('shards', [])
+            summary['schedule'] = report.get('schedule', {})
+            summary['history'] = report.get('history')
+            events.put(('summary', summary))
+        except Exception as e:
+            events.put(('error', {'message': str(e)}))
+        events.put(done)
+
+    def _stream():
+        threading.Thread(target=_produce, name="run-test-stream", daemon=True).start()
+        try:
+            yield _sse('start', {'total': len(test_cases), 'website_url': website_url})
+            while True:
+                item = events.get()
+                if item is done:
+                    return
+                yield _sse(*item)
+        finally:
+            cancel.set()
+
+    return Response(_stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/jobs', methods=['POST'])
+def submit_job():
+    """Queue a test run in the background and return its job id immediately."""
+    try:
+        data = request.get_json()
+        error = _validate_run_request(data)
+        if error:
+            return error
+        job = job_manager.submit(data['website_url'], data['test_cases'],
+                                 workers=_requested_workers(data), pool=driver_pool,
+                                 fail_fast=bool(data.get('fail_fast')), distributed=bool(data.get('distributed')),
+                                 rerun=bool(data.get('rerun')))
+        return jsonify({'status': 'success', 'job_id': job.id, 'job': job.to_dict()}), 202
+    except JobQueueFull as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 503
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """Job status and results so far; `?since=N` returns only results after offset N."""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': 'Job not found or expired'}), 404
+    since = request.args.get('since', 0, type=int)
+    return jsonify({'status': 'success', 'job': job.to_dict(since=max(0, since))})
+
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """Cancel a queued or running job."""
+    job = job_manager.cancel(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': 'Job not found or expired'}), 404
+    return jsonify({'status': 'success', 'job': job.to_dict()})
+
+@app.route('/api/history', methods=['GET'])
+def run_history():
+    """Recent runs for `?website_url=...` (newest first, `?limit=N`, default 20)."""
+    history = get_history()
+    if history is None:
+        return jsonify({'status': 'error', 'message': 'Run history is disabled (set RUN_HISTORY_DB).'}), 404
+    website_url = request.args.get('website_url')
+    if not website_url:
+        return jsonify({'status': 'error', 'message': 'website_url is required'}), 400
+    limit = min(max(1, request.args.get('limit', 20, type=int)), 200)
+    return jsonify({'status': 'success', 'runs': history.runs(website_url, limit=limit)})
+
 @app.route('/api/upload', methods=['POST'])
 def upload_file():
     """API endpoint for file uploads for the generation flow (in-memory only)"""
@@ -168,10 +403,22 @@ def upload_file():
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
+def _export_format(data):
+    """Requested export format from the JSON body or ?format=, defaulting to docx."""
+    return str((data or {}).get('format') or request.args.get('format') or 'docx').lower()
+
+
+def _streamed_download(chunks, fmt, basename):
+    mimetype, extension = FORMATS[fmt]
+    return Response(chunks, mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename="{basename}.{extension}"'})
+
+
 @app.route('/api/download-tests', methods=['POST'])
 def download_tests():
     """
-    API endpoint for generating and downloading a DOCX of test cases (in-memory, no disk write).
+    API endpoint for downloading test cases as DOCX (default), NDJSON or CSV.
+    Non-DOCX formats are streamed row by row without building the file in memory.
     """
     from io import BytesIO
     try:
@@ -179,6 +426,13 @@ def download_tests():
         test_cases = data.get('test_cases', [])
         if not test_cases:
             return jsonify({'status': 'error', 'message': 'No test cases provided'}), 400
+        fmt = _export_format(data)
+        if fmt == 'ndjson':
+            return _streamed_download(iter_ndjson(test_cases), fmt, 'generated_test_cases')
+        if fmt == 'csv':
+            return _streamed_download(iter_csv(test_cases, TEST_COLUMNS), fmt, 'generated_test_cases')
+        if fmt != 'docx':
+            return jsonify({'status': 'error', 'message': f"Unsupported format '{fmt}' (use docx, ndjson or csv)"}), 400
         document = Document()
         document.add_heading('Generated Test Cases', 0)
         for test in test_cases:
@@ -187,6 +441,8 @@ def download_tests():
             document.add_paragraph(f"Type: {test.get('type', 'N/A')}")
             document.add_paragraph(f"Selector: {test.get('selector', 'N/A')}")
             document.add_paragraph()
+        # Machine-readable copy so re-uploading this file needs no parsing
+        embed_tests_payload(document, test_cases)
         file_stream = BytesIO()
         document.save(file_stream)
         file_stream.seek(0)
@@ -197,7 +453,8 @@ def download_tests():
 @app.route('/api/download-results', methods=['POST'])
 def download_results():
     """
-    API endpoint for generating and downloading a DOCX of test execution results (in-memory, no disk write).
+    API endpoint for downloading test execution results as DOCX (default), NDJSON, CSV
+    or JUnit XML. Non-DOCX formats are streamed without building the file in memory.
     """
     from io import BytesIO
     try:
@@ -205,14 +462,27 @@ def download_results():
         test_results = data.get('test_results', [])
         if not test_results:
             return jsonify({'status': 'error', 'message': 'No test results provided'}), 400
+        fmt = _export_format(data)
+        if fmt == 'ndjson':
+            return _streamed_download(iter_ndjson(test_results), fmt, 'test_execution_results')
+        if fmt == 'csv':
+            return _streamed_download(iter_csv(test_results, RESULT_COLUMNS), fmt, 'test_execution_results')
+        if fmt == 'junit':
+            suite = data.get('suite_name') or 'BugzyAI'
+            return _streamed_download(iter_junit(test_results, suite), fmt, 'test_execution_results')
+        if fmt != 'docx':
+            return jsonify({'status': 'error', 'message': f"Unsupported format '{fmt}' (use docx, ndjson, csv or junit)"}), 400
         document = Document()
         document.add_heading('Test Execution Results', 0)
         for result in test_results:
             name = result.get('name', 'Unnamed Test')
             status = result.get('status', 'unknown').upper()
             message = result.get('message', '')
+            duration = result_duration(result)
             document.add_heading(name, level=1)
             document.add_paragraph(f"Status: {status}")
+            if duration is not None:
+                document.add_paragraph(f"Duration: {duration:.3f}s")
             if message:
                 document.add_paragraph(f"Details: {message}")
             document.add_paragraph()
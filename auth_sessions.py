@@ -0,0 +1,180 @@
+import os
+import time
+import hashlib
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+
+_CAPTURE_STORAGE_JS = """
+function dump(store) {
+  var out = {};
+  try { for (var i = 0; i < store.length; i++) { var k = store.key(i); out[k] = store.getItem(k); } } catch (e) {}
+  return out;
+}
+return {local: dump(window.localStorage), session: dump(window.sessionStorage)};
+"""
+
+_RESTORE_STORAGE_JS = """
+var local = arguments[0], session = arguments[1];
+try { for (var k in local) window.localStorage.setItem(k, local[k]); } catch (e) {}
+try { for (var s in session) window.sessionStorage.setItem(s, session[s]); } catch (e) {}
+"""
+
+
+def origin_of(url: str) -> str:
+    parts = urlparse(url)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+def session_key(website_url: str, username: str, password: str) -> Tuple[str, str, str]:
+    """(origin, username, password digest): one snapshot per site and credential pair."""
+    return origin_of(website_url), username, hashlib.sha256(password.encode("utf-8")).hexdigest()
+
+
+class AuthSnapshot:
+    """Cookies plus local/session storage of a logged-in browser, and the page it landed on."""
+
+    __slots__ = ("origin", "url", "cookies", "local_storage", "session_storage", "created_at")
+
+    def __init__(self, origin: str, url: str, cookies: List[Dict], local_storage: Dict[str, str],
+                 session_storage: Dict[str, str]):
+        self.origin = origin
+        self.url = url
+        self.cookies = cookies
+        self.local_storage = local_storage
+        self.session_storage = session_storage
+        self.created_at = time.time()
+
+    def expired(self, ttl: float) -> bool:
+        now = time.time()
+        if ttl and now - self.created_at > ttl:
+            return True
+        return any(c.get("expiry") and c["expiry"] <= now for c in self.cookies)
+
+
+def capture(driver: webdriver.Chrome) -> AuthSnapshot:
+    """Snapshot the current page's auth state (two round trips: cookies, storage)."""
+    url = driver.current_url
+    storage = driver.execute_script(_CAPTURE_STORAGE_JS) or {}
+    return AuthSnapshot(origin_of(url), url, driver.get_cookies(),
+                        storage.get("local") or {}, storage.get("session") or {})
+
+
+def restore(driver: webdriver.Chrome, snapshot: AuthSnapshot) -> None:
+    """
+    Load a snapshot into a (fresh or pooled) session and open the post-login page.
+    Cookies go in with one CDP call when available, else per-cookie add_cookie on the origin.
+    """
+    if origin_of(driver.current_url or "") != snapshot.origin:
+        driver.get(snapshot.origin + "/")
+    try:
+        driver.execute_cdp_cmd("Network.setCookies", {"cookies": [_cdp_cookie(c, snapshot.origin)
+                                                                   for c in snapshot.cookies]})
+    except Exception:
+        for cookie in snapshot.cookies:
+            try:
+                driver.add_cookie(cookie)
+            except WebDriverException:
+                continue
+    driver.execute_script(_RESTORE_STORAGE_JS, snapshot.local_storage, snapshot.session_storage)
+    driver.get(snapshot.url)
+
+
+def _cdp_cookie(cookie: Dict, origin: str) -> Dict:
+    """Selenium cookie dict -> CDP Network.CookieParam."""
+    param = {"name": cookie["name"], "value": cookie["value"], "path": cookie.get("path", "/"),
+             "secure": bool(cookie.get("secure")), "httpOnly": bool(cookie.get("httpOnly"))}
+    if cookie.get("domain"):
+        param["domain"] = cookie["domain"]
+    else:
+        param["url"] = origin
+    if cookie.get("expiry"):
+        param["expires"] = cookie["expiry"]
+    if cookie.get("sameSite") in ("Strict", "Lax", "None"):
+        param["sameSite"] = cookie["sameSite"]
+    return param
+
+
+class AuthSessionStore:
+    """
+    Process-wide snapshots keyed by session_key(). The first caller for a key performs the
+    login while concurrent shards wanting the same key wait for it, so a site is logged into
+    once per credential pair until the snapshot expires (`ttl` seconds or a cookie expiry).
+    """
+
+    def __init__(self, ttl: float = 1800.0):
+        self.ttl = ttl
+        self._snapshots: Dict[Tuple[str, str, str], AuthSnapshot] = {}
+        # key -> [lock, callers holding or waiting]; dropped when the last caller leaves
+        self._key_locks: Dict[Tuple[str, str, str], List] = {}
+        self._lock = threading.Lock()
+        self.logins = 0
+        self.reuses = 0
+
+    def get(self, key: Tuple[str, str, str]) -> Optional[AuthSnapshot]:
+        with self._lock:
+            snapshot = self._snapshots.get(key)
+            if snapshot is not None and snapshot.expired(self.ttl):
+                del self._snapshots[key]
+                return None
+            return snapshot
+
+    def put(self, key: Tuple[str, str, str], snapshot: AuthSnapshot) -> None:
+        with self._lock:
+            # Sweep expired snapshots so keys that are never asked for again do not pile up
+            for stale in [k for k, s in self._snapshots.items() if s.expired(self.ttl)]:
+                del self._snapshots[stale]
+            self._snapshots[key] = snapshot
+
+    def invalidate(self, key: Tuple[str, str, str]) -> None:
+        with self._lock:
+            self._snapshots.pop(key, None)
+
+    def get_or_login(self, key: Tuple[str, str, str],
+                     login: Callable[[], AuthSnapshot]) -> Tuple[AuthSnapshot, bool]:
+        """Return (snapshot, reused). Runs `login` only if no valid snapshot exists for `key`."""
+        with self._lock:
+            entry = self._key_locks.get(key)
+            if entry is None:
+                entry = self._key_locks[key] = [threading.Lock(), 0]
+            entry[1] += 1
+        try:
+            with entry[0]:
+                snapshot = self.get(key)
+                if snapshot is not None:
+                    with self._lock:
+                        self.reuses += 1
+                    return snapshot, True
+                snapshot = login()
+                self.put(key, snapshot)
+                with self._lock:
+                    self.logins += 1
+                return snapshot, False
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._key_locks[key]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"snapshots": len(self._snapshots), "logins": self.logins, "reuses": self.reuses}
+
+
+_store: Optional[AuthSessionStore] = None
+_store_lock = threading.Lock()
+
+
+def get_auth_store() -> Optional[AuthSessionStore]:
+    """Shared store configured by AUTH_SESSION_TTL (seconds); None when AUTH_SESSION_TTL=0."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            ttl = float(os.getenv("AUTH_SESSION_TTL", "1800"))
+            if ttl <= 0:
+                return None
+            _store = AuthSessionStore(ttl=ttl)
+        return _store
@@ -0,0 +1,108 @@
+"""
+Throughput benchmark for the plain-text test case parser.
+
+Builds synthetic exported documents with 1k..10k test cases (every fifth one missing
+its Type line) and times test_case_text.parse_test_blocks against the previous
+per-block regex parser, which drops incomplete cases. Per-test cost should stay flat
+as the document grows (linear scaling).
+
+    python benchmarks/bench_parser.py [--sizes 1000,2000,5000,10000] [--json out.json]
+"""
+import gc
+import os
+import re
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from test_case_text import parse_test_blocks  # noqa: E402
+
+
+def synthetic_document(count):
+    lines = ["Generated Test Cases"]
+    for i in range(1, count + 1):
+        lines.append(f"ID: {i} - Verify feature {i} behaves correctly")
+        lines.append(f"Description: Open the page, fill the form for case {i} and submit.")
+        if i % 3 == 0:
+            lines.append("The confirmation banner must be shown within two seconds.")
+        if i % 5:  # every fifth case omits its Type line, as hand-edited documents do
+            lines.append("Type: " + ("API" if i % 4 == 0 else "UI"))
+        lines.append(f"Selector: #form-{i} button[type='submit']")
+    return "\n".join(lines)
+
+
+def legacy_parse(file_content):
+    """The pre-existing fallback: split on '\\nID:' and re-compile a lazy DOTALL regex per block."""
+    all_tests = []
+    for block in re.split(r'\nID:', file_content, flags=re.MULTILINE):
+        if not block.strip() or "Generated Test Cases" in block:
+            continue
+        pattern = re.compile(
+            r"ID:\s*(?P<id>\d+)\s*-\s*(?P<name>.*?)\n"
+            r"Description:\s*(?P<description>.*?)\n"
+            r"Type:\s*(?P<type>.*?)\n"
+            r"Selector:\s*(?P<selector>.*)",
+            re.DOTALL
+        )
+        match = pattern.search("ID:" + block)
+        if match:
+            all_tests.append(match.groupdict())
+    return all_tests
+
+
+def best_of(fn, arg, repeat=5):
+    best = float("inf")
+    result = None
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = fn(arg)
+            best = min(best, time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return best, result
+
+
+def run(sizes):
+    rows = []
+    for size in sizes:
+        doc = synthetic_document(size)
+        new_time, parsed = best_of(parse_test_blocks, doc)
+        old_time, legacy = best_of(legacy_parse, doc)
+        assert len(parsed) == size, f"parsed {len(parsed)} of {size}"
+        rows.append({
+            "tests": size,
+            "bytes": len(doc),
+            "seconds": round(new_time, 5),
+            "us_per_test": round(new_time / size * 1e6, 2),
+            "tests_per_sec": round(size / new_time),
+            "legacy_seconds": round(old_time, 5),
+            "legacy_parsed": len(legacy),
+        })
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--sizes", default="1000,2000,5000,10000")
+    ap.add_argument("--json", help="write results to this file")
+    args = ap.parse_args()
+
+    rows = run([int(s) for s in args.sizes.split(",")])
+    print(f"{'tests':>8} {'bytes':>10} {'seconds':>9} {'us/test':>8} {'tests/s':>10} {'legacy s':>9} {'legacy found':>13}")
+    for r in rows:
+        print(f"{r['tests']:>8} {r['bytes']:>10} {r['seconds']:>9} {r['us_per_test']:>8} "
+              f"{r['tests_per_sec']:>10} {r['legacy_seconds']:>9} {r['legacy_parsed']:>13}")
+    scaling = rows[-1]["us_per_test"] / rows[0]["us_per_test"]
+    print(f"per-test cost ratio largest/smallest: {scaling:.2f} (1.0 = perfectly linear)")
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump({"benchmark": "parser", "rows": rows, "scaling": round(scaling, 3)}, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
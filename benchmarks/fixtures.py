@@ -0,0 +1,197 @@
+"""
+Local stand-ins used by the benchmark suite: a small fixture web app for the UI and API
+runners and an OpenRouter-compatible /chat/completions stub for everything that calls the LLM.
+Both run on ThreadingHTTPServer in a daemon thread, bound to an ephemeral localhost port.
+"""
+import re
+import json
+import time
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+INDEX_HTML = """<!doctype html>
+<html><head><title>Fixture Shop</title></head>
+<body>
+  <h1>Fixture Shop</h1>
+  <form id="login" action="/dashboard" method="get">
+    <label for="username">Username</label><input id="username" name="username">
+    <label for="password">Password</label><input id="password" name="password" type="password">
+    <button type="submit">Sign in</button>
+  </form>
+  <a id="forgot_password" href="/reset">Forgot password?</a>
+  <form id="contact" action="/thanks" method="get">
+    <input name="name" placeholder="Your name">
+    <input name="email" type="email" placeholder="Email">
+    <textarea name="message" placeholder="Message"></textarea>
+    <select name="topic"><option>Sales</option><option>Support</option></select>
+    <input type="checkbox" name="subscribe">
+    <button type="submit">Send</button>
+  </form>
+  <div id="late"></div>
+  <script>
+    setTimeout(function () {
+      var el = document.createElement("div");
+      el.id = "slow-banner";
+      el.textContent = "Loaded";
+      document.getElementById("late").appendChild(el);
+    }, 400);
+  </script>
+</body></html>"""
+
+PAGES = {
+    "/": INDEX_HTML,
+    "/dashboard": "<html><body><h1>Welcome back</h1><a id='logout' href='/'>Logout</a></body></html>",
+    "/reset": "<html><body><h1>Reset your password</h1><input id='email'></body></html>",
+    "/thanks": "<html><body><h1>Thank you</h1></body></html>",
+}
+
+ITEMS = [{"id": i, "name": f"Item {i}", "price": i * 3} for i in range(1, 51)]
+
+
+class FixtureSiteHandler(BaseHTTPRequestHandler):
+    """HTML pages for the UI runner and JSON endpoints for the API runner."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # keep-alive replies otherwise stall on delayed ACKs
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body, content_type="text/html; charset=utf-8"):
+        data = body.encode("utf-8") if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _json(self, status, payload):
+        self._send(status, json.dumps(payload), "application/json")
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path in PAGES:
+            self._send(200, PAGES[url.path])
+        elif url.path == "/slow":
+            time.sleep(int(query.get("ms", ["500"])[0]) / 1000)
+            self._send(200, "<html><body><h1>Finally</h1></body></html>")
+        elif url.path == "/api/health":
+            self._json(200, {"status": "ok"})
+        elif url.path == "/api/items":
+            self._json(200, ITEMS)
+        elif url.path.startswith("/api/items/"):
+            item_id = url.path.rsplit("/", 1)[-1]
+            match = [i for i in ITEMS if str(i["id"]) == item_id]
+            if match:
+                self._json(200, match[0])
+            else:
+                self._json(404, {"error": "not found"})
+        elif url.path == "/api/slow":
+            time.sleep(int(query.get("ms", ["200"])[0]) / 1000)
+            self._json(200, {"status": "ok"})
+        else:
+            self._send(404, "<html><body>Not found</body></html>")
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        if self.path == "/api/items":
+            try:
+                item = json.loads(body or b"{}")
+            except ValueError:
+                return self._json(400, {"error": "invalid json"})
+            self._json(201, {"id": len(ITEMS) + 1, **item})
+        elif self.path == "/api/login":
+            self._json(200, {"token": "fixture-token"})
+        else:
+            self._json(404, {"error": "not found"})
+
+
+_REQUIREMENT = re.compile(r"^REQ-(\d+):\s*(.+)$", re.MULTILINE)
+
+
+def stub_tests(prompt, count):
+    """
+    Deterministic completion for a prompt. Extraction prompts get one test per
+    "REQ-n: ..." line they contain; generation prompts get `count` mixed UI/API tests
+    that target the fixture site.
+    """
+    found = _REQUIREMENT.findall(prompt)
+    if found:
+        return [{"id": int(n), "name": f"Requirement {n}", "description": text.strip(),
+                 "type": "UI", "selector": f"#req-{n}"} for n, text in found]
+    tests = []
+    for i in range(1, count + 1):
+        if i % 3 == 0:
+            tests.append({"id": i, "name": f"Items endpoint {i}", "type": "API", "method": "GET",
+                          "endpoint": f"/api/items/{i}", "expected_status": 200,
+                          "description": "Fetch one item."})
+        else:
+            tests.append({"id": i, "name": f"Login form renders {i}", "type": "UI", "selector": "#username",
+                          "description": "Verify the login form is visible."})
+    return tests
+
+
+class LLMStubHandler(BaseHTTPRequestHandler):
+    """
+    Minimal OpenRouter-compatible /chat/completions. `latency` seconds are spent before
+    answering (spread across chunks when streaming) to stand in for model time.
+    """
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # keep-alive replies otherwise stall on delayed ACKs
+    latency = 0.0
+    tests_per_completion = 10
+    requests = 0
+    _lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        with LLMStubHandler._lock:
+            LLMStubHandler.requests += 1
+        prompt = "".join(m.get("content", "") for m in payload.get("messages", []))
+        content = json.dumps(stub_tests(prompt, self.tests_per_completion))
+        if payload.get("stream"):
+            return self._stream(content)
+        time.sleep(self.latency)
+        body = json.dumps({"choices": [{"message": {"role": "assistant", "content": content}}]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self, content):
+        pieces = [content[i:i + 64] for i in range(0, len(content), 64)] or [""]
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        for piece in pieces:
+            time.sleep(self.latency / len(pieces))
+            frame = json.dumps({"choices": [{"delta": {"content": piece}}]})
+            self.wfile.write(f"data: {frame}\n\n".encode())
+            self.wfile.flush()
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.close_connection = True
+
+
+@contextmanager
+def serve(handler_cls):
+    """Run `handler_cls` on 127.0.0.1:<ephemeral> for the duration of the block; yields the base URL."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler_cls)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name=f"{handler_cls.__name__}-server", daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}"
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,268 @@
+"""
+Offline benchmark suite: runs entirely against local stand-ins (benchmarks/fixtures.py),
+so numbers are repeatable and comparable between commits.
+
+Measures
+  api       tests/sec of run_api_tests against the fixture JSON endpoints
+  ui        tests/sec of run_tests (UI lane of the scheduler) against the fixture pages (skipped without Chrome)
+  parse     document_parser throughput (LLM extraction via the stub, plus the regex fallback)
+  generate  end-to-end latency of POST /api/generate-test through the Flask app
+
+Results are written to benchmarks/results/<commit>.json; pass --compare with an earlier
+file to print the change per metric.
+
+    python benchmarks/run_benchmarks.py [--only api,parse] [--llm-latency 0.2] [--compare old.json]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fixtures import FixtureSiteHandler, LLMStubHandler, serve  # noqa: E402
+
+BENCHMARKS = ("api", "ui", "parse", "generate")
+
+
+def _configure_env(llm_url):
+    """Point the app at the LLM stub with caching and client-side pacing disabled."""
+    os.environ.update({
+        "OPENROUTER_API_KEY": "benchmark",
+        "OPENROUTER_BASE_URL": llm_url,
+        "LLM_CACHE_SIZE": "0",
+        "LLM_CACHE_DB": "",
+        "LLM_RATE_PER_SEC": "0",
+        "EXTRACT_CACHE_SIZE": "0",
+        "DRIVER_POOL_SIZE": "0",
+    })
+
+
+def _commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def api_tests(count):
+    templates = [
+        {"name": "Health", "endpoint": "/api/health"},
+        {"name": "List items", "endpoint": "/api/items"},
+        {"name": "One item", "endpoint": "/api/items/7"},
+        {"name": "Missing item", "endpoint": "/api/items/999", "expected_status": 404},
+        {"name": "Create item", "endpoint": "/api/items", "method": "POST", "json": {"name": "x"},
+         "expected_status": 201},
+        {"name": "Slow endpoint", "endpoint": "/api/slow?ms=20"},
+    ]
+    return [dict(templates[i % len(templates)], id=i + 1, type="API") for i in range(count)]
+
+
+def ui_tests(count):
+    templates = [
+        {"name": "Login form present", "selector": "#username", "description": "Login form renders."},
+        {"name": "Contact submit present", "selector": "#contact button", "description": "Contact form renders."},
+        {"name": "Forgot password", "description": "Forgot password link opens the reset page."},
+        {"name": "Login", "action": "login", "description": "Sign in with demo / demo."},
+        {"name": "Contact form", "action": "form", "description": "Fill the form and submit."},
+        {"name": "Late banner", "selector": "#slow-banner", "description": "Banner appears after load."},
+    ]
+    return [dict(templates[i % len(templates)], id=i + 1, type="UI") for i in range(count)]
+
+
+def requirements_document(count):
+    lines = ["SOFTWARE REQUIREMENTS SPECIFICATION"]
+    for i in range(1, count + 1):
+        if i % 25 == 1:
+            lines.append(f"{i // 25 + 1}. Module {i // 25 + 1}")
+        lines.append(f"REQ-{i}: The user can complete workflow {i} and sees a confirmation message.")
+        lines.append("The confirmation must name the record that was changed and offer an undo link.")
+    return "\n".join(lines)
+
+
+def bench_api(site_url, count, concurrency):
+    from test_executor import run_api_tests
+    tests = api_tests(count)
+    run_api_tests(site_url, tests[:concurrency], concurrency=concurrency)  # warm connections
+    start = time.perf_counter()
+    results = run_api_tests(site_url, tests, concurrency=concurrency)
+    seconds = time.perf_counter() - start
+    durations = [r["duration"] for r in results]
+    return {
+        "tests": count,
+        "concurrency": concurrency,
+        "seconds": round(seconds, 4),
+        "tests_per_sec": round(count / seconds, 1),
+        "passed": sum(1 for r in results if r["status"] == "passed"),
+        "p50_ms": round(_percentile(durations, 50) * 1000, 2),
+        "p95_ms": round(_percentile(durations, 95) * 1000, 2),
+    }
+
+
+def bench_ui(site_url, count, workers):
+    from test_executor import _create_driver, run_tests
+    try:
+        _create_driver().quit()
+    except Exception as e:
+        return {"skipped": f"Chrome unavailable: {str(e).splitlines()[0] if str(e) else type(e).__name__}"}
+    report = {}
+    start = time.perf_counter()
+    results = run_tests(site_url, ui_tests(count), workers=workers, report=report)
+    seconds = time.perf_counter() - start
+    phases = {}
+    for r in results:
+        for name, value in (r.get("timings") or {}).items():
+            phases[name] = phases.get(name, 0.0) + value
+    return {
+        "tests": count,
+        "workers": workers,
+        "seconds": round(seconds, 3),
+        "tests_per_sec": round(count / seconds, 2),
+        "passed": sum(1 for r in results if r["status"] == "passed"),
+        "phase_seconds": {k: round(v, 3) for k, v in sorted(phases.items())},
+    }
+
+
+def bench_parse(sizes):
+    from document_parser import parse_document_for_tests, _regex_parse_document_for_tests
+    rows = []
+    for size in sizes:
+        doc = requirements_document(size)
+        before = LLMStubHandler.requests
+        report = {}
+        start = time.perf_counter()
+        tests = parse_document_for_tests(doc, use_cache=False, report=report)
+        seconds = time.perf_counter() - start
+        regex_start = time.perf_counter()
+        _regex_parse_document_for_tests(doc)
+        regex_seconds = time.perf_counter() - regex_start
+        rows.append({
+            "requirements": size,
+            "chars": len(doc),
+            "seconds": round(seconds, 4),
+            "tests": len(tests),
+            "tests_per_sec": round(len(tests) / seconds, 1) if seconds else None,
+            "chars_per_sec": round(len(doc) / seconds) if seconds else None,
+            "llm_requests": LLMStubHandler.requests - before,
+            "chunks": len(report.get("chunks") or []) or 1,
+            "regex_seconds": round(regex_seconds, 5),
+        })
+    return rows
+
+
+def bench_generate(requests_count):
+    from app import app
+    client = app.test_client()
+    latencies = []
+    for i in range(requests_count):
+        body = {"test_type": "manual", "manual_prompt": f"Checkout flow variant {i}", "bypass_cache": True}
+        start = time.perf_counter()
+        resp = client.post("/api/generate-test", json=body)
+        latencies.append(time.perf_counter() - start)
+        if resp.status_code != 200:
+            return {"error": f"HTTP {resp.status_code}: {resp.get_json()}"}
+    return {
+        "requests": requests_count,
+        "tests_per_response": LLMStubHandler.tests_per_completion,
+        "mean_ms": round(statistics.mean(latencies) * 1000, 2),
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 2),
+    }
+
+
+def headline(results):
+    """Flatten results into the metrics compared between runs (name -> value)."""
+    flat = {}
+    for name in ("api", "ui"):
+        if "tests_per_sec" in results.get(name, {}):
+            flat[f"{name}.tests_per_sec"] = results[name]["tests_per_sec"]
+    for row in results.get("parse", []):
+        flat[f"parse.{row['requirements']}.tests_per_sec"] = row["tests_per_sec"]
+    for key in ("p50_ms", "p95_ms"):
+        if key in results.get("generate", {}):
+            flat[f"generate.{key}"] = results["generate"][key]
+    return flat
+
+
+def compare(current, previous):
+    old = headline(previous.get("results", {}))
+    print(f"\ncompared with {previous.get('commit', '?')} ({previous.get('timestamp', '?')}):")
+    for name, value in headline(current["results"]).items():
+        if old.get(name) in (None, 0) or value is None:
+            print(f"  {name:<32} {value}")
+            continue
+        change = (value - old[name]) / old[name] * 100
+        better = change < 0 if name.endswith("_ms") else change > 0
+        print(f"  {name:<32} {old[name]} -> {value} ({change:+.1f}%{'' if abs(change) < 5 else ', better' if better else ', worse'})")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--only", default=",".join(BENCHMARKS), help="comma-separated subset of " + ",".join(BENCHMARKS))
+    ap.add_argument("--api-tests", type=int, default=600)
+    ap.add_argument("--api-concurrency", type=int, default=8)
+    ap.add_argument("--ui-tests", type=int, default=24)
+    ap.add_argument("--ui-workers", type=int, default=2)
+    ap.add_argument("--load-profile", default="full", help="SELENIUM_LOAD_PROFILE for the UI benchmark (full, light)")
+    ap.add_argument("--parse-sizes", default="50,500,2000", help="requirements per synthetic document")
+    ap.add_argument("--generate-requests", type=int, default=20)
+    ap.add_argument("--llm-latency", type=float, default=0.0, help="seconds the LLM stub waits per completion")
+    ap.add_argument("--out", help="results file (default benchmarks/results/<commit>.json)")
+    ap.add_argument("--compare", help="earlier results file to diff against")
+    args = ap.parse_args()
+
+    selected = [b.strip() for b in args.only.split(",") if b.strip()]
+    unknown = set(selected) - set(BENCHMARKS)
+    if unknown:
+        ap.error(f"unknown benchmark(s): {', '.join(sorted(unknown))}")
+    LLMStubHandler.latency = args.llm_latency
+
+    results = {}
+    with serve(FixtureSiteHandler) as site_url, serve(LLMStubHandler) as llm_url:
+        _configure_env(llm_url)
+        os.environ["SELENIUM_LOAD_PROFILE"] = args.load_profile
+        for name in selected:
+            print(f"running {name} ...", flush=True)
+            if name == "api":
+                results[name] = bench_api(site_url, args.api_tests, args.api_concurrency)
+            elif name == "ui":
+                results[name] = bench_ui(site_url, args.ui_tests, args.ui_workers)
+            elif name == "parse":
+                results[name] = bench_parse([int(s) for s in args.parse_sizes.split(",")])
+            elif name == "generate":
+                results[name] = bench_generate(args.generate_requests)
+            print(json.dumps(results[name], indent=2))
+
+    commit = _commit()
+    payload = {
+        "benchmark": "suite",
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "config": {k: v for k, v in vars(args).items() if k not in ("out", "compare")},
+        "results": results,
+    }
+    out = args.out or os.path.join(ROOT, "benchmarks", "results", f"{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as fh:
+        json.dump(payload, fh, indent=2)
+    print(f"\nsaved {out}")
+
+    if args.compare:
+        with open(args.compare) as fh:
+            compare(payload, json.load(fh))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+Distributed runs: the coordinating process splits a suite into shards on a ShardQueue
+(work_queue.py) and aggregates what workers push back; workers on any machine that can
+reach the queue claim shards and run them with run_tests.
+
+    WORK_QUEUE_URL=sqlite:///bugzy_queue.db python distributed.py [--worker-id ID] [--drain]
+"""
+import os
+import time
+import uuid
+import socket
+import argparse
+import threading
+from collections import Counter
+from typing import Dict, List, Optional
+
+from scheduler import as_ids, merge_by_id, skipped_result
+from test_executor import run_tests
+from work_queue import FAILED, FINISHED_STATES, Shard, ShardQueue, get_work_queue, open_queue
+
+
+def _stale_after() -> float:
+    return float(os.getenv("WORKER_STALE_SECONDS", "30"))
+
+
+def plan_shards(tests: List[Dict], size: int) -> List[List[Dict]]:
+    """
+    Pack tests into shards of about `size`, in input order. Tests linked by `depends_on` or a
+    shared `group` always land in the same shard so their ordering and skips still apply;
+    such a cluster larger than `size` becomes one oversized shard. Linear in tests + edges.
+    """
+    size = max(1, size)
+    parent = list(range(len(tests)))
+
+    def find(i: int) -> int:
+        root = i
+        while parent[root] != root:
+            root = parent[root]
+        while parent[i] != root:
+            parent[i], i = root, parent[i]
+        return root
+
+    def union(a: int, b: int) -> None:
+        ra, rb = find(a), find(b)
+        if ra != rb:
+            parent[max(ra, rb)] = min(ra, rb)
+
+    first_by_id: Dict[str, int] = {}
+    first_by_group: Dict[str, int] = {}
+    for i, t in enumerate(tests):
+        if t.get("id") is not None:
+            union(i, first_by_id.setdefault(str(t.get("id")), i))
+        if t.get("group") not in (None, ""):
+            union(i, first_by_group.setdefault(str(t.get("group")), i))
+    for i, t in enumerate(tests):
+        for dep in as_ids(t.get("depends_on")):
+            if dep in first_by_id:
+                union(i, first_by_id[dep])
+
+    clusters: Dict[int, List[int]] = {}
+    for i in range(len(tests)):
+        clusters.setdefault(find(i), []).append(i)
+    shards: List[List[Dict]] = []
+    current: List[int] = []
+    for members in clusters.values():
+        if current and len(current) + len(members) > size:
+            shards.append([tests[i] for i in sorted(current)])
+            current = []
+        current.extend(members)
+    if current:
+        shards.append([tests[i] for i in sorted(current)])
+    return shards
+
+
+def _missing(tests: List[Dict], results: List[Dict]) -> List[Dict]:
+    """Tests of a shard with no result (matched by id, duplicates counted)."""
+    have = Counter(str(r.get("id")) for r in results)
+    missing = []
+    for t in tests:
+        key = str(t.get("id"))
+        if have[key] > 0:
+            have[key] -= 1
+        else:
+            missing.append(t)
+    return missing
+
+
+def _stream(on_result, streamed: Dict[str, int], attempt: int, result: Dict) -> None:
+    """
+    Pass a shard's result to `on_result`. If the same test's result was already streamed from an
+    earlier claim of the shard, it is sent marked `"retried": true`: it replaces that result.
+    """
+    key = str(result.get("id"))
+    previous = streamed.get(key)
+    streamed[key] = attempt
+    if on_result:
+        on_result(result if previous is None or previous == attempt else dict(result, retried=True))
+
+
+def run_distributed(website_url: str, tests: List[Dict], workers: Optional[int] = None,
+                    report: Optional[Dict] = None, pool=None, on_result=None,
+                    cancel: Optional[threading.Event] = None, fail_fast: bool = False,
+                    queue: Optional[ShardQueue] = None, shard_size: Optional[int] = None,
+                    timeout: Optional[float] = None, poll: float = 0.5) -> List[Dict]:
+    """Drop-in for run_tests that executes the suite on remote workers.
+
+    Shards (DISTRIBUTED_SHARD_SIZE tests, default 25) go onto the queue; results are
+    streamed to `on_result` as workers push them and returned ordered by test id. Shards
+    whose worker stops heartbeating are re-queued (WORKER_STALE_SECONDS), up to
+    WORKER_MAX_ATTEMPTS claims; a retry's result for a test already streamed from the
+    dead claim is streamed again with `"retried": true` and replaces the earlier one.
+    `workers` is the browsers per worker; `pool` is unused, as the browsers live on the
+    workers. Tests left unfinished after `timeout` seconds (DISTRIBUTED_RUN_TIMEOUT,
+    default 3600) are reported failed.
+    """
+    queue = queue or get_work_queue()
+    if queue is None:
+        raise RuntimeError("Distributed runs need WORK_QUEUE_URL (e.g. sqlite:///bugzy_queue.db).")
+    if not tests:
+        return []
+    shard_size = shard_size or int(os.getenv("DISTRIBUTED_SHARD_SIZE", "25"))
+    timeout = timeout if timeout is not None else float(os.getenv("DISTRIBUTED_RUN_TIMEOUT", "3600"))
+    stale_after = _stale_after()
+
+    run_id = uuid.uuid4().hex
+    queue.submit(run_id, website_url, plan_shards(tests, shard_size), {"workers": workers, "fail_fast": fail_fast})
+    deadline = time.monotonic() + timeout
+    cursor = 0
+    latest: Dict[str, int] = {}                 # shard -> newest claim results were seen from
+    streamed: Dict[str, Dict[str, int]] = {}    # shard -> {test id: claim its result was streamed from}
+    stop_reason: Optional[str] = None
+    try:
+        while True:
+            queue.requeue_stale(stale_after)
+            for cursor, shard_id, attempt, result in queue.results(run_id, cursor):
+                if attempt < latest.get(shard_id, 0):
+                    continue  # from a claim that has since been superseded
+                latest[shard_id] = attempt
+                _stream(on_result, streamed.setdefault(shard_id, {}), attempt, result)
+                if fail_fast and result.get("status") == "failed" and stop_reason is None:
+                    stop_reason = f"Skipped: fail-fast after test {result.get('id')} failed"
+                    queue.cancel_run(run_id)
+            if cancel is not None and cancel.is_set() and stop_reason is None:
+                stop_reason = "cancelled"
+                queue.cancel_run(run_id)
+            if time.monotonic() > deadline and stop_reason is None:
+                stop_reason = "timeout"
+                queue.cancel_run(run_id)
+            if all(state in FINISHED_STATES for state in queue.states(run_id)):
+                break
+            time.sleep(poll)
+        shards = queue.shards(run_id)
+        rows = queue.results(run_id)
+    finally:
+        queue.purge_run(run_id)
+
+    # Only the last claim of each shard counts; earlier attempts were cut off mid-way
+    final_attempt = {s["id"]: s["attempt"] for s in shards}
+    by_shard: Dict[str, List[Dict]] = {}
+    for _, shard_id, attempt, result in rows:
+        if attempt == final_attempt.get(shard_id):
+            by_shard.setdefault(shard_id, []).append(result)
+
+    results: List[Dict] = []
+    for s in shards:
+        got = by_shard.get(s["id"], [])
+        results.extend(got)
+        for t in _missing(s["tests"], got):
+            if s["state"] == FAILED:
+                result = {"id": t.get("id"), "name": t.get("name", "Unnamed Test"), "status": "failed",
+                          "message": f"Shard abandoned after {s['attempt']} attempt(s): {s['error']}"}
+            elif stop_reason == "timeout":
+                result = {"id": t.get("id"), "name": t.get("name", "Unnamed Test"), "status": "failed",
+                          "message": f"No worker finished this test within {timeout:g}s."}
+            elif stop_reason and stop_reason != "cancelled":
+                result = skipped_result(t, stop_reason)
+            else:
+                continue
+            results.append(result)
+            _stream(on_result, streamed.setdefault(s["id"], {}), s["attempt"], result)
+
+    if report is not None:
+        report["shards"] = [{"shard": s["seq"], "tests": len(s["tests"]), "worker": s["worker"],
+                             "attempts": s["attempt"], "state": s["state"],
+                             "wall_time": round(s["finished"] - s["started"], 3)
+                             if s["finished"] and s["started"] else None} for s in shards]
+        report["distributed"] = {"run_id": run_id, "shards": len(shards),
+                                 "retried": sum(1 for s in shards if s["attempt"] > 1), "stopped": stop_reason}
+    return merge_by_id(results)
+
+
+def _run_shard(queue: ShardQueue, shard: Shard, interval: float, pool=None) -> bool:
+    """Run one claimed shard, heartbeating meanwhile; stops early if the claim is lost."""
+    cancel = threading.Event()
+    finished = threading.Event()
+
+    def _beat():
+        while not finished.wait(interval):
+            try:
+                alive = queue.heartbeat(shard)
+            except Exception:
+                continue  # e.g. the queue file is briefly locked; try again next beat
+            if not alive:
+                cancel.set()
+                return
+
+    beater = threading.Thread(target=_beat, name=f"heartbeat-{shard.id[:8]}", daemon=True)
+    beater.start()
+    try:
+        run_tests(shard.website_url, shard.tests, workers=shard.options.get("workers"), pool=pool,
+                  on_result=lambda r: queue.push_result(shard, r), cancel=cancel,
+                  fail_fast=bool(shard.options.get("fail_fast")))
+    except Exception as e:
+        queue.fail(shard, str(e))
+        return False
+    finally:
+        finished.set()
+        beater.join()
+    return queue.complete(shard)
+
+
+def run_worker(queue: ShardQueue, worker_id: Optional[str] = None, poll: float = 1.0,
+               stop: Optional[threading.Event] = None, drain: bool = False, pool=None) -> int:
+    """
+    Claim and run shards until `stop` is set, or with `drain` until none are queued.
+    Heartbeats every WORKER_HEARTBEAT_SECONDS (default 5). Returns the shards completed.
+    """
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+    interval = float(os.getenv("WORKER_HEARTBEAT_SECONDS", "5"))
+    stale_after = _stale_after()
+    stop = stop or threading.Event()
+    completed = 0
+    while not stop.is_set():
+        queue.requeue_stale(stale_after)
+        shard = queue.claim(worker_id)
+        if shard is None:
+            if drain:
+                break
+            stop.wait(poll)
+            continue
+        if _run_shard(queue, shard, interval, pool):
+            completed += 1
+    return completed
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Run test shards from a BugzyAI work queue.")
+    ap.add_argument("--queue", default=os.getenv("WORK_QUEUE_URL", ""), help="queue URL (default WORK_QUEUE_URL)")
+    ap.add_argument("--worker-id", help="name reported with claims (default host-pid-random)")
+    ap.add_argument("--poll", type=float, default=1.0, help="seconds between polls of an empty queue")
+    ap.add_argument("--drain", action="store_true", help="exit once no shards are queued")
+    args = ap.parse_args()
+    if not args.queue:
+        ap.error("set WORK_QUEUE_URL or pass --queue")
+
+    from driver_pool import create_pool_from_env
+    pool = create_pool_from_env()
+    if pool:
+        pool.start()
+    try:
+        completed = run_worker(open_queue(args.queue), args.worker_id, poll=args.poll, drain=args.drain, pool=pool)
+        print(f"Worker finished: {completed} shard(s) completed.")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if pool:
+            pool.close()
+
+
+if __name__ == "__main__":
+    main()
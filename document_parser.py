@@ -1,92 +1,454 @@
 
+import io
 import os
 import re
+import json
+import time
+import hashlib
+import itertools
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import xml.etree.ElementTree as ET
 from docx import Document
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.opc.packuri import PackURI
+from docx.opc.part import Part
 import pdfplumber
-from llm_utils import get_llm, invoke_llm
+from llm_utils import get_llm, invoke_llm, forget_llm_response
+from extraction_cache import get_extraction_cache, hash_upload
+from test_case_text import parse_test_blocks
 
-def read_file_content(file):
+TESTS_PAYLOAD_PARTNAME = "/customXml/bugzyTests.xml"
+TESTS_PAYLOAD_NS = "urn:bugzyai:tests:1"
+
+
+_W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+_W_P, _W_T = f"{{{_W_NS}}}p", f"{{{_W_NS}}}t"
+
+
+def _body_digest(root):
+    """SHA-256 of the text nodes (w:t, a newline per w:p) under a WordprocessingML element
+    (an ElementTree element or python-docx's own)."""
+    h = hashlib.sha256()
+    for node in root.iter():
+        if node.tag == _W_P:
+            h.update(b"\n")
+        elif node.tag == _W_T and node.text:
+            h.update(node.text.encode("utf-8"))
+    return h.hexdigest()
+
+
+def embed_tests_payload(document, tests):
     """
-    Reads the content of an uploaded file (.docx or .pdf) and returns it as a single string.
+    Attach the exact test list to a python-docx Document as a custom XML part, so the
+    exported file can be loaded back without re-parsing its human-readable text.
+    Call it after the body is written: the payload records a digest of that text.
+    """
+    root = ET.Element(f"{{{TESTS_PAYLOAD_NS}}}tests", {"format": "json", "count": str(len(tests)),
+                                                       "digest": _body_digest(document.element)})
+    root.text = json.dumps(tests, ensure_ascii=False)
+    blob = ET.tostring(root, encoding="utf-8", xml_declaration=True)
+    part = Part(PackURI(TESTS_PAYLOAD_PARTNAME), "application/xml", blob, document.part.package)
+    document.part.relate_to(part, RT.CUSTOM_XML)
+
+
+def load_tests_payload(file):
+    """
+    Return the test list embedded by embed_tests_payload, or None if the DOCX has none,
+    its text was edited since export (the body digest no longer matches) or the payload
+    is not a list of tests with ids, in which case the document is extracted and parsed
+    like any other upload. Ids are renumbered like parse_document_for_tests does.
+    The stream is rewound so the file can still be extracted normally.
+    """
+    try:
+        file.seek(0)
+        with zipfile.ZipFile(file) as package:
+            try:
+                blob = package.read(TESTS_PAYLOAD_PARTNAME.lstrip("/"))
+            except KeyError:
+                return None
+            root = ET.fromstring(blob)
+            if root.tag != f"{{{TESTS_PAYLOAD_NS}}}tests" or not root.get("digest"):
+                return None
+            # The body's text nodes straight from the package; no python-docx object model
+            if root.get("digest") != _body_digest(ET.fromstring(package.read("word/document.xml"))):
+                return None
+        tests = json.loads(root.text or "[]")
+        if not isinstance(tests, list) or not all(isinstance(t, dict) and t.get('id') is not None for t in tests):
+            return None
+        return _number_tests(tests)
+    except Exception as e:
+        print(f"Warning: could not read embedded test payload: {e}")
+        return None
+    finally:
+        file.seek(0)
+
+
+DOCX_BLOCK_PARAGRAPHS = 40
+
+
+_worker_pdf = None
+
+
+def _open_worker_pdf(data):
+    """Process-pool initializer: receive the PDF bytes once per worker and keep it open."""
+    global _worker_pdf
+    _worker_pdf = pdfplumber.open(io.BytesIO(data))
+
+
+def _extract_pdf_pages(start, end):
+    """Process-pool worker: extract text for pages [start, end) of the worker's PDF."""
+    texts = []
+    for i in range(start, end):
+        page = _worker_pdf.pages[i]
+        texts.append(page.extract_text() or "")
+        page.close()
+    return texts
+
+
+def _iter_pdf_parallel(file, processes):
+    """Extract page ranges in a process pool, yielding page texts in order as ranges finish.
+    The bytes are shipped to each worker once; tasks carry only page ranges."""
+    data = file.read()
+    with pdfplumber.open(io.BytesIO(data)) as pdf:
+        page_count = len(pdf.pages)
+    per_task = max(1, int(os.getenv("DOC_EXTRACT_PAGES_PER_TASK", "16")))
+    ranges = [(start, min(start + per_task, page_count)) for start in range(0, page_count, per_task)]
+    with ProcessPoolExecutor(max_workers=min(processes, len(ranges)) or 1, initializer=_open_worker_pdf,
+                             initargs=(data,)) as executor:
+        futures = [executor.submit(_extract_pdf_pages, start, end) for start, end in ranges]
+        for future in futures:
+            for text in future.result():
+                if text:
+                    yield text
+
+
+def _iter_pdf_pages(file, processes=None):
+    processes = processes if processes is not None else int(os.getenv("DOC_EXTRACT_PROCESSES", "0"))
+    if processes > 1:
+        yield from _iter_pdf_parallel(file, processes)
+        return
+    with pdfplumber.open(file) as pdf:
+        for page in pdf.pages:
+            text = page.extract_text()
+            if text:
+                yield text
+            page.close()  # drop cached layout objects so memory stays per-page
+
+
+def iter_file_content(file, processes=None):
+    """
+    Yields the text of an uploaded file incrementally: one string per PDF page (prefixed with
+    a form feed after the first, which split_document treats as a page boundary), or per block
+    of DOCX paragraphs (a block ends before each heading or after DOCX_BLOCK_PARAGRAPHS).
+    With `processes` > 1 (or DOC_EXTRACT_PROCESSES), PDF page ranges are extracted in a
+    process pool; pages are still yielded in document order.
     """
     filename = file.filename.lower()
     if filename.endswith('.docx'):
         doc = Document(file)
-        return "\n".join([para.text for para in doc.paragraphs if para.text.strip()])
+        block = []
+        for para in doc.paragraphs:
+            if not para.text.strip():
+                continue
+            is_heading = (para.style.name or "").lower().startswith(("heading", "title"))
+            if block and (is_heading or len(block) >= DOCX_BLOCK_PARAGRAPHS):
+                yield "\n".join(block)
+                block = []
+            block.append(para.text)
+        if block:
+            yield "\n".join(block)
     elif filename.endswith('.pdf'):
-        with pdfplumber.open(file) as pdf:
-            full_text = []
-            for page in pdf.pages:
-                text = page.extract_text()
-                if text:
-                    full_text.append(text)
-            return "\n".join(full_text)
-    return ""
+        # Pages after the first start with a form feed, so joined text keeps page boundaries
+        for number, text in enumerate(_iter_pdf_pages(file, processes)):
+            yield "\f" + text if number else text
+
+
+def read_file_content(file):
+    """
+    Reads the content of an uploaded file (.docx or .pdf) and returns it as a single string.
+    """
+    return "\n".join(iter_file_content(file))
+
+EXTRACT_PROMPT = (
+    "You are an expert QA engineer. Extract all possible test cases from the following document content. "
+    "Return a JSON array of test case objects, each with keys: 'id', 'name', 'description', 'type', and 'selector'. "
+    "Do not include any text outside the JSON array. The response MUST start with '[' and end with ']'.\n"
+    "Document Content: ```{input}```"
+)
+
+# Lines that start a new section: "1.", "2.3 Title", "Section 4", "Chapter 2", "REQUIREMENTS"
+_SECTION_RE = re.compile(r"^(?:\d+(?:\.\d+)*\.?\s+\S|(?i:section|chapter|appendix)\b|[A-Z][A-Z0-9 /&-]{3,}$)")
 
-def parse_document_for_tests(file_content):
+
+def _llm_extract_tests(llm, text, use_cache=True):
+    """Run the extraction prompt over one piece of text. Returns a list or raises ValueError."""
+    response = invoke_llm(llm, EXTRACT_PROMPT, text, use_cache=use_cache)
+    if isinstance(response, dict) and 'error' in response:
+        raise ValueError(response.get('details') or response['error'])
+    try:
+        json_match = re.search(r'\[.*\]', response, re.DOTALL)
+        test_cases = json.loads(json_match.group(0) if json_match else response)
+    except Exception:
+        forget_llm_response(llm, EXTRACT_PROMPT, text)
+        raise ValueError("Could not parse LLM response as a JSON array")
+    if not isinstance(test_cases, list):
+        raise ValueError("LLM response was not a JSON array")
+    return [t for t in test_cases if isinstance(t, dict)]
+
+
+def split_document(file_content, max_chars=12000, overlap=800):
+    """
+    Split document text into chunks of at most ~max_chars, breaking on page (form feed) or
+    section-heading boundaries where possible, else on blank lines. Each chunk after the
+    first starts with the last `overlap` characters of its predecessor for context.
+    """
+    blocks, current = [], []
+    for line in file_content.split("\n"):
+        if line.startswith("\f") or (_SECTION_RE.match(line.strip()) and current):
+            if current:
+                blocks.append("\n".join(current))
+            current = [line.lstrip("\f")]
+        else:
+            current.append(line)
+    if current:
+        blocks.append("\n".join(current))
+
+    return list(iter_chunks(blocks, max_chars=max_chars, overlap=overlap))
+
+
+def _break_block(block, max_chars):
+    """Break an oversized block on paragraph, then line, then hard character limits."""
+    if len(block) <= max_chars:
+        yield block
+        return
+    for para in re.split(r"\n\s*\n", block):
+        while len(para) > max_chars:
+            cut = para.rfind("\n", 0, max_chars)
+            cut = cut if cut > max_chars // 2 else max_chars
+            yield para[:cut]
+            para = para[cut:]
+        yield para
+
+
+def iter_chunks(blocks, max_chars=12000, overlap=800):
+    """
+    Group an iterable of text blocks (sections, pages) into chunks of ~max_chars, lazily,
+    so chunks can be dispatched while later blocks are still being extracted.
+    """
+    previous, current, size = None, [], 0
+
+    def _emit(text):
+        return text if previous is None or overlap <= 0 else previous[-overlap:] + "\n" + text
+
+    for block in blocks:
+        for piece in _break_block(block, max_chars):
+            if current and size + len(piece) + 1 > max_chars:
+                text = "\n".join(current)
+                if text.strip():
+                    yield _emit(text)
+                    previous = text
+                current, size = [], 0
+            current.append(piece)
+            size += len(piece) + 1
+    text = "\n".join(current)
+    if text.strip():
+        yield _emit(text)
+
+
+def _dedupe_key(test):
+    norm = lambda v: re.sub(r"\s+", " ", str(v or "")).strip().lower()
+    return (norm(test.get('name')), norm(test.get('description')),
+            norm(test.get('selector') or test.get('endpoint')))
+
+
+def merge_test_lists(lists):
+    """Concatenate per-chunk results, dropping duplicates (e.g. from chunk overlap), and renumber."""
+    merged, seen = [], set()
+    for tests in lists:
+        for test in tests:
+            key = _dedupe_key(test)
+            if key in seen:
+                continue
+            seen.add(key)
+            merged.append(test)
+    for i, test in enumerate(merged):
+        test['id'] = i + 1
+    return merged
+
+
+def _run_chunks(llm, chunks, use_cache=True, workers=None, report=None):
+    """
+    Send chunks to the LLM on a bounded thread pool as they are produced, then merge.
+    If `report` is a dict, report['chunks'] gets per-chunk size, timing, count and error.
+    Failed chunks are reported and skipped; raises ValueError only if every chunk fails.
+    """
+    workers = workers or int(os.getenv("DOC_PARSE_WORKERS", "4"))
+
+    def _run(index, chunk):
+        start = time.perf_counter()
+        entry = {'chunk': index, 'chars': len(chunk)}
+        try:
+            tests = _llm_extract_tests(llm, chunk, use_cache=use_cache)
+            entry['tests'] = len(tests)
+        except Exception as e:
+            tests = None
+            entry['error'] = str(e)
+        entry['elapsed'] = round(time.perf_counter() - start, 3)
+        return tests, entry
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="doc-chunk") as executor:
+        futures = [executor.submit(_run, i, chunk) for i, chunk in enumerate(chunks)]
+        outcomes = [f.result() for f in futures]
+
+    if report is not None:
+        report['chunks'] = [entry for _, entry in outcomes]
+    successes = [tests for tests, _ in outcomes if tests is not None]
+    if not successes:
+        raise ValueError("All document chunks failed to parse")
+    return merge_test_lists(successes)
+
+
+def parse_document_chunked(file_content, llm=None, use_cache=True, max_chars=None, overlap=None,
+                           workers=None, report=None):
+    """
+    Map-reduce extraction: split the document, send chunks to the LLM concurrently
+    (DOC_PARSE_WORKERS, default 4), then merge, de-duplicate and renumber.
+    """
+    llm = llm or get_llm()
+    if not llm:
+        raise ValueError("LLM not available")
+    max_chars = max_chars or int(os.getenv("DOC_CHUNK_CHARS", "12000"))
+    overlap = int(os.getenv("DOC_CHUNK_OVERLAP", "800")) if overlap is None else overlap
+    chunks = split_document(file_content, max_chars=max_chars, overlap=overlap)
+    return _run_chunks(llm, chunks, use_cache=use_cache, workers=workers, report=report)
+
+
+def _fallback(file_content, reason, report=None):
+    """Regex fallback used whenever the LLM path is unavailable or fails."""
+    print(f"Warning: {reason}, falling back to regex parsing.")
+    if report is not None:
+        report['fallback'] = 'regex'
+    return _regex_parse_document_for_tests(file_content)
+
+
+def _extract_and_parse(file, use_cache=True, report=None):
+    """
+    Extract and parse an uploaded file in one pass. Pages are read incrementally; once the
+    text exceeds DOC_CHUNK_CHARS, chunks are dispatched to the LLM while later pages are
+    still being extracted. Returns (file_content, tests).
+    """
+    max_chars = int(os.getenv("DOC_CHUNK_CHARS", "12000"))
+    overlap = int(os.getenv("DOC_CHUNK_OVERLAP", "800"))
+    blocks = iter_file_content(file)
+    seen, size = [], 0
+    for block in blocks:
+        seen.append(block)
+        size += len(block) + 1
+        if size > max_chars:
+            break
+    else:
+        file_content = "\n".join(seen)
+        return file_content, (parse_document_for_tests(file_content, use_cache=use_cache, report=report)
+                              if file_content.strip() else [])
+
+    llm = get_llm()
+    collected = []
+
+    def _remaining():
+        for block in itertools.chain(seen, blocks):
+            collected.append(block)
+            yield block
+
+    if not llm:
+        file_content = "\n".join(_remaining())
+        return file_content, _fallback(file_content, "LLM not available", report)
+    try:
+        tests = _run_chunks(llm, iter_chunks(_remaining(), max_chars=max_chars, overlap=overlap),
+                            use_cache=use_cache, report=report)
+        return "\n".join(collected), tests
+    except ValueError as e:
+        file_content = "\n".join(collected)
+        return file_content, _fallback(file_content, e, report)
+
+
+def parse_file_for_tests(file, use_cache=True, report=None):
+    """
+    Extract and parse an uploaded file, reusing earlier work for identical uploads.
+    DOCX files exported by /api/download-tests carry their tests as an embedded payload,
+    which is loaded as-is with no LLM call (file_content is then empty) unless the
+    document text was edited after export.
+    Otherwise the upload is hashed (streaming SHA-256); a cached extraction skips pdfplumber/python-docx,
+    and cached tests from the same model skip the LLM too (unless use_cache is False).
+    Returns (file_content, tests).
+    """
+    report = {} if report is None else report
+    if file.filename.lower().endswith('.docx'):
+        tests = load_tests_payload(file)
+        if tests is not None:
+            report['source'] = 'embedded'
+            return "", tests
+
+    cache = get_extraction_cache()
+    if not cache:
+        return _extract_and_parse(file, use_cache=use_cache, report=report)
+
+    key = f"{os.path.splitext(file.filename.lower())[1]}:{hash_upload(file)}"
+    llm = get_llm()
+    model = llm.model if llm else None
+    file_content = cache.get_text(key)
+    if file_content is None:
+        report['extraction_cache'] = 'miss'
+        file_content, tests = _extract_and_parse(file, use_cache=use_cache, report=report)
+    else:
+        report['extraction_cache'] = 'hit'
+        tests = cache.get_tests(key, model) if use_cache else None
+        if tests is not None:
+            report['tests_cache'] = 'hit'
+            return file_content, tests
+        tests = parse_document_for_tests(file_content, use_cache=use_cache, report=report) if file_content.strip() else []
+
+    # Regex-fallback results are not cached so a later upload retries the LLM
+    cache.put(key, file_content, tests if 'fallback' not in report else None, model)
+    return file_content, tests
+
+
+def parse_document_for_tests(file_content, use_cache=True, report=None):
     """
     Uses the LLM to extract test cases from a document's content. Falls back to regex if LLM fails.
+    Identical documents reuse the cached LLM response unless use_cache is False.
+    Documents longer than DOC_CHUNK_CHARS are parsed chunk by chunk (see parse_document_chunked).
     """
     llm = get_llm()
     if not llm:
-        print("Warning: LLM not available, falling back to regex parsing.")
-        return _regex_parse_document_for_tests(file_content)
-
-    prompt_template = (
-        "You are an expert QA engineer. Extract all possible test cases from the following document content. "
-        "Return a JSON array of test case objects, each with keys: 'id', 'name', 'description', 'type', and 'selector'. "
-        "Do not include any text outside the JSON array. The response MUST start with '[' and end with ']'.\n"
-        "Document Content: ```{input}```"
-    )
-    response = invoke_llm(llm, prompt_template, file_content)
-    if isinstance(response, dict) and 'error' in response:
-        print("Warning: LLM failed, falling back to regex parsing.")
-        return _regex_parse_document_for_tests(file_content)
+        return _fallback(file_content, "LLM not available", report)
 
-    # Try to parse the LLM's response as JSON
-    import json
-    import re
     try:
-        json_match = re.search(r'\[.*\]', response, re.DOTALL)
-        if json_match:
-            test_cases = json.loads(json_match.group(0))
-        else:
-            test_cases = json.loads(response)
-    except Exception:
-        print("Warning: Could not parse LLM response, falling back to regex parsing.")
-        return _regex_parse_document_for_tests(file_content)
+        if len(file_content) > int(os.getenv("DOC_CHUNK_CHARS", "12000")):
+            return parse_document_chunked(file_content, llm=llm, use_cache=use_cache, report=report)
+        test_cases = _llm_extract_tests(llm, file_content, use_cache=use_cache)
+    except ValueError as e:
+        return _fallback(file_content, e, report)
+
+    return _number_tests(test_cases)
+
 
-    # Re-number test case IDs to be sequential and clean, ensuring consistency
-    for i, test in enumerate(test_cases):
+def _number_tests(tests):
+    """Re-number test ids to be sequential and clean, keeping depends_on pointing at the same tests."""
+    renamed = {str(test.get('id')): i + 1 for i, test in enumerate(tests)}
+    for i, test in enumerate(tests):
         test['id'] = i + 1
-    return test_cases
+        depends = test.get('depends_on')
+        if isinstance(depends, list):
+            test['depends_on'] = [renamed.get(str(d), d) for d in depends]
+        elif depends not in (None, ''):
+            test['depends_on'] = renamed.get(str(depends), depends)
+    return tests
 
-# Fallback regex parser (original logic)
+# Fallback parser for the plain-text "ID: n - Name / Description: / Type: / Selector:" layout
 def _regex_parse_document_for_tests(file_content):
-    all_tests = []
-    test_case_blocks = re.split(r'\nID:', file_content, flags=re.MULTILINE)
-    for i, block in enumerate(test_case_blocks):
-        if not block.strip() or "Generated Test Cases" in block:
-            continue
-        block_text = "ID:" + block
-        pattern = re.compile(
-            r"ID:\s*(?P<id>\d+)\s*-\s*(?P<name>.*?)\n"
-            r"Description:\s*(?P<description>.*?)\n"
-            r"Type:\s*(?P<type>.*?)\n"
-            r"Selector:\s*(?P<selector>.*)",
-            re.DOTALL
-        )
-        match = pattern.search(block_text)
-        if match:
-            data = match.groupdict()
-            all_tests.append({
-                "id": int(data['id']),
-                "name": data['name'].strip(),
-                "description": data['description'].strip(),
-                "type": data['type'].strip(),
-                "inputs": [],
-                "selector": data['selector'].strip()
-            })
+    all_tests = parse_test_blocks(file_content)
     for i, test in enumerate(all_tests):
         test['id'] = i + 1
+        test.setdefault('inputs', [])
     return all_tests
@@ -0,0 +1,268 @@
+import os
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Deque, Dict, Optional, Set, Tuple
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+
+from test_executor import _create_driver, max_workers
+from auth_sessions import origin_of
+
+# Everything Storage.clearDataForOrigin can drop for an origin
+_STORAGE_TYPES = "cookies,local_storage,session_storage,indexeddb,websql,cache_storage,service_workers,file_systems"
+
+
+class _PooledDriver:
+    """Book-keeping for one live browser session."""
+
+    __slots__ = ("driver", "created_at", "uses")
+
+    def __init__(self, driver: webdriver.Chrome):
+        self.driver = driver
+        self.created_at = time.monotonic()
+        self.uses = 0
+
+
+def _window_size() -> Tuple[int, int]:
+    raw = os.getenv("SELENIUM_WINDOW_SIZE", "1366,900")
+    try:
+        w, h = (int(p) for p in raw.split(",", 1))
+        return w, h
+    except ValueError:
+        return 1366, 900
+
+
+class DriverPool:
+    """Long-lived pool of warm Chrome sessions shared across /api/run-test requests.
+
+    - `min_idle` sessions are created up front (and replenished) so checkout is instant.
+    - At most `max_live` browsers exist at once; checkout blocks until one frees up.
+    - Sessions are health-checked on checkout and reset (cookies, storage, window size)
+      on checkin; they are recycled once older than `max_age` seconds or after `max_uses`.
+    """
+
+    def __init__(self, min_idle: int = 1, max_live: int = 4, max_age: float = 600.0,
+                 max_uses: int = 50, checkout_timeout: float = 60.0,
+                 factory: Callable[[], webdriver.Chrome] = _create_driver):
+        self.min_idle = max(0, min_idle)
+        self.max_live = max(1, max_live, self.min_idle)
+        self.max_age = max_age
+        self.max_uses = max_uses
+        self.checkout_timeout = checkout_timeout
+        self._factory = factory
+        self._idle: Deque[_PooledDriver] = deque()
+        self._in_use: Dict[int, _PooledDriver] = {}
+        self._live = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    # --- lifecycle -------------------------------------------------------
+
+    def start(self) -> None:
+        """Pre-warm `min_idle` sessions in the background."""
+        threading.Thread(target=self._replenish, name="driver-pool-warm", daemon=True).start()
+
+    def close(self) -> None:
+        """Quit every idle session; in-use sessions are quit when checked back in."""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._live -= len(idle)
+            self._cond.notify_all()
+        for entry in idle:
+            self._quit(entry)
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {"live": self._live, "idle": len(self._idle), "in_use": len(self._in_use), "max_live": self.max_live}
+
+    # --- checkout / checkin ---------------------------------------------
+
+    def checkout(self, timeout: Optional[float] = None) -> webdriver.Chrome:
+        """Return a healthy driver, creating one if under the cap, else waiting for a checkin."""
+        deadline = time.monotonic() + (self.checkout_timeout if timeout is None else timeout)
+        while True:
+            entry = None
+            create = False
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise WebDriverException("Driver pool is closed")
+                    if self._idle:
+                        entry = self._idle.popleft()
+                        break
+                    if self._live < self.max_live:
+                        self._live += 1
+                        create = True
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise WebDriverException(f"No browser available within {self.checkout_timeout}s (max {self.max_live} live)")
+                    self._cond.wait(remaining)
+
+            if create:
+                try:
+                    entry = _PooledDriver(self._factory())
+                except Exception:
+                    self._release_slot()
+                    raise
+            elif self._expired(entry) or not self._healthy(entry):
+                self._retire(entry)
+                continue
+
+            entry.uses += 1
+            with self._cond:
+                self._in_use[id(entry.driver)] = entry
+            return entry.driver
+
+    def checkin(self, driver: webdriver.Chrome) -> None:
+        """Reset a driver's state and make it available again (or retire it)."""
+        with self._cond:
+            entry = self._in_use.pop(id(driver), None)
+        if entry is None:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+            return
+        if self._closed or self._expired(entry) or not self._reset(entry):
+            self._retire(entry)
+            return
+        with self._cond:
+            self._idle.append(entry)
+            self._cond.notify()
+
+    @contextmanager
+    def session(self, timeout: Optional[float] = None):
+        driver = self.checkout(timeout)
+        try:
+            yield driver
+        finally:
+            self.checkin(driver)
+
+    # --- internals -------------------------------------------------------
+
+    def _expired(self, entry: _PooledDriver) -> bool:
+        return (time.monotonic() - entry.created_at) > self.max_age or entry.uses >= self.max_uses
+
+    @staticmethod
+    def _healthy(entry: _PooledDriver) -> bool:
+        try:
+            return entry.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    @staticmethod
+    def _visited_origins(driver: webdriver.Chrome) -> Set[str]:
+        """Origins the session may hold storage for: its navigation history, cookie domains, current page."""
+        urls = [driver.current_url]
+        try:
+            history = driver.execute_cdp_cmd("Page.getNavigationHistory", {})
+            urls += [e.get("url") for e in history.get("entries", [])]
+        except Exception:
+            pass
+        try:
+            for cookie in driver.execute_cdp_cmd("Network.getAllCookies", {}).get("cookies", []):
+                domain = (cookie.get("domain") or "").lstrip(".")
+                if domain:
+                    urls += [f"https://{domain}", f"http://{domain}"]
+        except Exception:
+            pass
+        return {origin_of(u) for u in urls if u and u.startswith(("http://", "https://"))}
+
+    @classmethod
+    def _reset(cls, entry: _PooledDriver) -> bool:
+        """
+        Clear cookies and web storage of every origin the session visited, restore window size
+        and park on about:blank. Without CDP only the current page's storage can be cleared, so a
+        session that touched several origins is retired instead (returns False).
+        """
+        driver = entry.driver
+        try:
+            origins = cls._visited_origins(driver)
+            try:
+                for origin in origins:
+                    driver.execute_cdp_cmd("Storage.clearDataForOrigin",
+                                           {"origin": origin, "storageTypes": _STORAGE_TYPES})
+            except Exception:
+                if len(origins) > 1:
+                    return False
+                try:
+                    driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+                except Exception:
+                    pass
+            try:
+                driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+            except Exception:
+                driver.delete_all_cookies()
+            driver.set_window_size(*_window_size())
+            driver.get("about:blank")
+            try:
+                driver.execute_cdp_cmd("Page.resetNavigationHistory", {})
+            except Exception:
+                pass
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _quit(entry: _PooledDriver) -> None:
+        try:
+            entry.driver.quit()
+        except Exception:
+            pass
+
+    def _release_slot(self) -> None:
+        with self._cond:
+            self._live -= 1
+            self._cond.notify()
+
+    def _retire(self, entry: _PooledDriver) -> None:
+        self._quit(entry)
+        self._release_slot()
+        if not self._closed:
+            threading.Thread(target=self._replenish, name="driver-pool-warm", daemon=True).start()
+
+    def _replenish(self) -> None:
+        """Top the idle set back up to `min_idle` without exceeding `max_live`."""
+        while True:
+            with self._cond:
+                if self._closed or len(self._idle) >= self.min_idle or self._live >= self.max_live:
+                    return
+                self._live += 1
+            try:
+                entry = _PooledDriver(self._factory())
+            except Exception as e:
+                print(f"Warning: could not pre-warm browser: {e}")
+                self._release_slot()
+                return
+            with self._cond:
+                if self._closed:
+                    self._live -= 1
+                    closed = True
+                else:
+                    self._idle.append(entry)
+                    self._cond.notify()
+                    closed = False
+            if closed:
+                self._quit(entry)
+                return
+
+
+def create_pool_from_env() -> Optional[DriverPool]:
+    """Build a DriverPool from DRIVER_POOL_* env vars; returns None when DRIVER_POOL_SIZE is 0/unset.
+    DRIVER_POOL_MAX defaults to enough browsers for one run at SELENIUM_MAX_WORKERS."""
+    size = int(os.getenv("DRIVER_POOL_SIZE", "0"))
+    if size <= 0:
+        return None
+    return DriverPool(
+        min_idle=size,
+        max_live=int(os.getenv("DRIVER_POOL_MAX", str(max(size, max_workers())))),
+        max_age=float(os.getenv("DRIVER_POOL_MAX_AGE", "600")),
+        max_uses=int(os.getenv("DRIVER_POOL_MAX_USES", "50")),
+        checkout_timeout=float(os.getenv("DRIVER_POOL_CHECKOUT_TIMEOUT", "60")),
+    )
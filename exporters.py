@@ -0,0 +1,98 @@
+import io
+import re
+import csv
+import json
+from typing import Dict, Iterable, Iterator, List, Optional
+from xml.sax.saxutils import escape, quoteattr
+
+TEST_COLUMNS = ["id", "name", "type", "description", "selector", "endpoint", "method", "expected_status"]
+RESULT_COLUMNS = ["id", "name", "status", "message", "duration"]
+
+# format -> (mimetype, file extension)
+FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv", "csv"),
+    "junit": ("application/xml", "xml"),
+}
+
+
+def result_duration(result: Dict) -> Optional[float]:
+    """Seconds spent on a result, from whichever timing field the runner attached."""
+    for key in ("duration", "elapsed"):
+        value = result.get(key)
+        if isinstance(value, (int, float)):
+            return float(value)
+    return None
+
+
+def iter_ndjson(items: Iterable[Dict]) -> Iterator[str]:
+    """One JSON object per line."""
+    for item in items:
+        yield json.dumps(item, ensure_ascii=False) + "\n"
+
+
+def iter_csv(items: Iterable[Dict], columns: List[str]) -> Iterator[str]:
+    """Header row, then one row per item; nested values are JSON-encoded."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+
+    def _row(values) -> str:
+        buf.seek(0)
+        buf.truncate()
+        writer.writerow(values)
+        return buf.getvalue()
+
+    yield _row(columns)
+    for item in items:
+        values = []
+        for col in columns:
+            value = result_duration(item) if col == "duration" else item.get(col)
+            if isinstance(value, (dict, list)):
+                value = json.dumps(value, ensure_ascii=False)
+            values.append("" if value is None else value)
+        yield _row(values)
+
+
+# Characters XML 1.0 does not allow (C0 controls other than tab/LF/CR, surrogates, U+FFFE/U+FFFF)
+_XML_INVALID = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]")
+
+
+def _xml_text(value) -> str:
+    """str(value) with characters XML 1.0 cannot carry replaced by U+FFFD."""
+    return _XML_INVALID.sub("\ufffd", str(value))
+
+
+def _junit_kind(result: Dict) -> str:
+    """"passed", "failed", "skipped" or "error" (any other status, e.g. error/unsupported)."""
+    status = result.get("status")
+    return status if status in ("passed", "failed", "skipped") else "error"
+
+
+def iter_junit(results: List[Dict], suite_name: str = "BugzyAI") -> Iterator[str]:
+    """JUnit XML as understood by common CI systems (one <testsuite>, one <testcase> per result).
+    The classname is bugzy.<runner> (ui, api, ...), from the `runner` record_test attaches."""
+    kinds = [_junit_kind(r) for r in results]
+    failures = kinds.count("failed")
+    errors = kinds.count("error")
+    skipped = kinds.count("skipped")
+    total_time = sum(result_duration(r) or 0.0 for r in results)
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield (f"<testsuites tests=\"{len(results)}\" failures=\"{failures}\" errors=\"{errors}\" "
+           f"time=\"{total_time:.3f}\">\n"
+           f"  <testsuite name={quoteattr(_xml_text(suite_name))} tests=\"{len(results)}\" failures=\"{failures}\" "
+           f"errors=\"{errors}\" skipped=\"{skipped}\" time=\"{total_time:.3f}\">\n")
+    for r, kind in zip(results, kinds):
+        name = _xml_text(r.get("name") or f"Test {r.get('id')}")
+        classname = _xml_text(f"bugzy.{str(r.get('runner') or r.get('type') or 'test').lower()}")
+        duration = result_duration(r) or 0.0
+        head = f"    <testcase classname={quoteattr(classname)} name={quoteattr(name)} time=\"{duration:.3f}\""
+        message = _xml_text(r.get("message") or "")
+        if kind in ("failed", "error"):
+            tag = "failure" if kind == "failed" else "error"
+            yield (f"{head}>\n      <{tag} message={quoteattr(message[:500])}>{escape(message)}</{tag}>\n"
+                   f"    </testcase>\n")
+        elif kind == "skipped":
+            yield f"{head}>\n      <skipped message={quoteattr(message[:500])}/>\n    </testcase>\n"
+        else:
+            yield f"{head}/>\n"
+    yield "  </testsuite>\n</testsuites>\n"
@@ -0,0 +1,94 @@
+import os
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+HASH_BLOCK_SIZE = 64 * 1024
+
+
+def hash_upload(file) -> str:
+    """Streaming SHA-256 of an uploaded file's bytes; the stream is rewound afterwards."""
+    h = hashlib.sha256()
+    file.seek(0)
+    while True:
+        block = file.read(HASH_BLOCK_SIZE)
+        if not block:
+            break
+        h.update(block)
+    file.seek(0)
+    return h.hexdigest()
+
+
+class ExtractionCache:
+    """
+    LRU cache of extracted document text (and, optionally, the parsed test list) keyed by
+    upload content hash. Bounded by entry count and by the total size of cached text.
+    """
+
+    def __init__(self, max_entries: int = 64, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_text(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry["text"]
+
+    def get_tests(self, key: str, model: Optional[str]) -> Optional[List[Dict]]:
+        """Parsed tests for this upload, if they were produced by the same model."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.get("tests") is None or entry.get("model") != model:
+                return None
+            self._entries.move_to_end(key)
+            return copy.deepcopy(entry["tests"])
+
+    def put(self, key: str, text: str, tests: Optional[List[Dict]] = None, model: Optional[str] = None) -> None:
+        size = len(text.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old["size"]
+            self._entries[key] = {"text": text, "size": size, "model": model,
+                                  "tests": copy.deepcopy(tests) if tests else None}
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted["size"]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries), "bytes": self._bytes}
+
+
+_cache: Optional[ExtractionCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_extraction_cache() -> Optional[ExtractionCache]:
+    """Process-wide cache configured from EXTRACT_CACHE_* env vars; None when EXTRACT_CACHE_SIZE=0."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            size = int(os.getenv("EXTRACT_CACHE_SIZE", "64"))
+            if size <= 0:
+                return None
+            _cache = ExtractionCache(
+                max_entries=size,
+                max_bytes=int(os.getenv("EXTRACT_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+            )
+        return _cache
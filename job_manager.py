@@ -0,0 +1,196 @@
+import os
+import time
+import uuid
+import queue
+import threading
+from collections import OrderedDict, deque
+from typing import Callable, Dict, List, Optional
+
+
+class JobQueueFull(Exception):
+    """Raised when the pending-job queue is at capacity."""
+
+
+class Job:
+    """A single background test run and its (partial) results."""
+
+    def __init__(self, website_url: str, tests: List[Dict], options: Optional[Dict] = None):
+        self.id = uuid.uuid4().hex
+        self.website_url = website_url
+        self.tests = tests
+        self.total = len(tests)
+        self.options = options or {}
+        self.status = "queued"
+        self.results: List[Dict] = []
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.cancel_event = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed", "cancelled")
+
+    def add_result(self, result: Dict) -> None:
+        """Append a streamed result; one marked `retried` replaces the earlier result for its test in place."""
+        with self._lock:
+            if result.get("retried"):
+                for i in range(len(self.results) - 1, -1, -1):
+                    if self.results[i].get("id") == result.get("id"):
+                        self.results[i] = result
+                        return
+            self.results.append(result)
+
+    def finish(self, final: List[Dict]) -> None:
+        """
+        Replace the streamed results with the runner's returned list. Each test keeps the
+        position it was streamed at, so `since` offsets stay valid; tests never streamed go
+        last, and a streamed result the runner did not return is left as it was.
+        """
+        by_id: Dict[str, deque] = {}
+        for r in final:
+            by_id.setdefault(str(r.get("id")), deque()).append(r)
+        with self._lock:
+            merged = []
+            for r in self.results:
+                pending = by_id.get(str(r.get("id")))
+                merged.append(pending.popleft() if pending else r)
+            merged.extend(r for pending in by_id.values() for r in pending)
+            self.results = merged
+
+    def to_dict(self, since: int = 0) -> Dict:
+        """Serializable snapshot; `since` returns only results after that offset."""
+        with self._lock:
+            results = self.results[since:]
+            completed = len(self.results)
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "website_url": self.website_url,
+            "total": self.total,
+            "completed": completed,
+            "results": results,
+            "next": since + len(results),
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobManager:
+    """Runs test suites on background worker threads behind a bounded queue.
+
+    Finished jobs are kept for `retention` seconds and at most `max_retained` of
+    them are held, oldest evicted first, so memory stays flat under load.
+    """
+
+    def __init__(self, runner: Callable[..., List[Dict]], workers: int = 2, queue_size: int = 20,
+                 retention: float = 900.0, max_retained: int = 100):
+        self._runner = runner
+        self._workers = max(1, workers)
+        self._queue_size = max(1, queue_size)
+        # Cancelled jobs stay in the queue until a worker drops them but stop counting here
+        self._queue: "queue.Queue[Job]" = queue.Queue()
+        self._pending = 0
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._retention = retention
+        self._max_retained = max_retained
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+
+    def submit(self, website_url: str, tests: List[Dict], **options) -> Job:
+        """Queue a run and return its Job immediately. Raises JobQueueFull when saturated."""
+        self._ensure_workers()
+        job = Job(website_url, tests, options)
+        with self._lock:
+            self._prune()
+            if self._pending >= self._queue_size:
+                raise JobQueueFull(f"Job queue is full ({self._queue_size} pending)")
+            self._pending += 1
+            self._queue.put_nowait(job)
+            self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            self._prune()
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """Request cancellation. Queued jobs never start; running jobs stop before the next test."""
+        job = self.get(job_id)
+        if job is None:
+            return None
+        with self._lock:
+            job.cancel_event.set()
+            if job.status == "queued":
+                job.status = "cancelled"
+                job.finished_at = time.time()
+                job.tests = []
+                self._pending -= 1
+        return job
+
+    def stats(self) -> Dict[str, int]:
+        """Retained job counts by status, plus the number waiting in the queue."""
+        counts = {status: 0 for status in ("queued", "running", "completed", "cancelled", "failed")}
+        with self._lock:
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            counts["pending"] = self._pending
+        return counts
+
+    def _ensure_workers(self) -> None:
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self._workers):
+                t = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def _work(self) -> None:
+        while True:
+            job = self._queue.get()
+            try:
+                with self._lock:
+                    if job.status != "queued":
+                        continue  # cancelled while waiting; already off the pending count
+                    self._pending -= 1
+                    job.status = "running"
+                job.started_at = time.time()
+                try:
+                    final = self._runner(job.website_url, job.tests, on_result=job.add_result,
+                                         cancel=job.cancel_event, **job.options)
+                    job.finish(final or [])
+                    job.status = "cancelled" if job.cancel_event.is_set() else "completed"
+                except Exception as e:
+                    job.error = str(e)
+                    job.status = "failed"
+                job.finished_at = time.time()
+            finally:
+                job.tests = []  # only results are retained after the run
+                self._queue.task_done()
+
+    def _prune(self) -> None:
+        """Drop finished jobs past retention, then the oldest finished beyond max_retained."""
+        now = time.time()
+        finished = [j for j in self._jobs.values() if j.finished]
+        for job in finished:
+            if now - (job.finished_at or now) > self._retention:
+                del self._jobs[job.id]
+        finished = [j for j in self._jobs.values() if j.finished]
+        for job in finished[:max(0, len(finished) - self._max_retained)]:
+            del self._jobs[job.id]
+
+
+def create_job_manager_from_env(runner: Callable[..., List[Dict]]) -> JobManager:
+    return JobManager(
+        runner,
+        workers=int(os.getenv("JOB_WORKERS", "2")),
+        queue_size=int(os.getenv("JOB_QUEUE_SIZE", "20")),
+        retention=float(os.getenv("JOB_RETENTION_SECONDS", "900")),
+        max_retained=int(os.getenv("JOB_MAX_RETAINED", "100")),
+    )
@@ -0,0 +1,127 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+
+def cache_key(model: str, prompt: str) -> str:
+    """Content address for a completion: SHA-256 over (model, fully formatted prompt)."""
+    h = hashlib.sha256()
+    h.update(model.encode("utf-8"))
+    h.update(b"\0")
+    h.update(prompt.encode("utf-8"))
+    return h.hexdigest()
+
+
+class LLMCache:
+    """Two-tier cache for LLM completions.
+
+    Memory tier: LRU bounded by `max_entries`, entries expire after `ttl` seconds.
+    Disk tier (optional): SQLite file at `db_path` that survives restarts, bounded
+    by `max_disk_entries` (least recently used rows are dropped first).
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 86400.0, db_path: Optional[str] = None,
+                 max_disk_entries: int = 5000):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_disk_entries = max_disk_entries
+        self._mem: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, created REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS llm_cache_last_used ON llm_cache(last_used)")
+            self._db.commit()
+
+    def get(self, model: str, prompt: str) -> Optional[str]:
+        key = cache_key(model, prompt)
+        now = time.time()
+        with self._lock:
+            entry = self._mem.get(key)
+            if entry is not None:
+                if now - entry[0] <= self.ttl:
+                    self._mem.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._mem[key]
+            if self._db is not None:
+                row = self._db.execute("SELECT response, created FROM llm_cache WHERE key = ?", (key,)).fetchone()
+                if row and now - row[1] <= self.ttl:
+                    self._db.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (now, key))
+                    self._db.commit()
+                    self._remember(key, row[1], row[0])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return row[0]
+                if row:
+                    self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    self._db.commit()
+            self.misses += 1
+            return None
+
+    def put(self, model: str, prompt: str, response: str) -> None:
+        key = cache_key(model, prompt)
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, response)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO llm_cache(key, response, created, last_used) VALUES (?, ?, ?, ?)",
+                    (key, response, now, now),
+                )
+                self._db.execute(
+                    "DELETE FROM llm_cache WHERE key IN ("
+                    "SELECT key FROM llm_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_disk_entries,),
+                )
+                self._db.commit()
+
+    def invalidate(self, model: str, prompt: str) -> None:
+        key = cache_key(model, prompt)
+        with self._lock:
+            self._mem.pop(key, None)
+            if self._db is not None:
+                self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._db.commit()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses, "entries": len(self._mem)}
+
+    def _remember(self, key: str, created: float, response: str) -> None:
+        self._mem[key] = (created, response)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_entries:
+            self._mem.popitem(last=False)
+
+
+_cache: Optional[LLMCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> Optional[LLMCache]:
+    """Process-wide cache configured from LLM_CACHE_* env vars; None when LLM_CACHE_SIZE=0."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            size = int(os.getenv("LLM_CACHE_SIZE", "256"))
+            if size <= 0:
+                return None
+            _cache = LLMCache(
+                max_entries=size,
+                ttl=float(os.getenv("LLM_CACHE_TTL", "86400")),
+                db_path=os.getenv("LLM_CACHE_DB") or None,
+                max_disk_entries=int(os.getenv("LLM_CACHE_DB_MAX_ENTRIES", "5000")),
+            )
+        return _cache
@@ -0,0 +1,187 @@
+import os
+import json
+import time
+import random
+import threading
+from typing import Iterator, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_BASE_URL = "https://openrouter.ai/api/v1"
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class LLMError(Exception):
+    """Raised when a completion cannot be obtained after all retries."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Block until a token is available; returns False if `timeout` elapses first."""
+        if self.rate <= 0:
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class LLMClient:
+    """Reusable OpenRouter-compatible chat client.
+
+    Holds one keep-alive session, paces calls through a token bucket, bounds the
+    number of in-flight requests and retries 429/5xx and connection errors with
+    exponential backoff plus full jitter (honouring Retry-After when sent).
+    `base_url` can point at any local stand-in implementing /chat/completions.
+    """
+
+    def __init__(self, api_key: str, model: str, base_url: str = DEFAULT_BASE_URL,
+                 rate_per_sec: float = 2.0, burst: int = 5, max_in_flight: int = 4,
+                 max_retries: int = 4, backoff_base: float = 0.5, backoff_max: float = 20.0,
+                 connect_timeout: float = 5.0, read_timeout: float = 60.0):
+        self.api_key = api_key
+        self.model = model
+        self.base_url = base_url.rstrip("/")
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = (connect_timeout, read_timeout)
+        self._bucket = TokenBucket(rate_per_sec, burst)
+        self._in_flight = threading.BoundedSemaphore(max(1, max_in_flight))
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, max_in_flight))
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+        self._session.headers.update({
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+            "HTTP-Referer": "https://openrouter.ai/",  # OpenRouter recommends setting this
+            "X-Title": "BugzyAI",
+        })
+
+    def complete(self, prompt: str) -> str:
+        """Return the assistant message for a single-turn prompt, or raise LLMError."""
+        payload = json.dumps({"model": self.model, "messages": [{"role": "user", "content": prompt}]})
+        url = f"{self.base_url}/chat/completions"
+        last_error: Optional[LLMError] = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self._sleep_before_retry(attempt, last_error)
+            self._bucket.acquire()
+            with self._in_flight:
+                try:
+                    response = self._session.post(url, data=payload, timeout=self.timeout)
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    last_error = LLMError(f"Request failed: {e}")
+                    continue
+            if response.status_code in RETRY_STATUSES:
+                last_error = LLMError(f"HTTP {response.status_code}: {response.text[:200]}",
+                                      response.status_code, _retry_after(response))
+                continue
+            if response.status_code >= 400:
+                raise LLMError(f"HTTP {response.status_code}: {response.text[:200]}", response.status_code)
+            try:
+                return response.json()["choices"][0]["message"]["content"]
+            except (ValueError, KeyError, IndexError, TypeError) as e:
+                raise LLMError(f"Malformed completion response: {e}", response.status_code)
+        raise last_error or LLMError("LLM request failed")
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        """Yield content deltas from a streamed completion (OpenAI-style SSE).
+
+        Retries apply only until the response starts; once text has been yielded a
+        dropped connection raises LLMError.
+        """
+        payload = json.dumps({"model": self.model, "stream": True,
+                              "messages": [{"role": "user", "content": prompt}]})
+        url = f"{self.base_url}/chat/completions"
+        last_error: Optional[LLMError] = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self._sleep_before_retry(attempt, last_error)
+            self._bucket.acquire()
+            with self._in_flight:
+                try:
+                    response = self._session.post(url, data=payload, timeout=self.timeout, stream=True)
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    last_error = LLMError(f"Request failed: {e}")
+                    continue
+                with response:
+                    if response.status_code in RETRY_STATUSES:
+                        last_error = LLMError(f"HTTP {response.status_code}: {response.text[:200]}",
+                                              response.status_code, _retry_after(response))
+                        continue
+                    if response.status_code >= 400:
+                        raise LLMError(f"HTTP {response.status_code}: {response.text[:200]}", response.status_code)
+                    try:
+                        for line in response.iter_lines(decode_unicode=True):
+                            if not line or not line.startswith("data:"):
+                                continue
+                            data = line[5:].strip()
+                            if data == "[DONE]":
+                                return
+                            try:
+                                delta = json.loads(data)["choices"][0].get("delta", {}).get("content")
+                            except (ValueError, KeyError, IndexError, TypeError):
+                                continue
+                            if delta:
+                                yield delta
+                    except requests.RequestException as e:
+                        raise LLMError(f"Stream interrupted: {e}")
+                    return
+        raise last_error or LLMError("LLM request failed")
+
+    def close(self) -> None:
+        self._session.close()
+
+    def _sleep_before_retry(self, attempt: int, error: Optional[LLMError]) -> None:
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        if error is not None and error.retry_after is not None:
+            delay = max(delay, min(self.backoff_max, error.retry_after))
+        time.sleep(delay)
+
+
+def _retry_after(response: requests.Response) -> Optional[float]:
+    try:
+        return float(response.headers.get("Retry-After", ""))
+    except ValueError:
+        return None
+
+
+def client_from_env(api_key: str, model: str) -> LLMClient:
+    """Build an LLMClient using OPENROUTER_BASE_URL and LLM_* tuning env vars."""
+    return LLMClient(
+        api_key,
+        model,
+        base_url=os.getenv("OPENROUTER_BASE_URL", DEFAULT_BASE_URL),
+        rate_per_sec=float(os.getenv("LLM_RATE_PER_SEC", "2")),
+        burst=int(os.getenv("LLM_BURST", "5")),
+        max_in_flight=int(os.getenv("LLM_MAX_IN_FLIGHT", "4")),
+        max_retries=int(os.getenv("LLM_MAX_RETRIES", "4")),
+        connect_timeout=float(os.getenv("LLM_CONNECT_TIMEOUT", "5")),
+        read_timeout=float(os.getenv("LLM_READ_TIMEOUT", "60")),
+    )
@@ -1,68 +1,118 @@
 import os
-import requests
-import json
+import time
+import threading
 from dotenv import load_dotenv
+from llm_cache import get_cache
+from llm_client import LLMError, client_from_env
+from metrics import LLM_REQUESTS, LLM_SECONDS
 
 # Load environment variables from .env file
 load_dotenv()
 
+_clients = {}
+_clients_lock = threading.Lock()
+
 def get_llm():
     """
-    Returns a dictionary with OpenRouter API key and model name for use in invoke_llm.
+    Returns the shared LLMClient for the configured OpenRouter API key and model, for use in invoke_llm.
+    Clients are reused across calls so their pooled session, rate limiter and concurrency cap are shared.
     """
     api_key = os.getenv("OPENROUTER_API_KEY")
     model = os.getenv("OPENROUTER_MODEL", "gpt-oss-20b")  # Default to gpt-oss-20b
     if not api_key:
         print("Error: OPENROUTER_API_KEY not found in .env file.")
         return None
-    return {"api_key": api_key, "model": model}
+    with _clients_lock:
+        client = _clients.get((api_key, model))
+        if client is None:
+            client = _clients[(api_key, model)] = client_from_env(api_key, model)
+        return client
+
+def _format_prompt(prompt_template, input_data):
+    """Fill placeholders in the template using keys from input_data (e.g. {website_url})."""
+    # Prefer mapping-based formatting: supports {website_url}, {file_name}, etc.
+    if isinstance(input_data, dict):
+        return prompt_template.format(**input_data)
+    # Fallback: support legacy {input}
+    return (
+        prompt_template.format(input=input_data)
+        if '{input}' in prompt_template else prompt_template
+    )
 
-def invoke_llm(llm, prompt_template, input_data):
+def invoke_llm(llm, prompt_template, input_data, use_cache=True):
     """
     Invokes the OpenRouter LLM with a given prompt template and input data, returning the raw string response.
     Formats placeholders in the template using keys from input_data (e.g. {website_url}).
+    Successful responses are cached by (model, formatted prompt); use_cache=False skips the
+    lookup and stores the fresh response in its place.
     """
     if not llm:
         return {"error": "LLM not initialized", "details": "The language model could not be started."}
 
-    # Format the prompt using the template and input_data
     try:
-        # Prefer mapping-based formatting: supports {website_url}, {file_name}, etc.
-        if isinstance(input_data, dict):
-            prompt = prompt_template.format(**input_data)
-        else:
-            # Fallback: support legacy {input}
-            prompt = (
-                prompt_template.format(input=input_data)
-                if '{input}' in prompt_template else prompt_template
-            )
+        prompt = _format_prompt(prompt_template, input_data)
     except Exception as e:
         return {"error": "Prompt formatting failed", "details": str(e)}
 
-    headers = {
-        "Authorization": f"Bearer {llm['api_key']}",
-        "Content-Type": "application/json",
-        "HTTP-Referer": "https://openrouter.ai/",  # OpenRouter recommends setting this
-        "X-Title": "BugzyAI"
-    }
-    data = {
-        "model": llm["model"],
-        "messages": [
-            {"role": "user", "content": prompt}
-        ]
-    }
+    cache = get_cache()
+    if cache and use_cache:
+        cached = cache.get(llm.model, prompt)
+        if cached is not None:
+            LLM_REQUESTS.inc(outcome="cache_hit")
+            return cached
+
+    start = time.perf_counter()
     try:
-        response = requests.post(
-            "https://openrouter.ai/api/v1/chat/completions",
-            headers=headers,
-            data=json.dumps(data),
-            timeout=60
-        )
-        response.raise_for_status()
-        result = response.json()
-        # Extract the response text
-        return result["choices"][0]["message"]["content"]
+        content = llm.complete(prompt)
+        LLM_SECONDS.observe(time.perf_counter() - start)
+        LLM_REQUESTS.inc(outcome="ok")
+        if cache and isinstance(content, str):
+            cache.put(llm.model, prompt, content)
+        return content
     except Exception as e:
+        LLM_SECONDS.observe(time.perf_counter() - start)
+        LLM_REQUESTS.inc(outcome="error")
         print(f"An unexpected error occurred during LLM invocation: {e}")
         return {"error": "An unexpected error occurred", "details": str(e)}
 
+
+def stream_llm(llm, prompt_template, input_data, use_cache=True):
+    """
+    Streaming counterpart of invoke_llm: yields text chunks as the model produces them.
+    A cached response is yielded in one piece; the full text is cached once the stream completes.
+    Raises on failure (LLMError from the client, or formatting errors).
+    """
+    if not llm:
+        raise LLMError("LLM not initialized")
+    prompt = _format_prompt(prompt_template, input_data)
+    cache = get_cache()
+    if cache and use_cache:
+        cached = cache.get(llm.model, prompt)
+        if cached is not None:
+            LLM_REQUESTS.inc(outcome="cache_hit")
+            yield cached
+            return
+    parts = []
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        for chunk in llm.stream(prompt):
+            parts.append(chunk)
+            yield chunk
+        outcome = "ok"
+    finally:
+        LLM_SECONDS.observe(time.perf_counter() - start)
+        LLM_REQUESTS.inc(outcome=outcome)
+    if cache and parts:
+        cache.put(llm.model, prompt, "".join(parts))
+
+
+def forget_llm_response(llm, prompt_template, input_data):
+    """Drop a cached response, e.g. one that turned out to be unparseable."""
+    cache = get_cache()
+    if not llm or not cache:
+        return
+    try:
+        cache.invalidate(llm.model, _format_prompt(prompt_template, input_data))
+    except Exception:
+        pass
@@ -0,0 +1,213 @@
+import time
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _fmt_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_fmt_labels(self.labelnames, key)} {value:g}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus semantics) with optional labels."""
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], List[float]] = {}  # bucket counts + [sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            series = self._series.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series):
+                    le = f'le="{bound:g}"'
+                    lines.append(f"{self.name}_bucket{_fmt_labels(self.labelnames, key, le)} {count:g}")
+                le = 'le="+Inf"'
+                lines.append(f"{self.name}_bucket{_fmt_labels(self.labelnames, key, le)} {series[-1]:g}")
+                lines.append(f"{self.name}_sum{_fmt_labels(self.labelnames, key)} {series[-2]:.6f}")
+                lines.append(f"{self.name}_count{_fmt_labels(self.labelnames, key)} {series[-1]:g}")
+        return lines
+
+
+class Registry:
+    """Holds metrics plus collector callbacks that contribute gauge lines at scrape time."""
+
+    def __init__(self):
+        self._metrics: List = []
+        self._collectors: List[Callable[[], Iterable[str]]] = []
+
+    def counter(self, name: str, help_text: str, labelnames: Iterable[str] = ()) -> Counter:
+        metric = Counter(name, help_text, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help_text: str, labelnames: Iterable[str] = (),
+                  buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, help_text, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], Iterable[str]]) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            try:
+                lines.extend(collector())
+            except Exception as e:
+                lines.append(f"# collector error: {e}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+TESTS_TOTAL = REGISTRY.counter("bugzy_tests_total", "Tests reported, by runner and status (skipped tests included).", ["runner", "status"])
+TEST_SECONDS = REGISTRY.histogram("bugzy_test_duration_seconds", "Wall time per test.", ["runner"])
+PHASE_SECONDS = REGISTRY.histogram("bugzy_test_phase_seconds",
+                                   "Time per test spent in each phase (exclusive of nested phases).",
+                                   ["runner", "phase"])
+LLM_REQUESTS = REGISTRY.counter("bugzy_llm_requests_total", "LLM invocations by outcome (ok, error, cache_hit).",
+                                ["outcome"])
+LLM_SECONDS = REGISTRY.histogram("bugzy_llm_request_seconds", "Latency of LLM invocations that reached the API.",
+                                 buckets=(0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120))
+
+
+def gauge_lines(name: str, help_text: str, values: Dict[str, float], label: str) -> List[str]:
+    """Render a labelled gauge for registry collectors."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+    for key, value in sorted(values.items()):
+        lines.append(f'{name}{{{label}="{_escape(key)}"}} {value:g}')
+    return lines
+
+
+class PhaseTimer:
+    """
+    High-resolution per-test phase timings. Phases nest; time is attributed to the
+    innermost active phase only, so phase totals add up to no more than the test's duration.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self._stack: List[List] = []  # [name, resumed_at]
+
+    @contextmanager
+    def phase(self, name: str):
+        now = time.perf_counter()
+        if self._stack:
+            outer = self._stack[-1]
+            self.phases[outer[0]] = self.phases.get(outer[0], 0.0) + (now - outer[1])
+        self._stack.append([name, now])
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            inner = self._stack.pop()
+            self.phases[name] = self.phases.get(name, 0.0) + (end - inner[1])
+            if self._stack:
+                self._stack[-1][1] = end
+
+    def add(self, name: str, seconds: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def as_dict(self) -> Dict[str, float]:
+        return {name: round(seconds, 6) for name, seconds in self.phases.items()}
+
+
+_local = threading.local()
+
+
+@contextmanager
+def timing(timer: PhaseTimer):
+    """Make `timer` the current thread's timer so helpers can report phases via phase()."""
+    previous = getattr(_local, "timer", None)
+    _local.timer = timer
+    try:
+        yield timer
+    finally:
+        _local.timer = previous
+
+
+@contextmanager
+def phase(name: str):
+    """Attribute the enclosed time to `name` on the current thread's timer, if any."""
+    timer: Optional[PhaseTimer] = getattr(_local, "timer", None)
+    if timer is None:
+        yield
+        return
+    with timer.phase(name):
+        yield
+
+
+def record_test(runner: str, result: Dict, timer: PhaseTimer) -> Dict:
+    """Attach runner/duration/timings to a result dict and feed the test metrics."""
+    result.setdefault("runner", runner)
+    duration = timer.elapsed()
+    result["duration"] = round(duration, 6)
+    result["timings"] = timer.as_dict()
+    TESTS_TOTAL.inc(runner=runner, status=result.get("status", "unknown"))
+    TEST_SECONDS.observe(duration, runner=runner)
+    for name, seconds in timer.phases.items():
+        PHASE_SECONDS.observe(seconds, runner=runner, phase=name)
+    return result
+
+
+def record_skipped(runner: str, result: Dict) -> Dict:
+    """Count a result reported without running the test (dependency or fail-fast skips,
+    unsupported types). Only the test counter moves; duration histograms stay per executed test."""
+    result.setdefault("runner", runner)
+    TESTS_TOTAL.inc(runner=runner, status=result.get("status", "skipped"))
+    return result
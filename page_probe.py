@@ -0,0 +1,348 @@
+import os
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.common.by import By
+
+# Locator strategies the in-page resolver understands; anything else is probed with find_elements
+_KINDS = {
+    By.CSS_SELECTOR: "css",
+    By.XPATH: "xpath",
+    By.ID: "id",
+    By.NAME: "name",
+    By.TAG_NAME: "tag",
+    By.CLASS_NAME: "class",
+}
+
+# arguments[0]: [[kind, value], ...] in priority order. Returns [index, element] for the
+# first candidate present in the DOM. Otherwise returns [-1, ms the page has been settled]
+# when settle tracking is installed (see _SETTLE_JS), else null. Invalid selectors are skipped.
+_RESOLVE_JS = """
+var probes = arguments[0];
+for (var i = 0; i < probes.length; i++) {
+  var kind = probes[i][0], value = probes[i][1], el = null;
+  try {
+    if (kind === "css") el = document.querySelector(value);
+    else if (kind === "xpath") el = document.evaluate(value, document, null,
+        XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    else if (kind === "id") el = document.getElementById(value);
+    else if (kind === "name") el = document.getElementsByName(value)[0] || null;
+    else if (kind === "tag") el = document.getElementsByTagName(value)[0] || null;
+    else if (kind === "class") el = document.getElementsByClassName(value)[0] || null;
+  } catch (e) { el = null; }
+  if (el) return [i, el];
+}
+var s = window.__bugzySettle;
+if (!s) return null;
+var now = Date.now(), navigating = s.navigating && now - s.navigating < 2000;
+return [-1, document.readyState === "complete" && s.pending <= 0 && !navigating ? now - s.lastChange : 0];
+"""
+
+# Async. arguments: quiet window (ms), budget (ms), minimum readyState ("complete" or
+# "interactive", for eager/none page loads), callback. Installs settle tracking on first use
+# in a document: a MutationObserver on content changes, counters around fetch/XHR, and
+# history/unload hooks. Resolves once the document is complete, no requests are pending and
+# nothing has changed for the quiet window, or when the budget runs out.
+_SETTLE_JS = """
+var quiet = arguments[0], budget = arguments[1], minReady = arguments[2], done = arguments[arguments.length - 1];
+var s = window.__bugzySettle;
+if (!s) {
+  s = window.__bugzySettle = {pending: 0, lastChange: Date.now(), navigating: 0};
+  var bump = function () { s.lastChange = Date.now(); };
+  new MutationObserver(bump).observe(document.documentElement,
+      {childList: true, subtree: true, characterData: true});
+  if (window.fetch) {
+    var origFetch = window.fetch;
+    window.fetch = function () {
+      s.pending++; bump();
+      var end = function () { s.pending--; bump(); };
+      var p = origFetch.apply(this, arguments);
+      p.then(end, end);
+      return p;
+    };
+  }
+  var origSend = XMLHttpRequest.prototype.send;
+  XMLHttpRequest.prototype.send = function () {
+    s.pending++; bump();
+    this.addEventListener("loadend", function () { s.pending--; bump(); });
+    return origSend.apply(this, arguments);
+  };
+  ["pushState", "replaceState"].forEach(function (name) {
+    var orig = history[name];
+    history[name] = function () { bump(); return orig.apply(this, arguments); };
+  });
+  window.addEventListener("popstate", bump);
+  window.addEventListener("hashchange", bump);
+  window.addEventListener("beforeunload", function () { s.navigating = Date.now(); });
+}
+var start = Date.now();
+(function check() {
+  var now = Date.now(), idle = now - s.lastChange;
+  // an unload that has not replaced the document within 2s was cancelled (e.g. a download)
+  var navigating = s.navigating && now - s.navigating < 2000;
+  var loaded = document.readyState === "complete" || (minReady === "interactive" && document.readyState === "interactive");
+  var settled = loaded && s.pending <= 0 && !navigating && idle >= quiet;
+  if (settled || now - start >= budget) {
+    done({settled: settled, pending: s.pending, idle: idle, readyState: document.readyState});
+    return;
+  }
+  setTimeout(check, Math.max(10, Math.min(50, quiet - idle)));
+})();
+"""
+
+# arguments[0]: token of the caller's cached snapshot. A MutationObserver installed on first
+# use bumps a per-document version, so an unchanged page answers null in one cheap call;
+# otherwise every form control is described (with its label text) in a single snapshot.
+_INDEX_JS = """
+var known = arguments[0];
+var state = window.__bugzyDom;
+if (!state) {
+  state = window.__bugzyDom = {id: Date.now().toString(36) + Math.random().toString(36).slice(2), version: 0};
+  try {
+    new MutationObserver(function () { state.version++; }).observe(document.documentElement, {
+      childList: true, subtree: true, attributes: true,
+      attributeFilter: ["id", "name", "type", "placeholder", "hidden", "style", "class", "disabled", "for"]});
+  } catch (e) { state.version = -1; }
+}
+var token = state.version < 0 ? null : state.id + ":" + state.version;
+if (token !== null && token === known) return null;
+var labelText = new Map();
+var labels = document.getElementsByTagName("label");
+for (var i = 0; i < labels.length; i++) {
+  var target = labels[i].htmlFor ? document.getElementById(labels[i].htmlFor)
+                                 : labels[i].querySelector("input, textarea, select");
+  if (target && !labelText.has(target)) labelText.set(target, (labels[i].textContent || "").trim());
+}
+var fields = [], elements = [];
+var nodes = document.querySelectorAll("input, textarea, select, button");
+for (var j = 0; j < nodes.length; j++) {
+  var el = nodes[j], tag = el.tagName.toLowerCase(), type = (el.type || "").toLowerCase();
+  if (tag === "input" && type === "hidden") continue;
+  fields.push({
+    tag: tag, type: type, id: el.id || "", name: el.getAttribute("name") || "",
+    placeholder: el.getAttribute("placeholder") || "",
+    label: labelText.get(el) || el.getAttribute("aria-label") || "",
+    text: tag === "button" ? (el.textContent || "").trim().slice(0, 80) : (type === "submit" ? el.value || "" : ""),
+    visible: !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length),
+    checked: !!el.checked
+  });
+  elements.push(el);
+}
+return {token: token, url: location.href, fields: fields, elements: elements};
+"""
+
+# arguments[0]: [[element, value], ...]. Sets text values through the native setter and fires
+# input/change (so framework-bound inputs see the edit) and toggles checkboxes. Returns the count changed.
+_FILL_JS = """
+var items = arguments[0], filled = 0;
+for (var i = 0; i < items.length; i++) {
+  var el = items[i][0], value = items[i][1], tag = el.tagName.toLowerCase(), type = (el.type || "").toLowerCase();
+  if (el.disabled || el.readOnly) continue;
+  if (type === "checkbox") {
+    var want = /^(1|true|yes|on)$/i.test(String(value).trim());
+    if (el.checked !== want) { el.click(); filled++; }
+    continue;
+  }
+  if ((tag !== "input" && tag !== "textarea") || ["radio", "submit", "button"].indexOf(type) !== -1) continue;
+  var proto = tag === "textarea" ? HTMLTextAreaElement.prototype : HTMLInputElement.prototype;
+  el.focus();
+  Object.getOwnPropertyDescriptor(proto, "value").set.call(el, String(value));
+  el.dispatchEvent(new Event("input", {bubbles: true}));
+  el.dispatchEvent(new Event("change", {bubbles: true}));
+  filled++;
+}
+return filled;
+"""
+
+# arguments[0]: [[needle, scope], ...] with scope "url", "html" (the serialized document, as
+# page_source would return it) or "page" (either). Matching is case-insensitive; each check
+# yields a short snippet around the first match, or null. Only these snippets leave the page.
+_FIND_TEXT_JS = """
+var checks = arguments[0], url = location.href.toLowerCase(), html = null, found = [];
+for (var i = 0; i < checks.length; i++) {
+  var needle = String(checks[i][0]).toLowerCase(), scope = checks[i][1], hay = url, at = -1;
+  if (scope !== "html") at = url.indexOf(needle);
+  if (at < 0 && scope !== "url") {
+    if (html === null) html = document.documentElement ? document.documentElement.outerHTML.toLowerCase() : "";
+    hay = html;
+    at = html.indexOf(needle);
+  }
+  found.push(at < 0 ? null : hay.slice(Math.max(0, at - 40), at + needle.length + 40));
+}
+return found;
+"""
+
+FIELD_TAGS = ("input", "textarea")
+_NON_FIELD_TYPES = ("submit", "button", "reset", "image")
+
+DEFAULT_POLL = 0.1
+
+
+def settle_settings() -> Dict[str, float]:
+    """Settle tuning from SELENIUM_SETTLE_QUIET_MS, SELENIUM_SETTLE_TIMEOUT, SELENIUM_SETTLE_ACTION_TIMEOUT
+    and SELENIUM_SETTLE_GIVE_UP. The budget after a click or fill never exceeds the one after navigation."""
+    timeout = float(os.getenv("SELENIUM_SETTLE_TIMEOUT", "5"))
+    return {
+        "quiet": float(os.getenv("SELENIUM_SETTLE_QUIET_MS", "300")) / 1000,
+        "timeout": timeout,
+        "action_timeout": min(float(os.getenv("SELENIUM_SETTLE_ACTION_TIMEOUT", "1")), timeout),
+        "give_up": float(os.getenv("SELENIUM_SETTLE_GIVE_UP", "0")),
+    }
+
+
+def wait_for_settle(driver, quiet: Optional[float] = None, timeout: Optional[float] = None,
+                    poll: float = DEFAULT_POLL, ready_state: str = "complete") -> bool:
+    """
+    Block until the page is quiet: document at `ready_state` ("complete", or "interactive"
+    when subresources are not awaited), no fetch/XHR in flight and no DOM change for
+    `quiet` seconds, at most `timeout` seconds. Waiting happens inside the page
+    (one async script call); a navigation mid-wait is retried in the new document.
+    Returns whether the page settled.
+    """
+    settings = settle_settings()
+    quiet = settings["quiet"] if quiet is None else quiet
+    timeout = settings["timeout"] if timeout is None else timeout
+    deadline = time.monotonic() + timeout
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        try:
+            state = driver.execute_async_script(_SETTLE_JS, int(quiet * 1000), int(remaining * 1000), ready_state)
+            if state and state.get("settled"):
+                return True
+        except WebDriverException:
+            # The document was replaced while waiting; poll again in the new one
+            time.sleep(min(poll, max(0.0, deadline - time.monotonic())))
+
+
+def resolve_first(driver, candidates: Sequence[Tuple[str, str]], timeout: float = 8,
+                  poll: float = DEFAULT_POLL, give_up: Optional[float] = None) -> Tuple[int, object]:
+    """
+    Return (index, element) for the highest-priority candidate locator present on the page.
+    All candidates are checked in one execute_script round trip per poll tick, under one
+    overall timeout. When settle tracking is active and the page has been quiet for
+    `give_up` seconds (SELENIUM_SETTLE_GIVE_UP; default 0, off) without a match, the wait ends
+    early. Raises TimeoutException when nothing matched.
+    """
+    if not candidates:
+        raise TimeoutException("No selector candidates given")
+    give_up = settle_settings()["give_up"] if give_up is None else give_up
+    probes = [[_KINDS.get(by), value] for by, value in candidates]
+    in_page = all(kind for kind, _ in probes)
+    deadline = time.monotonic() + timeout
+    while True:
+        hit = driver.execute_script(_RESOLVE_JS, probes) if in_page else _resolve_remote(driver, candidates)
+        if hit and hit[0] >= 0:
+            return hit[0], hit[1]
+        if hit and give_up > 0 and hit[1] >= give_up * 1000:
+            raise TimeoutException(f"None of {len(candidates)} selector candidate(s) matched; "
+                                   f"page settled for {hit[1] / 1000:.1f}s")
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutException(f"None of {len(candidates)} selector candidate(s) matched within {timeout}s")
+        time.sleep(min(poll, remaining))
+
+
+def _resolve_remote(driver, candidates: Sequence[Tuple[str, str]]) -> Optional[List]:
+    """Per-candidate fallback for locator strategies the in-page resolver does not support."""
+    for i, (by, value) in enumerate(candidates):
+        try:
+            found = driver.find_elements(by, value)
+        except WebDriverException:
+            continue
+        if found:
+            return [i, found[0]]
+    return None
+
+
+def _match_score(field: Dict, keyword: str) -> int:
+    label = field["label"].lower()
+    name = field["name"].lower()
+    if label == keyword:
+        return 6
+    if keyword in label:
+        return 5
+    if keyword in field["placeholder"].lower():
+        return 4
+    if name == keyword:
+        return 4
+    if keyword in name or keyword in field["id"].lower():
+        return 3
+    return 0
+
+
+class PageIndex:
+    """
+    Snapshot of the current page's form controls (tag, id, name, type, placeholder, label
+    text, visibility) built with one script call and reused until the document is replaced
+    or its DOM mutates. Fuzzy field lookups then run in Python without further round trips.
+    """
+
+    def __init__(self, driver, poll: float = DEFAULT_POLL):
+        self.driver = driver
+        self.poll = poll
+        self.token: Optional[str] = None
+        self.url: Optional[str] = None
+        self.fields: List[Dict] = []
+        self.builds = 0
+
+    def invalidate(self) -> None:
+        self.token = None
+
+    def refresh(self) -> bool:
+        """Re-snapshot if the page changed since the last build. Returns True when rebuilt."""
+        snapshot = self.driver.execute_script(_INDEX_JS, self.token)
+        if not snapshot:
+            return False
+        self.token = snapshot.get("token")
+        self.url = snapshot.get("url")
+        self.fields = [dict(meta, element=el) for meta, el in zip(snapshot["fields"], snapshot["elements"])]
+        self.builds += 1
+        return True
+
+    def best_match(self, keywords: Sequence[str], tags: Sequence[str] = FIELD_TAGS) -> Optional[Dict]:
+        """Highest-scoring control for any of the keywords; visible controls win ties, then document order."""
+        kws = [k.lower().strip() for k in keywords if k and k.strip()]
+        best, best_score = None, 0.0
+        for field in self.fields:
+            if field["tag"] not in tags or field["type"] in _NON_FIELD_TYPES:
+                continue
+            score = max((_match_score(field, kw) for kw in kws), default=0)
+            if score and field["visible"]:
+                score += 0.5
+            if score > best_score:
+                best, best_score = field, score
+        return best
+
+    def find_many(self, hints: Dict[str, Sequence[str]], timeout: float = 0) -> Dict[str, Dict]:
+        """Resolve several fields at once ({hint: keywords} -> {hint: field}), polling until all match or timeout."""
+        deadline = time.monotonic() + timeout
+        while True:
+            self.refresh()
+            found = {}
+            for hint, keywords in hints.items():
+                field = self.best_match(keywords)
+                if field is not None:
+                    found[hint] = field
+            if len(found) == len(hints) or time.monotonic() >= deadline:
+                return found
+            time.sleep(self.poll)
+
+    def find(self, keywords: Sequence[str], timeout: float = 0) -> Optional[Dict]:
+        return self.find_many({"field": keywords}, timeout).get("field")
+
+
+def fill_fields(driver, targets: List[Tuple[object, object]]) -> int:
+    """Fill [(element, value)] in one script call; see _FILL_JS. Returns how many fields changed."""
+    if not targets:
+        return 0
+    return int(driver.execute_script(_FILL_JS, [[el, value] for el, value in targets]) or 0)
+
+
+def find_text(driver, checks: Sequence[Tuple[str, str]]) -> List[Optional[str]]:
+    """Evaluate [(needle, scope)] in the page in one call; see _FIND_TEXT_JS. Returns a snippet or None per check."""
+    if not checks:
+        return []
+    return driver.execute_script(_FIND_TEXT_JS, [[needle, scope] for needle, scope in checks]) or [None] * len(checks)
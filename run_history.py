@@ -0,0 +1,239 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from scheduler import as_ids, merge_by_id
+
+# Fields that do not change what a test does; renumbering or reprioritising keeps its history.
+# depends_on is fingerprinted by the tests it points at rather than by their ids.
+FINGERPRINT_IGNORED = ("id", "priority", "depends_on")
+
+
+def site_key(website_url: str) -> str:
+    parts = urlparse(website_url)
+    return f"{parts.scheme}://{parts.netloc}".lower() + parts.path.rstrip("/")
+
+
+def _digest(value) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def fingerprint(test: Dict) -> str:
+    """SHA-256 of the test definition (name, description, selector, type, steps, payloads, ...)."""
+    return _digest({k: v for k, v in test.items() if k not in FINGERPRINT_IGNORED})
+
+
+def fingerprints(tests: List[Dict]) -> List[str]:
+    """
+    Fingerprint of each test in a suite. A test with `depends_on` also covers the fingerprints
+    of the tests it depends on (ids not in the suite are kept as ids), so renumbering the
+    suite keeps every fingerprint while editing a prerequisite changes its dependents'.
+    """
+    base = [fingerprint(t) for t in tests]
+    by_id: Dict[str, List[str]] = {}
+    for t, fp in zip(tests, base):
+        by_id.setdefault(str(t.get("id")), []).append(fp)
+    prints = []
+    for t, fp in zip(tests, base):
+        deps = as_ids(t.get("depends_on"))
+        if not deps:
+            prints.append(fp)
+            continue
+        targets = sorted(p for d in deps for p in by_id.get(d, [f"id:{d}"]))
+        prints.append(_digest([fp, targets]))
+    return prints
+
+
+class RunHistory:
+    """
+    Latest result of every test per site, keyed by (site, fingerprint), plus a summary row
+    per run, in a SQLite file. A changed definition gets a new fingerprint, so it has no
+    history and is treated as new.
+    """
+
+    def __init__(self, db_path: str, keep_runs: int = 200):
+        self.keep_runs = keep_runs
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, site TEXT NOT NULL, started REAL NOT NULL, finished REAL NOT NULL, "
+            "mode TEXT NOT NULL, executed INTEGER NOT NULL, reused INTEGER NOT NULL, counts TEXT NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS runs_site ON runs(site, id)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS latest ("
+            "site TEXT NOT NULL, fingerprint TEXT NOT NULL, run_id INTEGER NOT NULL, seen_run INTEGER NOT NULL, "
+            "status TEXT NOT NULL, result TEXT NOT NULL, PRIMARY KEY (site, fingerprint))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS latest_seen ON latest(site, seen_run)")
+        self._db.commit()
+
+    def lookup(self, website_url: str, fingerprints: List[str]) -> Dict[str, Tuple[int, Dict]]:
+        """fingerprint -> (run id, last result) for those with history."""
+        site = site_key(website_url)
+        found: Dict[str, Tuple[int, Dict]] = {}
+        unique = list(dict.fromkeys(fingerprints))
+        with self._lock:
+            for i in range(0, len(unique), 500):
+                chunk = unique[i:i + 500]
+                rows = self._db.execute(
+                    f"SELECT fingerprint, run_id, result FROM latest WHERE site = ? AND fingerprint IN "
+                    f"({','.join('?' * len(chunk))})", [site, *chunk]).fetchall()
+                for fp, run_id, result in rows:
+                    found[fp] = (run_id, json.loads(result))
+        return found
+
+    def record(self, website_url: str, prints: List[str], tests: List[Dict], results: List[Dict], started: float,
+               mode: str = "full", reused: Optional[List[str]] = None) -> int:
+        """
+        Store a run's results against the tests that produced them (`prints[i]` is the
+        fingerprint of `tests[i]`) and mark `reused` fingerprints as seen; returns the run id.
+        Runs beyond keep_runs are dropped along with results no kept run has seen.
+        """
+        site = site_key(website_url)
+        reused = reused or []
+        counts: Dict[str, int] = {}
+        for r in results:
+            counts[r.get("status", "unknown")] = counts.get(r.get("status", "unknown"), 0) + 1
+        pairs = _match_results(tests, results)
+        with self._lock:
+            cur = self._db.execute(
+                "INSERT INTO runs(site, started, finished, mode, executed, reused, counts) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (site, started, time.time(), mode, len(results), len(reused), json.dumps(counts)))
+            run_id = cur.lastrowid
+            self._db.executemany(
+                "INSERT OR REPLACE INTO latest(site, fingerprint, run_id, seen_run, status, result) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(site, prints[i], run_id, run_id, r.get("status", "unknown"), json.dumps(r)) for i, r in pairs])
+            self._db.executemany("UPDATE latest SET seen_run = ? WHERE site = ? AND fingerprint = ?",
+                                 [(run_id, site, fp) for fp in reused])
+            oldest = self._db.execute("SELECT MIN(id) FROM (SELECT id FROM runs WHERE site = ? ORDER BY id DESC "
+                                      "LIMIT ?)", (site, self.keep_runs)).fetchone()[0]
+            self._db.execute("DELETE FROM runs WHERE site = ? AND id < ?", (site, oldest))
+            self._db.execute("DELETE FROM latest WHERE site = ? AND seen_run < ?", (site, oldest))
+            self._db.commit()
+        return run_id
+
+    def runs(self, website_url: str, limit: int = 20) -> List[Dict]:
+        with self._lock:
+            rows = self._db.execute("SELECT id, started, finished, mode, executed, reused, counts FROM runs "
+                                    "WHERE site = ? ORDER BY id DESC LIMIT ?", (site_key(website_url), limit)).fetchall()
+        return [{"run_id": r[0], "started": r[1], "finished": r[2], "mode": r[3], "executed": r[4],
+                 "reused": r[5], "counts": json.loads(r[6])} for r in rows]
+
+
+def _match_results(tests: List[Dict], results: List[Dict]) -> List[Tuple[int, Dict]]:
+    """Pair results with the index of their test by id (in order among duplicate ids)."""
+    by_id: Dict[str, deque] = {}
+    for i, t in enumerate(tests):
+        by_id.setdefault(str(t.get("id")), deque()).append(i)
+    pairs = []
+    for r in results:
+        queue = by_id.get(str(r.get("id")))
+        if queue:
+            pairs.append((queue.popleft(), r))
+    return pairs
+
+
+def plan_rerun(tests: List[Dict], prints: List[str],
+               previous: Dict[str, Tuple[int, Dict]]) -> Tuple[List[int], List[Dict]]:
+    """
+    Split tests into (indexes to run, reused results). A test runs again if it has no passing
+    result for its fingerprint (`prints`, from fingerprints()); so does the rest of its `group`
+    and anything that depends on it (directly or transitively), so flows and dependency chains
+    are re-checked as a whole.
+    """
+    rerun = [previous.get(fp, (None, {}))[1].get("status") != "passed" for fp in prints]
+
+    by_id: Dict[str, List[int]] = {}
+    by_group: Dict[str, List[int]] = {}
+    for i, t in enumerate(tests):
+        by_id.setdefault(str(t.get("id")), []).append(i)
+        if t.get("group") not in (None, ""):
+            by_group.setdefault(str(t.get("group")), []).append(i)
+    dependents: Dict[int, List[int]] = {}
+    for i, t in enumerate(tests):
+        for dep in as_ids(t.get("depends_on")):
+            for j in by_id.get(dep, []):
+                dependents.setdefault(j, []).append(i)
+
+    stack = [i for i, flag in enumerate(rerun) if flag]
+    groups_done = set()
+    while stack:
+        i = stack.pop()
+        linked = list(dependents.get(i, []))
+        group = tests[i].get("group")
+        if group not in (None, "") and str(group) not in groups_done:
+            groups_done.add(str(group))
+            linked.extend(by_group[str(group)])
+        for j in linked:
+            if not rerun[j]:
+                rerun[j] = True
+                stack.append(j)
+
+    to_run, reused = [], []
+    for i, t in enumerate(tests):
+        if rerun[i]:
+            to_run.append(i)
+        else:
+            run_id, result = previous[prints[i]]
+            reused.append(dict(result, id=t.get("id"), reused=True, reused_from_run=run_id))
+    return to_run, reused
+
+
+def run_with_history(runner: Callable[..., List[Dict]], website_url: str, tests: List[Dict],
+                     history: Optional[RunHistory], rerun: bool = False, report: Optional[Dict] = None,
+                     on_result=None, **options) -> List[Dict]:
+    """
+    Call `runner` (run_tests or run_distributed) and record its results. With `rerun`, only
+    tests without a passing result for their current definition are executed; the others
+    return their last result marked `reused` (streamed to `on_result` up front).
+    """
+    if history is None:
+        if rerun:
+            raise RuntimeError("Incremental re-runs need RUN_HISTORY_DB (e.g. run_history.db).")
+        return runner(website_url, tests, report=report, on_result=on_result, **options)
+
+    started = time.time()
+    prints = fingerprints(tests)
+    reused: List[Dict] = []
+    indexes = list(range(len(tests)))
+    if rerun:
+        indexes, reused = plan_rerun(tests, prints, history.lookup(website_url, prints))
+        if on_result:
+            for r in reused:
+                on_result(r)
+    to_run = [tests[i] for i in indexes]
+    executed = runner(website_url, to_run, report=report, on_result=on_result, **options) if to_run else []
+    running = set(indexes)
+    run_id = history.record(website_url, [prints[i] for i in indexes], to_run, executed, started,
+                            mode="rerun" if rerun else "full",
+                            reused=[fp for i, fp in enumerate(prints) if i not in running])
+    if report is not None:
+        report["history"] = {"run_id": run_id, "executed": len(executed), "reused": len(reused)}
+    if not reused:
+        return executed
+    return merge_by_id(executed + reused)
+
+
+_history: Optional[RunHistory] = None
+_history_lock = threading.Lock()
+
+
+def get_history() -> Optional[RunHistory]:
+    """Process-wide store at RUN_HISTORY_DB; None when unset (runs are not recorded)."""
+    global _history
+    with _history_lock:
+        if _history is None:
+            path = os.getenv("RUN_HISTORY_DB", "")
+            if not path:
+                return None
+            _history = RunHistory(path, keep_runs=int(os.getenv("RUN_HISTORY_KEEP_RUNS", "200")))
+        return _history
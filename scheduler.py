@@ -0,0 +1,400 @@
+import heapq
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+
+PENDING, READY, RUNNING, DONE = range(4)
+
+
+class WorkerUnavailable(Exception):
+    """Raised by `open_worker()` or `run(test)` when a worker cannot serve any test (e.g. no browser)."""
+
+
+class Lane:
+    """A kind of work (e.g. "ui", "api"): how many workers it gets and how a worker is opened/closed.
+
+    `open_worker()` returns an object whose `run(test)` returns a result dict; `close_worker`
+    receives it once that worker thread has no more work. Workers are opened lazily on first use.
+    A worker that raises WorkerUnavailable is retired and its test goes back on the queue for
+    the lane's other workers; only when none is left are the lane's tests failed with the message.
+    """
+
+    def __init__(self, name: str, workers: int, open_worker: Callable[[], object],
+                 close_worker: Optional[Callable[[object], None]] = None):
+        self.name = name
+        self.workers = max(1, workers)
+        self.open_worker = open_worker
+        self.close_worker = close_worker
+
+
+class _Node:
+    __slots__ = ("index", "test", "lane", "priority", "group", "page", "deps_left", "dependents",
+                 "followers", "state", "result", "ticket")
+
+    def __init__(self, index: int, test: Dict, lane: Optional[str]):
+        self.index = index
+        self.test = test
+        self.lane = lane
+        try:
+            self.priority = int(test.get("priority") or 0)
+        except (TypeError, ValueError):
+            self.priority = 0
+        group = test.get("group")
+        self.group = str(group) if group not in (None, "") else None
+        self.page = test.get("page") or None
+        self.deps_left = 0
+        self.dependents: List["_Node"] = []  # skipped if this node does not pass
+        self.followers: List["_Node"] = []   # next step of the same group; ordering only
+        self.state = PENDING
+        self.result: Optional[Dict] = None
+        self.ticket = 0  # bumped on every (re)queue; older heap entries for the node are stale
+
+
+def as_ids(value) -> List[str]:
+    """A `depends_on` value (one id or a list) as a list of string ids."""
+    if value in (None, "", []):
+        return []
+    values = value if isinstance(value, (list, tuple)) else [value]
+    return [str(v) for v in values]
+
+
+def id_sort_key(test_id, index: int):
+    """Order by numeric id when possible, then by original position for stability.
+    Shared by every runner that returns results ordered by test id."""
+    try:
+        return (0, int(test_id), index)
+    except (TypeError, ValueError):
+        return (1, 0, index)
+
+
+def merge_by_id(results: Iterable[Optional[Dict]]) -> List[Dict]:
+    """Results ordered by test id (see id_sort_key); None entries are dropped."""
+    indexed = [(id_sort_key(r.get("id"), position), r) for position, r in enumerate(results) if r is not None]
+    return [r for _, r in sorted(indexed, key=lambda pair: pair[0])]
+
+
+def skipped_result(test: Dict, message: str) -> Dict:
+    return {"id": test.get("id"), "name": test.get("name", "Unnamed Test"), "status": "skipped", "message": message}
+
+
+def failed_result(test: Dict, message: str) -> Dict:
+    return {"id": test.get("id"), "name": test.get("name", "Unnamed Test"), "status": "failed", "message": message}
+
+
+class Scheduler:
+    """
+    Runs a suite as a DAG across lanes of workers.
+
+    Optional per-test fields:
+      - depends_on: id or list of ids that must pass first; if one fails or is skipped,
+        this test is skipped. Ids not in this run are treated as satisfied (and reported).
+      - priority: higher runs earlier among ready tests (default 0).
+      - group: tests sharing a group run in input order on the same worker (one browser).
+      - page: start page of a UI test; among equal priorities a worker prefers tests for
+        the page it is already on, to save navigations.
+    Building the graph and partitioning by lane are linear in tests + dependency edges;
+    each take is O(log n) (a lane-wide heap plus one heap per page, stale entries dropped on pop).
+
+    `on_result(result)` sees every result as it is decided; `on_skipped(lane, result)` is
+    also called for those the scheduler reports without running the test.
+    """
+
+    def __init__(self, tests: List[Dict], lanes: Dict[str, Lane], lane_of: Callable[[Dict], Optional[str]],
+                 unsupported: Callable[[Dict], Dict], fail_fast: bool = False, on_result=None,
+                 cancel: Optional[threading.Event] = None,
+                 on_skipped: Optional[Callable[[Optional[str], Dict], None]] = None):
+        self.lanes = lanes
+        self.unsupported = unsupported
+        self.fail_fast = fail_fast
+        self.on_result = on_result
+        self.on_skipped = on_skipped
+        self.cancel = cancel
+        self.nodes = [_Node(i, t, lane_of(t)) for i, t in enumerate(tests)]
+        self.unknown_dependencies: List[str] = []
+        self.cycles = 0
+        self.stop_reason: Optional[str] = None
+        self._cond = threading.Condition()
+        self._remaining = {name: 0 for name in lanes}   # lane tests not yet taken or resolved
+        self._live = {name: 0 for name in lanes}        # lane workers started and not yet retired/finished
+        self._trials = {name: 0 for name in lanes}      # tests held by workers that have not run one yet
+        self._ready: Dict[str, list] = {name: [] for name in lanes}
+        self._by_page: Dict[str, Dict[Optional[str], list]] = {name: {} for name in lanes}
+        self._owned: Dict[str, Dict[int, list]] = {name: {} for name in lanes}
+        self._group_owner: Dict[tuple, int] = {}
+        self._worker_stats: Dict[str, List[Dict]] = {name: [] for name in lanes}
+        self._build()
+
+    # --- graph -------------------------------------------------------------
+
+    def _build(self) -> None:
+        by_id: Dict[str, List[_Node]] = {}
+        for node in self.nodes:
+            if node.test.get("id") is not None:
+                by_id.setdefault(str(node.test.get("id")), []).append(node)
+        last_in_group: Dict[str, _Node] = {}
+        for node in self.nodes:
+            for dep_id in as_ids(node.test.get("depends_on")):
+                deps = by_id.get(dep_id)
+                if not deps:
+                    self.unknown_dependencies.append(dep_id)
+                    continue
+                for dep in deps:
+                    dep.dependents.append(node)
+                    node.deps_left += 1
+            if node.group is not None:
+                prev = last_in_group.get(node.group)
+                if prev is not None:
+                    prev.followers.append(node)
+                    node.deps_left += 1
+                last_in_group[node.group] = node
+
+        # Kahn's algorithm: whatever cannot be ordered sits on (or behind) a cycle
+        indegree = [n.deps_left for n in self.nodes]
+        frontier = [n for n in self.nodes if indegree[n.index] == 0]
+        ordered = 0
+        while frontier:
+            node = frontier.pop()
+            ordered += 1
+            for nxt in node.dependents + node.followers:
+                indegree[nxt.index] -= 1
+                if indegree[nxt.index] == 0:
+                    frontier.append(nxt)
+        self._in_cycle = [indegree[n.index] > 0 for n in self.nodes]
+        self.cycles = len(self.nodes) - ordered
+
+    # --- bookkeeping (caller holds self._cond) --------------------------------
+
+    def _make_ready(self, node: _Node) -> None:
+        node.state = READY
+        node.ticket += 1
+        entry = (-node.priority, node.index, node.ticket, node)
+        owner = self._group_owner.get((node.lane, node.group)) if node.group is not None else None
+        if owner is not None:
+            heapq.heappush(self._owned[node.lane].setdefault(owner, []), entry)
+        else:
+            heapq.heappush(self._ready[node.lane], entry)
+            heapq.heappush(self._by_page[node.lane].setdefault(node.page, []), entry)
+        self._cond.notify_all()
+
+    def _resolve(self, node: _Node, result: Dict, ran: bool, emitted: List[tuple]) -> None:
+        """Record a node's outcome and release or skip everything waiting on it (iteratively).
+        `ran` is False when the test was not executed (the result is the scheduler's own).
+        Decided results are appended to `emitted` for _emit, which runs once the lock is released."""
+        stack = [(node, result, ran)]
+        while stack:
+            current, outcome, executed = stack.pop()
+            if current.state == DONE:
+                continue
+            if current.state != RUNNING and current.lane in self._remaining:
+                self._remaining[current.lane] -= 1
+            current.state = DONE
+            current.result = outcome
+            emitted.append((current, outcome, executed))
+            passed = outcome.get("status") == "passed"
+            for dep in current.dependents:
+                if dep.state == DONE:
+                    continue
+                if not passed:
+                    stack.append((dep, skipped_result(
+                        dep.test, f"Skipped: depends on test {current.test.get('id')} ({outcome.get('status')})"),
+                        False))
+                elif self._release(dep):
+                    stack.append((dep, self.unsupported(dep.test), False))
+            for follower in current.followers:
+                if follower.state != DONE and self._release(follower):
+                    stack.append((follower, self.unsupported(follower.test), False))
+        self._cond.notify_all()
+
+    def _release(self, node: _Node) -> bool:
+        """Drop one prerequisite; queue the node once it has none. True if it has no lane to run on."""
+        node.deps_left -= 1
+        if node.deps_left == 0 and node.state == PENDING:
+            if node.lane not in self.lanes:
+                return True
+            self._make_ready(node)
+        return False
+
+    def _emit(self, emitted: List[tuple]) -> None:
+        """Run the callbacks for results collected by _resolve. Never called with self._cond
+        held, so a slow consumer (SSE queue, job store, shard queue write) does not stall workers."""
+        for node, result, ran in emitted:
+            if not ran and self.on_skipped:
+                self.on_skipped(node.lane, result)
+            if self.on_result:
+                self.on_result(result)
+
+    def _stopped(self) -> bool:
+        if self.cancel is not None and self.cancel.is_set() and self.stop_reason is None:
+            self.stop_reason = "cancelled"
+        return self.stop_reason is not None
+
+    def _take(self, lane: str, worker_no: int, page: Optional[str], trial: bool = False) -> Optional[_Node]:
+        """Next node for this worker: its own group first, then best priority, preferring its page.
+        `trial` marks a worker that has not run a test yet; its node may come back via _retire."""
+        with self._cond:
+            while True:
+                if self._stopped():
+                    return None
+                owned = self._owned[lane].get(worker_no)
+                if owned:
+                    node = heapq.heappop(owned)[3]
+                else:
+                    node = self._pick_bucket(lane, page)
+                if node is not None:
+                    node.state = RUNNING
+                    self._remaining[lane] -= 1
+                    if trial:
+                        self._trials[lane] += 1
+                    if node.group is not None:
+                        self._group_owner.setdefault((lane, node.group), worker_no)
+                    return node
+                if self._remaining[lane] <= 0 and self._trials[lane] == 0:
+                    return None
+                self._cond.wait(timeout=0.2)
+
+    def _retire(self, lane: str, worker_no: int, node: _Node) -> bool:
+        """Retire a worker that cannot serve tests, requeueing `node` and the groups it owned.
+        False (nothing changed) when it is the lane's last worker. Caller holds self._cond."""
+        if self._live[lane] <= 1:
+            return False
+        self._live[lane] -= 1
+        for key in [k for k, owner in self._group_owner.items() if k[0] == lane and owner == worker_no]:
+            del self._group_owner[key]
+        requeue = [entry[3] for entry in self._owned[lane].pop(worker_no, [])] + [node]
+        self._remaining[lane] += 1
+        for pending in requeue:
+            self._make_ready(pending)
+        return True
+
+    @staticmethod
+    def _prune(heap: list) -> None:
+        """Pop entries whose node was taken or requeued since they were pushed."""
+        while heap and (heap[0][3].state != READY or heap[0][2] != heap[0][3].ticket):
+            heapq.heappop(heap)
+
+    def _pick_bucket(self, lane: str, page: Optional[str]) -> Optional[_Node]:
+        """Best priority first; among equals, tests for `page` or without a page before the rest."""
+        ready = self._ready[lane]
+        self._prune(ready)
+        if not ready:
+            return None
+        pages = self._by_page[lane]
+        source, entry = ready, ready[0]
+        for preferred in {page, None}:
+            heap = pages.get(preferred)
+            if heap is None:
+                continue
+            self._prune(heap)
+            if not heap:
+                del pages[preferred]
+            elif heap[0][0] == ready[0][0] and (source is ready or heap[0] < entry):
+                source, entry = heap, heap[0]
+        heapq.heappop(source)
+        return entry[3]
+
+    # --- execution -----------------------------------------------------------
+
+    def _work(self, lane: Lane, worker_no: int) -> None:
+        worker = None
+        page = None
+        count = 0
+        trial = True
+        unavailable: Optional[str] = None  # set once this last worker of the lane cannot serve tests
+        retired = False
+        start = time.perf_counter()
+        try:
+            while True:
+                node = self._take(lane.name, worker_no, page, trial)
+                if node is None:
+                    return
+                ran = True
+                if unavailable is not None:
+                    result, ran = failed_result(node.test, unavailable), False
+                else:
+                    try:
+                        if worker is None:
+                            worker = lane.open_worker()
+                        result = worker.run(node.test)
+                    except WorkerUnavailable as e:
+                        with self._cond:
+                            self._trials[lane.name] -= int(trial)
+                            trial = False
+                            if self._retire(lane.name, worker_no, node):
+                                retired = True
+                                return
+                        unavailable = str(e)
+                        result, ran = failed_result(node.test, unavailable), False
+                    except Exception as e:
+                        result = failed_result(node.test, f"Error executing test: {e}")
+                if trial:
+                    with self._cond:
+                        self._trials[lane.name] -= 1
+                        trial = False
+                count += int(ran)
+                page = node.page or page
+                emitted: List[tuple] = []
+                with self._cond:
+                    self._resolve(node, result, ran, emitted)
+                    if self.fail_fast and result.get("status") == "failed" and self.stop_reason is None:
+                        self.stop_reason = f"Skipped: fail-fast after test {node.test.get('id')} failed"
+                        self._cond.notify_all()
+                self._emit(emitted)
+        finally:
+            if worker is not None and lane.close_worker is not None:
+                try:
+                    lane.close_worker(worker)
+                except Exception:
+                    pass
+            with self._cond:
+                if not retired:
+                    self._live[lane.name] -= 1
+                self._worker_stats[lane.name].append({"worker": worker_no, "tests": count,
+                                                      "wall_time": round(time.perf_counter() - start, 3)})
+                self._cond.notify_all()
+
+    def run(self) -> List[Optional[Dict]]:
+        """Execute the suite; returns results by input position (None where cancelled before running)."""
+        emitted: List[tuple] = []
+        with self._cond:
+            for node in self.nodes:
+                if node.lane in self._remaining:
+                    self._remaining[node.lane] += 1
+            for node in self.nodes:
+                if node.state != PENDING:
+                    continue
+                if self._in_cycle[node.index]:
+                    self._resolve(node, skipped_result(node.test, "Skipped: dependency cycle"), False, emitted)
+                elif node.deps_left == 0:
+                    if node.lane in self.lanes:
+                        self._make_ready(node)
+                    else:
+                        self._resolve(node, self.unsupported(node.test), False, emitted)
+        self._emit(emitted)
+
+        plan = []
+        for name, lane in self.lanes.items():
+            size = sum(1 for n in self.nodes if n.lane == name)
+            plan.extend((lane, i) for i in range(min(lane.workers, size)))
+            self._live[name] = min(lane.workers, size)
+        if plan:
+            with ThreadPoolExecutor(max_workers=len(plan), thread_name_prefix="sched") as executor:
+                list(executor.map(lambda item: self._work(*item), plan))
+
+        if self.stop_reason and self.stop_reason != "cancelled":
+            emitted = []
+            with self._cond:
+                for node in self.nodes:
+                    if node.state != DONE:
+                        self._resolve(node, skipped_result(node.test, self.stop_reason), False, emitted)
+            self._emit(emitted)
+        return [node.result for node in self.nodes]
+
+    def report(self) -> Dict:
+        return {
+            "lanes": {name: sorted(stats, key=lambda s: s["worker"]) for name, stats in self._worker_stats.items()},
+            "skipped": sum(1 for n in self.nodes if n.result and n.result.get("status") == "skipped"),
+            "cycles": self.cycles,
+            "unknown_dependencies": sorted(set(self.unknown_dependencies)),
+            "stopped": self.stop_reason,
+        }
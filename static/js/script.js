@@ -221,24 +221,38 @@ async function generateTestCases() {
     generationStatus.style.display = 'block';
 
     const inputData = getInputData();
-    const response = await fetch("/api/generate-test", {
+    const response = await fetch("/api/generate-test/stream", {
       method: "POST",
       headers: { "Content-Type": "application/json" },
       body: JSON.stringify(inputData),
     });
-    const result = await response.json();
-    
-    if (result.status === "success" && Array.isArray(result.tests)) {
-        generatedTests = result.tests;
+    if (!response.ok || !response.body) {
+      const result = await response.json();
+      throw new Error(result.message || "An unknown error occurred during generation.");
+    }
+
+    generatedTests = [];
+    let failure = null;
+    await readEventStream(response, (event, data) => {
+      if (event === "test") {
+        if (generatedTests.length === 0) hideLoading(); // render as soon as the first case arrives
+        generatedTests.push(data);
+        displayTestCasesAccordion(generatedTests.length === 1);
+      } else if (event === "error") {
+        failure = data.message;
+      }
+    });
+
+    if (!failure && generatedTests.length > 0) {
         showToast(`Generated ${generatedTests.length} test cases successfully!`, "success");
         generateBtn.style.display = 'none';
         generationStatus.style.display = 'none';
         downloadBtn.style.display = 'inline-flex';
         nextStepBtn.style.display = 'inline-flex';
         exitBtn.style.display = 'inline-flex';
-        displayTestCasesAccordion();
+        displayTestCasesAccordion(false);
     } else {
-        throw new Error(result.message || "An unknown error occurred during generation.");
+        throw new Error(failure || "An unknown error occurred during generation.");
     }
   } catch (error) {
     console.error("Error generating tests:", error);
@@ -308,20 +322,55 @@ async function executeTests() {
     showLoading("Running test cases...");
     executeBtn.disabled = true;
 
-    const response = await fetch("/api/run-test", {
+    const response = await fetch("/api/run-test/stream", {
       method: "POST",
       headers: { "Content-Type": "application/json" },
       body: JSON.stringify({ website_url: targetUrl, test_cases: selectedTestCases }),
     });
-    const result = await response.json();
-    if (result.status === "success") {
-      testResults = result.results || []; // Store results
-      displayTestResults(testResults);
-      document.getElementById('download-results-btn').style.display = 'inline-flex'; // Show download button
-      showToast("Test execution completed!", "success");
-    } else {
+    if (!response.ok || !response.body) {
+      const result = await response.json();
       throw new Error(result.message);
     }
+
+    testResults = [];
+    const rowsById = new Map(); // id -> {index, element}, so a retried result replaces its row
+    const counts = { passed: 0, failed: 0 };
+    let summary = null;
+    let failure = null;
+    await readEventStream(response, (event, data) => {
+      if (event === "result") {
+        if (testResults.length === 0) { // first result: show the list right away
+          hideLoading();
+          displayTestResults([], true);
+        }
+        const key = String(data.id);
+        const row = data.retried ? rowsById.get(key) : undefined;
+        if (row) {
+          counts[testResults[row.index].status === "passed" ? "passed" : "failed"]--;
+          testResults[row.index] = data;
+          row.element = replaceTestResult(row.element, data);
+        } else {
+          rowsById.set(key, { index: testResults.length, element: appendTestResult(data) });
+          testResults.push(data);
+        }
+        counts[data.status === "passed" ? "passed" : "failed"]++;
+        updateResultCounts(counts.passed, counts.failed);
+      } else if (event === "summary") {
+        summary = data;
+      } else if (event === "error") {
+        failure = data.message;
+      }
+    });
+    if (failure) throw new Error(failure);
+
+    testResults = sortResultsById(testResults);
+    displayTestResults(testResults, false);
+    if (summary) {
+      const passed = summary.counts.passed || 0;
+      updateResultCounts(passed, summary.total - passed);
+    }
+    document.getElementById('download-results-btn').style.display = 'inline-flex'; // Show download button
+    showToast("Test execution completed!", "success");
   } catch (error) {
     console.error("Error executing tests:", error);
     showToast("Failed to execute test cases.", "error");
@@ -331,6 +380,30 @@ async function executeTests() {
   }
 }
 
+// Read a text/event-stream response body, calling onEvent(event, data) per frame.
+async function readEventStream(response, onEvent) {
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    let boundary;
+    while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+      const frame = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      let event = "message";
+      const dataLines = [];
+      frame.split("\n").forEach(line => {
+        if (line.startsWith("event:")) event = line.slice(6).trim();
+        else if (line.startsWith("data:")) dataLines.push(line.slice(5).trim());
+      });
+      if (dataLines.length) onEvent(event, JSON.parse(dataLines.join("\n")));
+    }
+  }
+}
+
 function initializeFileUpload() {
   const fileUploadArea = document.getElementById("file-upload-area");
   const fileInput = document.getElementById("document-upload");
@@ -448,7 +521,7 @@ function scrollToSection(sectionId) {
   }
 }
 
-function displayTestCasesAccordion() {
+function displayTestCasesAccordion(scroll = true) {
     const container = document.getElementById('test-list-display-container');
     if (!container) return;
     const selectedIds = new Set(selectedTestCases.map(t => t.id));
@@ -478,7 +551,7 @@ function displayTestCasesAccordion() {
     `;
     container.innerHTML = accordionHTML;
     container.style.display = 'block';
-    container.scrollIntoView({ behavior: 'smooth', block: 'start' });
+    if (scroll) container.scrollIntoView({ behavior: 'smooth', block: 'start' });
 }
 
 function toggleTestCaseSelection(event) {
@@ -501,25 +574,57 @@ function addAllTestCases() {
     showToast(`Selected all ${generatedTests.length} test cases.`, "success");
 }
 
-function displayTestResults(results) {
+function testResultHtml(result) {
+    return `
+            <div class="test-result ${result.status}">
+              <h5><i class="fas ${result.status === "passed" ? "fa-check-circle" : "fa-times-circle"}"></i>${result.name}</h5>
+              <p><strong>Status:</strong> ${result.status.toUpperCase()}</p>
+            </div>`;
+}
+
+function updateResultCounts(passed, failed) {
+    document.getElementById("passed-count").textContent = passed;
+    document.getElementById("failed-count").textContent = failed;
+}
+
+function displayTestResults(results, scroll = true) {
     const resultsSection = document.getElementById("results-section");
     const testResultsList = document.getElementById("test-results-list");
-    const passedCount = document.getElementById("passed-count");
-    const failedCount = document.getElementById("failed-count");
     const passed = results.filter(r => r.status === "passed").length;
-    const failed = results.length - passed;
-    passedCount.textContent = passed;
-    failedCount.textContent = failed;
+    updateResultCounts(passed, results.length - passed);
 
     testResultsList.innerHTML = results.length === 0 ?
         `<p>No test results to display.</p>` :
-        results.map(result => `
-            <div class="test-result ${result.status}">
-              <h5><i class="fas ${result.status === "passed" ? "fa-check-circle" : "fa-times-circle"}"></i>${result.name}</h5>
-              <p><strong>Status:</strong> ${result.status.toUpperCase()}</p>
-            </div>`).join("");
+        results.map(testResultHtml).join("");
     resultsSection.style.display = "block";
-    resultsSection.scrollIntoView({ behavior: 'smooth', block: 'start' });
+    if (scroll) resultsSection.scrollIntoView({ behavior: 'smooth', block: 'start' });
+}
+
+// Add one streamed result to the list without re-rendering the rows already shown.
+function appendTestResult(result) {
+    const testResultsList = document.getElementById("test-results-list");
+    if (!testResultsList.querySelector(".test-result")) testResultsList.innerHTML = "";
+    testResultsList.insertAdjacentHTML("beforeend", testResultHtml(result));
+    return testResultsList.lastElementChild;
+}
+
+function replaceTestResult(element, result) {
+    element.insertAdjacentHTML("afterend", testResultHtml(result));
+    const replacement = element.nextElementSibling;
+    element.remove();
+    return replacement;
+}
+
+// Numeric ids first, in order, then the rest in arrival order (as the server orders results).
+function sortResultsById(results) {
+    const key = result => {
+        const id = Number(result.id);
+        return result.id !== null && result.id !== "" && Number.isInteger(id) ? id : Infinity;
+    };
+    return results
+        .map((result, position) => ({ result, position, id: key(result) }))
+        .sort((a, b) => (a.id - b.id) || (a.position - b.position))
+        .map(entry => entry.result);
 }
 
 async function downloadTests() {
@@ -1,7 +1,9 @@
 import re
 import json
-from typing import List, Dict, Any
-from llm_utils import get_llm, invoke_llm
+from typing import List, Dict, Any, Iterable, Iterator
+from llm_utils import get_llm, invoke_llm, stream_llm, forget_llm_response
+from llm_client import LLMError
+from test_case_text import parse_test_blocks
 from jsonschema import validate as jsonschema_validate
 from jsonschema.exceptions import ValidationError as JsonSchemaValidationError
 
@@ -52,31 +54,81 @@ def _parse_llm_response(response_text: str) -> List[Dict[str, Any]]:
             json_str = json_match.group(0)
             return json.loads(json_str)
         else:
-            # Fallback for older parsing if the above fails
-            test_cases = []
-            # Regex to find individual test case blocks
-            pattern = re.compile(
-                r"ID:\s*(?P<id>\d+)\s*-\s*(?P<name>.*?)\n"
-                r"Description:\s*(?P<description>.*?)\n"
-                r"Type:\s*(?P<type>.*?)\n"
-                r"Selector:\s*(?P<selector>.*)",
-                re.DOTALL | re.MULTILINE
-            )
-            for match in pattern.finditer(response_text):
-                data = match.groupdict()
-                test_cases.append({
-                    "id": int(data['id']),
-                    "name": data['name'].strip(),
-                    "description": data['description'].strip(),
-                    "type": data['type'].strip(),
-                    "selector": data['selector'].strip()
-                })
-            return test_cases
+            # Fallback for the plain-text "ID: n - Name" layout
+            return parse_test_blocks(response_text)
     except (json.JSONDecodeError, AttributeError):
         print("Error: Could not parse JSON from LLM response.")
         return []
 
 
+class JSONArrayStreamParser:
+    """
+    Incrementally extracts the objects of a top-level JSON array from streamed text.
+    Each call to feed() returns the objects whose closing brace arrived in that chunk.
+    Prose before the '[' and malformed items are skipped; everything after the array's
+    closing ']' (the rest of a wrapper object, a code fence) is ignored.
+    """
+
+    def __init__(self):
+        self._started = False
+        self._finished = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._buf: List[str] = []
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        items: List[Dict[str, Any]] = []
+        for ch in chunk:
+            if self._finished:
+                break
+            if not self._started:
+                if ch == '[':
+                    self._started = True
+                continue
+            if self._depth == 0:
+                if ch == '{':
+                    self._depth = 1
+                    self._buf = [ch]
+                elif ch == ']':
+                    self._finished = True
+                continue
+            self._buf.append(ch)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in '{[':
+                self._depth += 1
+            elif ch in '}]':
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        obj = json.loads("".join(self._buf))
+                        if isinstance(obj, dict):
+                            items.append(obj)
+                    except json.JSONDecodeError:
+                        pass
+                    self._buf = []
+        return items
+
+
+def iter_test_cases(chunks: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """Yield validated test cases, numbered from 1, as soon as each object is complete."""
+    parser = JSONArrayStreamParser()
+    count = 0
+    for chunk in chunks:
+        for item in parser.feed(chunk):
+            count += 1
+            # The model's own id (often a string such as "TC-1") is replaced by the stream position
+            yield _validate_and_repair([dict(item, id=count)])[0]
+
+
 SCHEMA = {
     "type": "array",
     "items": {
@@ -95,12 +147,20 @@ SCHEMA = {
     }
 }
 
+def _int_id(value, default: int) -> int:
+    """The id as an int, or `default` when the model gave something like "TC-1"."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
 def _validate_and_repair(tests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     # Basic normalization and fill-ins
     norm: List[Dict[str, Any]] = []
     for i, t in enumerate(tests, start=1):
         item = dict(t)
-        item["id"] = int(item.get("id", i))
+        item["id"] = _int_id(item.get("id", i), i)
         item["name"] = item.get("name") or f"Test {i}"
         item["description"] = item.get("description") or ""
         # Coerce type bucket
@@ -121,7 +181,7 @@ def _validate_and_repair(tests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
             # If validation fails, try minimal repair: ensure ids are ints, non-empty strings
             repaired = []
             for i, t in enumerate(norm, start=1):
-                t["id"] = int(t.get("id", i))
+                t["id"] = _int_id(t.get("id", i), i)
                 t["name"] = str(t.get("name", f"Test {i}")).strip() or f"Test {i}"
                 t["description"] = str(t.get("description", "")).strip() or "No description"
                 repaired.append(t)
@@ -142,8 +202,11 @@ def generate_test_cases(test_type, input_data):
     if not llm:
         return {"error": "LLM Initialization Failed", "details": "Could not connect to the language model."}
 
+    # Callers can force a fresh completion with {"bypass_cache": true}
+    use_cache = not (isinstance(input_data, dict) and input_data.get('bypass_cache'))
+
     # Primary attempt
-    raw_response = invoke_llm(llm, prompt_template, input_data)
+    raw_response = invoke_llm(llm, prompt_template, input_data, use_cache=use_cache)
 
     if isinstance(raw_response, dict) and 'error' in raw_response:
         return raw_response
@@ -152,11 +215,14 @@ def generate_test_cases(test_type, input_data):
 
     # Retry once with stricter instruction if parsing failed
     if not parsed_tests:
+        forget_llm_response(llm, prompt_template, input_data)
         strict_template = prompt_template + "\nIMPORTANT: Output only a strict JSON array with objects, no backticks, no prose."
-        raw_response = invoke_llm(llm, strict_template, input_data)
+        raw_response = invoke_llm(llm, strict_template, input_data, use_cache=use_cache)
         if isinstance(raw_response, dict) and 'error' in raw_response:
             return raw_response
         parsed_tests = _parse_llm_response(raw_response)
+        if not parsed_tests:
+            forget_llm_response(llm, strict_template, input_data)
 
     if not parsed_tests:
         return {"error": "Parsing Failed", "details": "Could not extract valid test cases from the AI response. Please try again."}
@@ -166,3 +232,33 @@ def generate_test_cases(test_type, input_data):
     for i, t in enumerate(cleaned, start=1):
         t['id'] = i
     return cleaned
+
+
+def stream_test_cases(test_type, input_data):
+    """
+    Streaming variant of generate_test_cases: yields each validated test case as soon as the
+    model finishes emitting it. Falls back to one non-streamed generation if the stream
+    produced no parseable objects. Raises ValueError/LLMError on setup or transport failure.
+    """
+    prompt_template = _create_prompt_template(test_type)
+    if not prompt_template:
+        raise ValueError(f"The test type '{test_type}' is not supported.")
+
+    llm = get_llm()
+    if not llm:
+        raise LLMError("Could not connect to the language model.")
+
+    use_cache = not (isinstance(input_data, dict) and input_data.get('bypass_cache'))
+    produced = 0
+    for test in iter_test_cases(stream_llm(llm, prompt_template, input_data, use_cache=use_cache)):
+        produced += 1
+        yield test
+    if produced:
+        return
+
+    forget_llm_response(llm, prompt_template, input_data)
+    fallback = generate_test_cases(test_type, input_data)
+    if isinstance(fallback, dict) and 'error' in fallback:
+        raise LLMError(fallback.get('details') or fallback['error'])
+    for test in fallback:
+        yield test
@@ -0,0 +1,53 @@
+import re
+from typing import Dict, List, Optional
+
+# One precompiled pattern matching every line that starts a test ("ID: 12 - Name", name
+# optional) or a field ("Description: ..."). Text between two matches continues the
+# previous field, so the whole document is scanned once by the regex engine. A form feed
+# may precede a line: extracted PDF text marks each page after the first with one.
+_LINE = re.compile(
+    r"^[ \t\f]*(?:"
+    r"ID:[ \t]*(?P<id>\d+)[ \t]*(?:-[ \t]*(?P<name>[^\n]*))?"
+    r"|(?P<key>(?i:description|type|selector|endpoint|method)):[ \t]?(?P<value>[^\n]*)"
+    r")[ \t]*$",
+    re.MULTILINE,
+)
+
+
+def parse_test_blocks(text: str) -> List[Dict]:
+    """
+    Single-pass parser for the plain-text test case layout used by exported documents
+    and non-JSON LLM answers:
+
+        ID: 1 - Name
+        Description: ...
+        Type: UI
+        Selector: #login
+
+    Any field may be missing; lines that don't start a field continue the previous one
+    (multi-line descriptions). Text before the first ID line is ignored. Runs in linear time.
+    """
+    tests: List[Dict] = []
+    current: Optional[Dict] = None
+    field: Optional[str] = None
+    value_start = 0
+
+    def _close(end: int) -> None:
+        if current is not None and field is not None:
+            current[field] = text[value_start:end].strip()
+
+    for m in _LINE.finditer(text):
+        _close(m.start())
+        if m.group("id") is not None:
+            test_id = int(m.group("id"))
+            current = {"id": test_id, "name": (m.group("name") or "").strip() or f"Test {test_id}",
+                       "description": "", "type": "", "selector": ""}
+            tests.append(current)
+            field = None
+        elif current is not None:
+            field = m.group("key").lower()
+            value_start = m.start("value")
+        else:
+            field = None
+    _close(len(text))
+    return tests
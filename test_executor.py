@@ -1,7 +1,11 @@
 import os
 import json
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Tuple, Optional
 import re
+import threading
+from contextlib import contextmanager
+from urllib.parse import urljoin, urlparse
 import requests
 
 from selenium import webdriver
@@ -11,11 +15,57 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, WebDriverException
 
+from metrics import PhaseTimer, phase, record_skipped, record_test, timing
+from auth_sessions import capture, get_auth_store, restore, session_key
+from page_probe import PageIndex, fill_fields, find_text, resolve_first, settle_settings, wait_for_settle
+from scheduler import Lane, Scheduler, WorkerUnavailable, failed_result, merge_by_id, skipped_result
+
+
+def _ext_patterns(*exts: str) -> List[str]:
+    """Wildcard patterns for file extensions, with and without a query string."""
+    return [p for ext in exts for p in (f"*.{ext}", f"*.{ext}?*")]
+
+
+# Chrome DevTools URL patterns blocked for each resource class a load profile can drop
+BLOCKABLE_RESOURCES = {
+    "image": _ext_patterns("png", "jpg", "jpeg", "gif", "webp", "avif", "svg", "ico", "bmp"),
+    "font": _ext_patterns("woff", "woff2", "ttf", "otf", "eot"),
+    "media": _ext_patterns("mp4", "webm", "ogg", "mp3", "wav", "m4a", "mov", "m3u8"),
+    "analytics": ["*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+                  "*connect.facebook.net*", "*hotjar.com*", "*segment.com*", "*segment.io*",
+                  "*mixpanel.com*", "*clarity.ms*", "*hubspot.com*", "*intercom.io*"],
+}
+LOAD_PROFILES = {
+    "full": {"block": [], "strategy": "normal"},
+    "light": {"block": ["image", "font", "media", "analytics"], "strategy": "eager"},
+}
+PAGE_LOAD_STRATEGIES = ("normal", "eager", "none")
+
+
+def _load_profile() -> Dict:
+    """Resource blocking and page-load strategy for new browsers.
+
+    SELENIUM_LOAD_PROFILE picks a preset (full, light); SELENIUM_BLOCK_RESOURCES (comma list of
+    image, font, media, analytics), SELENIUM_BLOCK_URLS (extra wildcard patterns) and
+    SELENIUM_PAGELOAD_STRATEGY (normal, eager, none) override it.
+    """
+    preset = LOAD_PROFILES.get(os.getenv("SELENIUM_LOAD_PROFILE", "full").strip().lower(), LOAD_PROFILES["full"])
+    block = preset["block"]
+    if os.getenv("SELENIUM_BLOCK_RESOURCES") is not None:
+        block = [b.strip().lower() for b in os.getenv("SELENIUM_BLOCK_RESOURCES", "").split(",") if b.strip()]
+    strategy = os.getenv("SELENIUM_PAGELOAD_STRATEGY", preset["strategy"]).strip().lower()
+    if strategy not in PAGE_LOAD_STRATEGIES:
+        strategy = "normal"
+    patterns = [p for b in block for p in BLOCKABLE_RESOURCES.get(b, [])]
+    patterns += [p.strip() for p in os.getenv("SELENIUM_BLOCK_URLS", "").split(",") if p.strip()]
+    return {"block": block, "strategy": strategy, "patterns": patterns}
+
 
 def _create_driver() -> webdriver.Chrome:
     """Create a Chrome WebDriver using Selenium Manager (no manual driver install)."""
     headless = os.getenv("SELENIUM_HEADLESS", "1") not in ("0", "false", "False")
     window_size = os.getenv("SELENIUM_WINDOW_SIZE", "1366,900")
+    profile = _load_profile()
 
     options = Options()
     if headless:
@@ -27,9 +77,19 @@ def _create_driver() -> webdriver.Chrome:
     options.add_argument("--start-maximized")
     options.add_argument("--disable-infobars")
     options.add_argument("--disable-extensions")
+    # eager/none return from driver.get before subresources finish; callers settle explicitly
+    options.page_load_strategy = profile["strategy"]
+    if "image" in profile["block"]:
+        options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
 
     driver = webdriver.Chrome(options=options)
     driver.set_page_load_timeout(int(os.getenv("SELENIUM_PAGELOAD_TIMEOUT", "30")))
+    if profile["patterns"]:
+        try:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": profile["patterns"]})
+        except Exception:
+            pass  # blocking is an optimisation; run unblocked if CDP is unavailable
     return driver
 
 
@@ -65,20 +125,45 @@ def _split_selectors(selector: str) -> List[str]:
 
 
 def _wait_presence(driver: webdriver.Chrome, by: By, value: str, timeout: int = 10):
-    return WebDriverWait(driver, timeout).until(EC.presence_of_element_located((by, value)))
+    with phase("locate"):
+        return resolve_first(driver, [(by, value)], timeout=timeout)[1]
+
+
+_settling = threading.local()
+
+
+def _settle_policy() -> Dict:
+    """Settle tuning and target ready state, read from the environment once per browser session."""
+    policy = settle_settings()
+    # Without a full page load, settle once the DOM is parsed rather than waiting for every subresource
+    policy["ready"] = "complete" if _load_profile()["strategy"] == "normal" else "interactive"
+    return policy
+
+
+@contextmanager
+def _settling_with(policy: Dict):
+    """Make `policy` the current thread's settle policy (see _settle)."""
+    previous = getattr(_settling, "policy", None)
+    _settling.policy = policy
+    try:
+        yield policy
+    finally:
+        _settling.policy = previous
+
+
+def _settle(driver: webdriver.Chrome, action: bool = False) -> bool:
+    """Wait for the page to go quiet after navigation, or after a click/fill when `action`
+    (bounded by the shorter action budget; see page_probe.wait_for_settle)."""
+    policy = getattr(_settling, "policy", None) or _settle_policy()
+    timeout = policy["action_timeout"] if action else policy["timeout"]
+    with phase("settle"):
+        return wait_for_settle(driver, quiet=policy["quiet"], timeout=timeout, ready_state=policy["ready"])
 
 
 def _find_first(driver: webdriver.Chrome, candidates: List[Tuple[By, str]], timeout: int = 8):
-    last_exc = None
-    for by, value in candidates:
-        try:
-            return WebDriverWait(driver, timeout).until(EC.presence_of_element_located((by, value)))
-        except Exception as e:
-            last_exc = e
-            continue
-    if last_exc:
-        raise last_exc
-    raise TimeoutException("No selector candidates matched")
+    """First candidate (by list order) present on the page; all are probed in one round trip per poll."""
+    with phase("locate"):
+        return resolve_first(driver, candidates, timeout=timeout)[1]
 
 
 def _extract_text_to_type(description: str) -> Optional[str]:
@@ -99,21 +184,80 @@ def _perform_action(driver: webdriver.Chrome, by: By, value: str, description: s
     desc = (description or "").lower()
     # Type text
     if any(k in desc for k in ["enter", "type", "input"]):
-        elem = WebDriverWait(driver, 10).until(EC.element_to_be_clickable((by, value)))
-        elem.clear()
-        text = _extract_text_to_type(description) or ""
-        elem.send_keys(text)
+        with phase("locate"):
+            elem = WebDriverWait(driver, 10).until(EC.element_to_be_clickable((by, value)))
+        with phase("action"):
+            elem.clear()
+            text = _extract_text_to_type(description) or ""
+            elem.send_keys(text)
+        _settle(driver, action=True)
         return f"Typed text into element."
     # Click action
     if any(k in desc for k in ["click", "press", "tap"]):
-        elem = WebDriverWait(driver, 10).until(EC.element_to_be_clickable((by, value)))
-        elem.click()
+        with phase("locate"):
+            elem = WebDriverWait(driver, 10).until(EC.element_to_be_clickable((by, value)))
+        with phase("action"):
+            elem.click()
+        _settle(driver, action=True)
         return "Clicked element as described."
     # Default presence verification
-    WebDriverWait(driver, 10).until(EC.presence_of_element_located((by, value)))
+    _wait_presence(driver, by, value)
     return "Verified presence only."
 
 
+LOGIN_SUCCESS = "Login success heuristic matched."
+SUCCESS_HINTS = ["success", "logged", "secure", "welcome", "dashboard"]
+FAILURE_HINTS = ["invalid", "error", "required", "unsuccessful", "incorrect", "try again"]
+_PASSWORD_SHOWN_JS = "var f = document.querySelector(\"input[type='password']\"); return !!(f && f.offsetParent !== null);"
+_LOGOUT_SHOWN_JS = (
+    "return Array.prototype.some.call(document.querySelectorAll(\"a, button, input[type='submit'], input[type='button']\"),"
+    " function (e) { return e.offsetParent !== null && /log ?out|sign ?out/i.test("
+    "e.innerText || e.value || e.getAttribute('href') || ''); });"
+)
+# Descriptions of valid-login tests; the leading word boundary keeps "invalid" and "unsuccessful" out
+_EXPECTS_SUCCESS = re.compile(r"\b(?:success|lands on|secure|works|valid)")
+
+
+def _as_list(value) -> List[str]:
+    if not value:
+        return []
+    return [value] if isinstance(value, str) else [str(v) for v in value]
+
+
+def _assert_page(driver: webdriver.Chrome, expectations: Optional[Dict],
+                 keyword_sets: Optional[Dict[str, Tuple[List[str], str]]] = None) -> Dict[str, Optional[str]]:
+    """Check a test's `assert` dict (url_contains, text_contains, not_text_contains; a string or
+    a list) and any keyword sets ({name: (keywords, scope)}) inside the page in one script call.
+    Raises AssertionError for the first failed expectation; returns {name: snippet of the first
+    keyword found, or None}."""
+    expectations = expectations if isinstance(expectations, dict) else {}
+    keyword_sets = keyword_sets or {}
+    checks, meta = [], []
+    for kind, scope in (("url_contains", "url"), ("text_contains", "html"), ("not_text_contains", "html")):
+        for needle in _as_list(expectations.get(kind)):
+            checks.append((needle, scope))
+            meta.append((kind, needle))
+    for name, (keywords, scope) in keyword_sets.items():
+        for keyword in keywords:
+            checks.append((keyword, scope))
+            meta.append((name, keyword))
+
+    with phase("assert"):
+        found = find_text(driver, checks)
+
+    matched: Dict[str, Optional[str]] = {name: None for name in keyword_sets}
+    for (kind, needle), snippet in zip(meta, found):
+        if kind == "url_contains" and snippet is None:
+            raise AssertionError(f"URL did not contain expected fragment: {needle}")
+        if kind == "text_contains" and snippet is None:
+            raise AssertionError(f"Page did not contain expected text: {needle}")
+        if kind == "not_text_contains" and snippet is not None:
+            raise AssertionError(f"Page contained unexpected text: {needle} (...{snippet}...)")
+        if kind in matched and matched[kind] is None and snippet is not None:
+            matched[kind] = snippet
+    return matched
+
+
 def _get_credentials(website_url: str, test: Optional[Dict]) -> Tuple[str, str]:
     """Resolve credentials in order of precedence:
     1) test["credentials"] = { username, password }
@@ -152,43 +296,18 @@ def _get_credentials(website_url: str, test: Optional[Dict]) -> Tuple[str, str]:
     return "user@example.com", "Password123!"
 
 
-def _find_by_label_or_placeholder(driver: webdriver.Chrome, keywords: List[str]) -> Optional[Tuple[By, str]]:
-    """Find an input/textarea by matching label text, placeholder, name, or id against keywords."""
-    kws = [k.lower() for k in keywords]
-    # Try label[for] mapping
-    labels = driver.find_elements(By.TAG_NAME, "label")
-    for lbl in labels:
-        try:
-            text = (lbl.text or "").strip().lower()
-            if any(k in text for k in kws):
-                for_attr = lbl.get_attribute("for")
-                if for_attr:
-                    return By.ID, for_attr
-        except Exception:
-            continue
+def _find_by_label_or_placeholder(driver: webdriver.Chrome, keywords: List[str], timeout: int = 2,
+                                  index: Optional[PageIndex] = None):
+    """Find an input/textarea by matching label text, placeholder, name, or id against keywords.
+    Returns the element or None. Lookups use the page index, which is only rebuilt when the DOM changes."""
+    with phase("locate"):
+        field = (index or PageIndex(driver)).find(keywords, timeout=timeout)
+        return field["element"] if field else None
 
-    # Try placeholder/name/id contains
-    xpath = (
-        "//input|//textarea"
-        "[contains(translate(@placeholder,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'), '{kw}')"
-        " or contains(translate(@name,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'), '{kw}')"
-        " or contains(translate(@id,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'), '{kw}')]"
-    )
-    for kw in kws:
-        try:
-            el = WebDriverWait(driver, 2).until(EC.presence_of_element_located((By.XPATH, xpath.format(kw=kw))))
-            return By.XPATH, xpath.format(kw=kw)
-        except Exception:
-            continue
-    return None
 
-
-def _fill_login_and_submit(driver: webdriver.Chrome, description: str, website_url: str, test: Optional[Dict]) -> str:
-    """Heuristic login flow with configurable creds and broad field detection."""
-    desc = (description or "").lower()
-    valid_user, valid_pass = _get_credentials(website_url, test)
-
-    # Choose credentials based on negative/empty scenarios
+def _login_values(desc: str, valid_user: str, valid_pass: str) -> Tuple[str, str]:
+    """Username and password a login test types: the valid pair, unless its (lowercased)
+    description asks for empty or incorrect values."""
     user_val = valid_user
     pass_val = valid_pass
     if "empty username" in desc:
@@ -203,6 +322,14 @@ def _fill_login_and_submit(driver: webdriver.Chrome, description: str, website_u
         pass_val = "wrong_pass_123"
     if ("both" in desc and "incorrect" in desc) or "both username and password incorrect" in desc:
         user_val = "wrong_user"; pass_val = "wrong_pass_123"
+    return user_val, pass_val
+
+
+def _fill_login_and_submit(driver: webdriver.Chrome, description: str, website_url: str, test: Optional[Dict],
+                           index: Optional[PageIndex] = None) -> str:
+    """Heuristic login flow with configurable creds and broad field detection."""
+    desc = (description or "").lower()
+    user_val, pass_val = _login_values(desc, *_get_credentials(website_url, test))
 
     # Candidate fields typical of many login pages (broad)
     username_candidates = [
@@ -235,57 +362,134 @@ def _fill_login_and_submit(driver: webdriver.Chrome, description: str, website_u
     try:
         user_input = _find_first(driver, username_candidates)
     except Exception:
-        alt = _find_by_label_or_placeholder(driver, ["email", "user", "login", "identifier", "account"])
-        if not alt:
+        user_input = _find_by_label_or_placeholder(driver, ["email", "user", "login", "identifier", "account"],
+                                                   index=index)
+        if user_input is None:
             raise
-        user_input = WebDriverWait(driver, 5).until(EC.presence_of_element_located(alt))
 
     try:
         pass_input = _find_first(driver, password_candidates)
     except Exception:
-        altp = _find_by_label_or_placeholder(driver, ["password", "passcode"]) or (By.CSS_SELECTOR, "input[type='password']")
-        pass_input = WebDriverWait(driver, 5).until(EC.presence_of_element_located(altp))
+        pass_input = (_find_by_label_or_placeholder(driver, ["password", "passcode"], index=index)
+                      or _wait_presence(driver, By.CSS_SELECTOR, "input[type='password']", timeout=5))
     submit_btn = _find_first(driver, submit_candidates)
 
-    user_input.clear(); user_input.send_keys(user_val)
-    pass_input.clear(); pass_input.send_keys(pass_val)
-    submit_btn.click()
-
-    # Wait for feedback: URL or page content change
-    # Short settle wait
-    WebDriverWait(driver, 5).until(lambda d: True)
-    src = driver.page_source.lower()
-    cur = driver.current_url.lower()
-
-    # Assertions based on description intent or explicit expectations
-    expectations = (test or {}).get("assert") or {}
-    exp_url = expectations.get("url_contains") if isinstance(expectations, dict) else None
-    exp_text = expectations.get("text_contains") if isinstance(expectations, dict) else None
-    exp_not_text = expectations.get("not_text_contains") if isinstance(expectations, dict) else None
-
-    if exp_url and exp_url.lower() not in cur:
-        raise AssertionError(f"URL did not contain expected fragment: {exp_url}")
-    if exp_text and exp_text.lower() not in src:
-        raise AssertionError(f"Page did not contain expected text: {exp_text}")
-    if exp_not_text and exp_not_text.lower() in src:
-        raise AssertionError(f"Page contained unexpected text: {exp_not_text}")
-
-    if any(k in desc for k in ["success", "lands on", "secure", "works", "valid"]):
-        if any(t in (cur + src) for t in ["success", "logged", "secure", "welcome", "dashboard"]):
-            return "Login success heuristic matched."
+    with phase("action"):
+        user_input.clear(); user_input.send_keys(user_val)
+        pass_input.clear(); pass_input.send_keys(pass_val)
+        submit_btn.click()
+
+    # Wait for feedback: navigation, pending requests and DOM updates to finish
+    _settle(driver)
+
+    # Explicit expectations and the outcome heuristics, evaluated in the page in one call
+    found = _assert_page(driver, (test or {}).get("assert"), {
+        "success": (SUCCESS_HINTS, "page"),
+        "failure": (FAILURE_HINTS, "html"),
+    })
+
+    if _EXPECTS_SUCCESS.search(desc):
+        if found["success"]:
+            return LOGIN_SUCCESS
         raise AssertionError("Expected successful login feedback not found")
     if any(k in desc for k in ["fail", "error", "invalid", "required", "incorrect"]):
-        if any(t in src for t in ["invalid", "error", "required", "unsuccessful", "incorrect", "try again"]):
+        if found["failure"]:
             return "Login failure heuristic matched."
         raise AssertionError("Expected error message not found")
     return "Submitted login form."
 
 
-def _fill_form_generic(driver: webdriver.Chrome, data: Dict[str, str]) -> str:
+def _login_confirmed(driver: webdriver.Chrome, expectations: Optional[Dict]) -> bool:
+    """After submitting a login form: success feedback or the test's `assert` matches, or the
+    password field is gone."""
+    try:
+        found = _assert_page(driver, expectations, {"success": (SUCCESS_HINTS, "page")})
+        if found["success"] or expectations:
+            return True
+    except AssertionError:
+        pass
+    return not driver.execute_script(_PASSWORD_SHOWN_JS)
+
+
+def _ensure_authenticated(driver: webdriver.Chrome, website_url: str, test: Dict,
+                          index: PageIndex, auth_state: Dict) -> None:
+    """Bring the session into the logged-in state a `requires_auth` test needs.
+
+    The first session to need a (site, credentials) pair logs in through the form (at
+    test["login_url"], else website_url) and its cookies and web storage are snapshotted;
+    later sessions, pooled or fresh, restore the snapshot instead of logging in again.
+    """
+    username, password = _get_credentials(website_url, test)
+    key = session_key(website_url, username, password)
+    if auth_state.get("key") == key:
+        return
+    login_url = test.get("login_url") or website_url
+    creds = {"credentials": {"username": username, "password": password}}
+
+    def login():
+        with phase("navigate"):
+            driver.get(login_url)
+        _settle(driver)
+        _fill_login_and_submit(driver, "", login_url, creds, index=index)
+        if not _login_confirmed(driver, test.get("assert")):
+            raise AssertionError(f"Login as {username} at {login_url} did not succeed "
+                                 "(no success feedback and the password field is still shown)")
+        return capture(driver)
+
+    store = get_auth_store()
+    if store is None:
+        login()
+    else:
+        snapshot, reused = store.get_or_login(key, login)
+        if reused:
+            with phase("navigate"):
+                restore(driver, snapshot)
+            _settle(driver)
+            # Redirected away from the post-login page, or shown a login form: session expired
+            if (urlparse(driver.current_url).path != urlparse(snapshot.url).path
+                    or driver.execute_script(_PASSWORD_SHOWN_JS)):
+                store.invalidate(key)
+                snapshot, reused = store.get_or_login(key, login)
+                if reused:
+                    # Another session logged in again meanwhile; load its snapshot here
+                    with phase("navigate"):
+                        restore(driver, snapshot)
+                    _settle(driver)
+    auth_state["key"] = key
+
+
+def _remember_login(driver: webdriver.Chrome, website_url: str, test: Dict, auth_state: Dict,
+                    description: str, login_page: str) -> None:
+    """After a passing valid-login test, keep its session for later `requires_auth` tests.
+
+    Only when the test typed the real credentials and the login visibly took: the browser
+    left `login_page` or the page offers a logout control.
+    """
+    credentials = _get_credentials(website_url, test)
+    if _login_values((description or "").lower(), *credentials) != credentials:
+        return
+    if (urlparse(driver.current_url).path == urlparse(login_page).path
+            and not driver.execute_script(_LOGOUT_SHOWN_JS)):
+        return
+    store = get_auth_store()
+    key = session_key(website_url, *credentials)
+    if store is not None:
+        try:
+            store.put(key, capture(driver))
+        except WebDriverException:
+            return
+    auth_state["key"] = key
+
+
+def _fill_form_generic(driver: webdriver.Chrome, data: Dict[str, str], index: Optional[PageIndex] = None) -> str:
     """Fill a generic form using provided data mapping.
     Keys can be field hints (label text, placeholder, name, id) or CSS/XPath selectors.
+    Hints are all resolved against one page index snapshot and values are written in a
+    single script call, so large forms cost a handful of round trips.
     """
-    filled = 0
+    targets = []
+    hints: Dict[str, List[str]] = {}
+    values: Dict[str, str] = {}
     for key, value in (data or {}).items():
         by, selector = None, None
         # If key looks like a selector prefix, use it directly
@@ -299,20 +503,48 @@ def _fill_form_generic(driver: webdriver.Chrome, data: Dict[str, str]) -> str:
         elif low.startswith("name="):
             by, selector = By.NAME, key.split("=", 1)[1]
 
-        elem = None
+        if by and selector:
+            try:
+                targets.append((_wait_presence(driver, by, selector, timeout=5), value))
+            except Exception:
+                continue
+        else:
+            # Fuzzy by label/placeholder/name/id
+            hints[low] = [low]
+            values[low] = value
+
+    if hints:
+        with phase("locate"):
+            found = (index or PageIndex(driver)).find_many(hints, timeout=2)
+        targets.extend((field["element"], values[hint]) for hint, field in found.items())
+
+    filled = 0
+    with phase("action"):
         try:
-            if by and selector:
-                elem = WebDriverWait(driver, 5).until(EC.presence_of_element_located((by, selector)))
-            else:
-                # Fuzzy by label/placeholder/name/id
-                alt = _find_by_label_or_placeholder(driver, [low])
-                if alt:
-                    elem = WebDriverWait(driver, 5).until(EC.presence_of_element_located(alt))
-        except Exception:
-            elem = None
+            filled = fill_fields(driver, targets)
+        except WebDriverException:
+            filled = _type_fields(targets)
 
-        if elem is None:
-            continue
+    # Submit form if a submit control exists
+    try:
+        submit = _find_first(driver, [
+            (By.CSS_SELECTOR, "button[type='submit']"),
+            (By.CSS_SELECTOR, "input[type='submit']"),
+            (By.XPATH, "//button[contains(translate(.,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'submit' ) or contains(translate(.,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'send') or contains(translate(.,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'save') or contains(translate(.,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'continue')]")
+        ])
+        with phase("action"):
+            submit.click()
+        _settle(driver)
+    except Exception:
+        pass
+
+    return f"Filled {filled} field(s) and attempted submit."
+
+
+def _type_fields(targets: List[Tuple[object, str]]) -> int:
+    """Element-by-element fallback for fill_fields (clear + send_keys, click checkboxes)."""
+    filled = 0
+    for elem, value in targets:
         try:
             tag = elem.tag_name.lower()
             t = (elem.get_attribute("type") or "").lower()
@@ -322,33 +554,22 @@ def _fill_form_generic(driver: webdriver.Chrome, data: Dict[str, str]) -> str:
                 filled += 1
             elif t in ("checkbox",):
                 should = str(value).strip().lower() in ("1", "true", "yes", "on")
-                is_checked = elem.is_selected()
-                if should != is_checked:
+                if should != elem.is_selected():
                     elem.click()
                     filled += 1
         except Exception:
             continue
-
-    # Submit form if a submit control exists
-    try:
-        submit = _find_first(driver, [
-            (By.CSS_SELECTOR, "button[type='submit']"),
-            (By.CSS_SELECTOR, "input[type='submit']"),
-            (By.XPATH, "//button[contains(translate(.,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'submit' ) or contains(translate(.,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'send') or contains(translate(.,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'save') or contains(translate(.,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'continue')]")
-        ])
-        submit.click()
-    except Exception:
-        pass
-
-    return f"Filled {filled} field(s) and attempted submit."
+    return filled
 
 
 def _responsive_check(driver: webdriver.Chrome, description: str) -> str:
     desc = (description or "").lower()
-    if "375" in desc or "mobile" in desc:
-        driver.set_window_size(375, 812)
-    else:
-        driver.set_window_size(414, 896)
+    with phase("action"):
+        if "375" in desc or "mobile" in desc:
+            driver.set_window_size(375, 812)
+        else:
+            driver.set_window_size(414, 896)
+    _settle(driver, action=True)
     _find_first(driver, [
         (By.CSS_SELECTOR, "form"),
         (By.CSS_SELECTOR, "form[action]"),
@@ -357,7 +578,154 @@ def _responsive_check(driver: webdriver.Chrome, description: str) -> str:
     return "Responsive check passed (key elements visible)."
 
 
-def run_ui_tests(website_url: str, tests: List[Dict]) -> List[Dict]:
+def _execute_ui_test(driver: webdriver.Chrome, website_url: str, test: Dict, index: PageIndex,
+                     auth_state: Dict) -> Dict:
+    """Run one UI test on an already-open session and return its result dict."""
+    test_id = test.get("id")
+    name = test.get("name", f"Test {test_id}")
+    selector = test.get("selector") or test.get("locator")
+    description = test.get("description", "")
+    desc_lower = (description or "").lower()
+    try:
+        asserted = False
+        if test.get("requires_auth"):
+            _ensure_authenticated(driver, website_url, test, index, auth_state)
+        if test.get("page"):
+            # Start page of the test; skipped when the session is already there
+            target = urljoin(website_url, test["page"])
+            if driver.current_url != target:
+                with phase("navigate"):
+                    driver.get(target)
+                _settle(driver)
+        if "forgot" in desc_lower and "password" in desc_lower:
+            # Try by id, else any link with text 'forgot'
+            try:
+                link = _find_first(driver, [
+                    (By.CSS_SELECTOR, "a#forgot_password"),
+                    (By.XPATH, "//a[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'forgot')]")
+                ])
+                with phase("action"):
+                    link.click()
+                _settle(driver, action=True)
+                with phase("assert"):
+                    WebDriverWait(driver, 8).until(lambda d: any(find_text(d, [("password", "html"), ("reset", "url")])))
+                action_msg = "Navigated to password reset per heuristic."
+            except Exception:
+                action_msg = "Forgot password link not found."
+        elif (test.get("action") or "").lower() == "login" or (
+                not test.get("requires_auth") and ("login" in desc_lower or "sign in" in desc_lower)):
+            auth_state.clear()
+            login_page = driver.current_url
+            # Evaluates the test's `assert` dict together with its own heuristics
+            action_msg = _fill_login_and_submit(driver, description, website_url, test, index=index)
+            asserted = True
+            if action_msg == LOGIN_SUCCESS:
+                _remember_login(driver, website_url, test, auth_state, description, login_page)
+        elif (test.get("action") or "").lower() in ("formsubmit", "submit", "form") or ("form" in desc_lower and "submit" in desc_lower):
+            action_msg = _fill_form_generic(driver, test.get("data") or {}, index=index)
+        elif "responsive" in desc_lower or "mobile" in desc_lower:
+            action_msg = _responsive_check(driver, description)
+        else:
+            # Generic presence checks. Support multi-selectors; pass if at least one found.
+            found = 0
+            if selector:
+                for sel in _split_selectors(selector):
+                    try:
+                        by, value = _loc_strategy(sel)
+                        _wait_presence(driver, by, value)
+                        found += 1
+                    except Exception:
+                        continue
+            if selector and found == 0:
+                raise TimeoutException("None of the provided selectors were found")
+            action_msg = f"Verified presence of {found} selector(s)." if selector else "Page loaded."
+        if not asserted and test.get("assert"):
+            _assert_page(driver, test.get("assert"))
+        if any(k in desc_lower for k in ("logout", "log out", "sign out")):
+            auth_state.clear()
+
+        return {
+            "id": test_id,
+            "name": name,
+            "status": "passed",
+            "message": action_msg
+        }
+    except TimeoutException:
+        return {
+            "id": test_id,
+            "name": name,
+            "status": "failed",
+            "message": "Timeout waiting for expected UI condition."
+        }
+    except Exception as e:
+        return {
+            "id": test_id,
+            "name": name,
+            "status": "failed",
+            "message": f"Error executing test: {str(e)}"
+        }
+
+
+class _UISession:
+    """One browser for a UI worker, opened on its first test and reused for the rest.
+
+    The driver comes from `pool` when given (and goes back to it on close), else Chrome
+    is launched and quit. The first test's timer also covers driver startup and the
+    initial page load. If no browser can be had, `run` raises scheduler.WorkerUnavailable
+    (every time) so the scheduler can hand the test to a worker that has one.
+    """
+
+    def __init__(self, website_url: str, pool=None):
+        self.website_url = website_url
+        self.pool = pool
+        self.driver = None
+        self.error: Optional[str] = None
+        # Form controls on the current page; rebuilt only after navigation or DOM mutation
+        self.index: Optional[PageIndex] = None
+        # Which (site, credentials) this session is currently logged in as, if any
+        self.auth_state: Dict = {}
+        # Settle budgets and ready state, resolved once rather than per action
+        self.settle = _settle_policy()
+
+    def _open(self, timer: PhaseTimer) -> None:
+        if self.driver is None:
+            try:
+                with timing(timer), phase("driver_startup"):
+                    self.driver = self.pool.checkout() if self.pool else _create_driver()
+            except WebDriverException as e:
+                self.error = f"WebDriver init failed: {str(e)}"
+                raise WorkerUnavailable(self.error)
+        with timing(timer), _settling_with(self.settle):
+            with phase("navigate"):
+                self.driver.get(self.website_url)
+            _settle(self.driver)
+        self.index = PageIndex(self.driver)
+
+    def run(self, test: Dict) -> Dict:
+        timer = PhaseTimer()
+        if self.error is not None:
+            raise WorkerUnavailable(self.error)
+        if self.index is None:
+            self._open(timer)
+        with timing(timer), _settling_with(self.settle):
+            result = _execute_ui_test(self.driver, self.website_url, test, self.index, self.auth_state)
+        return record_test("ui", result, timer)
+
+    def close(self) -> None:
+        if self.driver is None:
+            return
+        try:
+            if self.pool:
+                self.pool.checkin(self.driver)
+            else:
+                self.driver.quit()
+        except Exception:
+            pass
+        self.driver = None
+
+
+def run_ui_tests(website_url: str, tests: List[Dict], pool=None, on_result=None,
+                 cancel: Optional[threading.Event] = None) -> List[Dict]:
     """Run a simple UI test suite using Selenium.
 
     Each test should include: id, name, description, selector.
@@ -365,137 +733,220 @@ def run_ui_tests(website_url: str, tests: List[Dict]) -> List[Dict]:
       - Loads website_url once at the start.
       - For each test: waits for element located by selector; if description suggests clicking, performs a click.
       - Returns a list of result dicts with status passed/failed and a message.
+    If a driver_pool.DriverPool is given, a warm session is checked out and returned
+    to the pool afterwards instead of launching and quitting Chrome.
+    `on_result` is called with each result as soon as it is ready; setting `cancel`
+    stops the run before the next test.
     """
     results: List[Dict] = []
+    session = _UISession(website_url, pool)
     try:
-        driver = _create_driver()
-    except WebDriverException as e:
-        return [{"id": t.get("id"), "name": t.get("name", "Unnamed Test"), "status": "failed", "message": f"WebDriver init failed: {str(e)}"} for t in tests]
-
-    try:
-        driver.get(website_url)
         for test in tests:
-            test_id = test.get("id")
-            name = test.get("name", f"Test {test_id}")
-            selector = test.get("selector") or test.get("locator")
-            description = test.get("description", "")
-            desc_lower = (description or "").lower()
-
+            if cancel is not None and cancel.is_set():
+                break
             try:
-                if "forgot" in desc_lower and "password" in desc_lower:
-                    # Try by id, else any link with text 'forgot'
-                    try:
-                        link = _find_first(driver, [
-                            (By.CSS_SELECTOR, "a#forgot_password"),
-                            (By.XPATH, "//a[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'forgot')]")
-                        ])
-                        link.click()
-                        WebDriverWait(driver, 8).until(lambda d: "password" in d.page_source.lower() or "reset" in d.current_url.lower())
-                        action_msg = "Navigated to password reset per heuristic."
-                    except Exception:
-                        action_msg = "Forgot password link not found."
-                elif (test.get("action") or "").lower() == "login" or "login" in desc_lower or "sign in" in desc_lower:
-                    action_msg = _fill_login_and_submit(driver, description, website_url, test)
-                elif (test.get("action") or "").lower() in ("formsubmit", "submit", "form") or ("form" in desc_lower and "submit" in desc_lower):
-                    action_msg = _fill_form_generic(driver, test.get("data") or {})
-                elif "responsive" in desc_lower or "mobile" in desc_lower:
-                    action_msg = _responsive_check(driver, description)
-                else:
-                    # Generic presence checks. Support multi-selectors; pass if at least one found.
-                    found = 0
-                    if selector:
-                        for sel in _split_selectors(selector):
-                            try:
-                                by, value = _loc_strategy(sel)
-                                _wait_presence(driver, by, value)
-                                found += 1
-                            except Exception:
-                                continue
-                    if selector and found == 0:
-                        raise TimeoutException("None of the provided selectors were found")
-                    action_msg = f"Verified presence of {found} selector(s)." if selector else "Page loaded."
-
-                results.append({
-                    "id": test_id,
-                    "name": name,
-                    "status": "passed",
-                    "message": action_msg
-                })
-            except TimeoutException:
-                results.append({
-                    "id": test_id,
-                    "name": name,
-                    "status": "failed",
-                    "message": "Timeout waiting for expected UI condition."
-                })
-            except Exception as e:
-                results.append({
-                    "id": test_id,
-                    "name": name,
-                    "status": "failed",
-                    "message": f"Error executing test: {str(e)}"
-                })
+                result = session.run(test)
+            except WorkerUnavailable as e:
+                result = record_skipped("ui", failed_result(test, str(e)))
+            results.append(result)
+            if on_result:
+                on_result(result)
         return results
     finally:
-        try:
-            driver.quit()
-        except Exception:
-            pass
+        session.close()
+
+
+def max_workers() -> int:
+    """SELENIUM_MAX_WORKERS (default 8): the most browsers a single run may use."""
+    try:
+        return max(1, int(os.getenv("SELENIUM_MAX_WORKERS", "8")))
+    except ValueError:
+        return 8
+
+
+def resolve_workers(workers: Optional[int]) -> int:
+    """
+    Number of parallel browser workers: explicit value, else SELENIUM_WORKERS env, else 1;
+    never more than SELENIUM_MAX_WORKERS (default 8), whatever a request asks for.
+    """
+    if workers is None:
+        workers = os.getenv("SELENIUM_WORKERS", "1")
+    try:
+        return min(max(1, int(workers)), max_workers())
+    except (TypeError, ValueError):
+        return 1
+
+
+def _api_url(base_url: str, t: Dict) -> str:
+    endpoint = t.get("endpoint") or t.get("url") or ""
+    return endpoint if endpoint.startswith("http") else base_url.rstrip("/") + "/" + endpoint.lstrip("/")
 
 
-def run_api_tests(base_url: str, tests: List[Dict]) -> List[Dict]:
+def _run_api_test(session: requests.Session, url: str, t: Dict, timeout: int) -> Dict:
+    """Execute one API test and return its result dict (with elapsed seconds and phase timings)."""
+    name = t.get("name", "API Test")
+    method = str(t.get("method", "GET")).upper()
+    timer = PhaseTimer()
+    try:
+        expected = int(t.get("expected_status", 200))
+        with timer.phase("request"):
+            resp = session.request(method, url, headers=t.get("headers") or {}, data=t.get("body"),
+                                   json=t.get("json"), timeout=timeout)
+        status = "passed" if resp.status_code == expected else "failed"
+        msg = f"HTTP {method} {url} -> {resp.status_code} (expected {expected})"
+    except Exception as e:
+        status, msg = "failed", str(e)
+    result = {"id": t.get("id"), "name": name, "status": status, "message": msg,
+              "elapsed": round(timer.elapsed(), 4)}
+    return record_test("api", result, timer)
+
+
+class _ApiRunner:
+    """Shared state for API tests: one keep-alive session and a per-host in-flight limit.
+
+    `run(test)` is thread-safe; callers bring their own threads. The adapter's pool is
+    sized for the hosts in `tests`, and hosts not seen up front get a limit on first use.
+    """
+
+    def __init__(self, base_url: str, tests: List[Dict], concurrency: Optional[int] = None,
+                 per_host: Optional[int] = None):
+        self.base_url = base_url
+        self.timeout = int(os.getenv("API_TEST_TIMEOUT", "20"))
+        self.concurrency = max(1, int(concurrency or os.getenv("API_TEST_CONCURRENCY", "8")))
+        self.per_host = max(1, int(per_host or os.getenv("API_TEST_PER_HOST", "4")))
+        hosts = {urlparse(_api_url(base_url, t)).netloc for t in tests}
+        self._host_limits = {h: threading.BoundedSemaphore(self.per_host) for h in hosts}
+        self._lock = threading.Lock()
+
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=max(1, len(hosts)),
+                                                pool_maxsize=min(self.concurrency, self.per_host))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _limit(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            limit = self._host_limits.get(host)
+            if limit is None:
+                limit = self._host_limits[host] = threading.BoundedSemaphore(self.per_host)
+            return limit
+
+    def run(self, test: Dict) -> Dict:
+        url = _api_url(self.base_url, test)
+        with self._limit(urlparse(url).netloc):
+            return _run_api_test(self.session, url, test, self.timeout)
+
+    def close(self) -> None:
+        self.session.close()
+
+
+def run_api_tests(base_url: str, tests: List[Dict], concurrency: Optional[int] = None,
+                  per_host: Optional[int] = None, on_result=None,
+                  cancel: Optional[threading.Event] = None) -> List[Dict]:
     """Execute simple API tests using requests. Each test can include:
     - method: GET/POST/PUT/DELETE (default GET)
     - endpoint: path or full URL
     - expected_status: integer HTTP status (default 200)
     - headers: dict
     - body/json: request payload
+
+    Tests run on a thread pool of `concurrency` workers (API_TEST_CONCURRENCY, default 8),
+    with at most `per_host` in flight per host (API_TEST_PER_HOST, default 4). A single
+    keep-alive session is shared and its connection pool sized to match. Results keep
+    the input order. `on_result` receives each result as it completes; tests not yet
+    started when `cancel` is set are left out.
     """
-    results: List[Dict] = []
-    session = requests.Session()
-    timeout = int(os.getenv("API_TEST_TIMEOUT", "20"))
-    for t in tests:
-        name = t.get("name", "API Test")
-        method = str(t.get("method", "GET")).upper()
-        endpoint = t.get("endpoint") or t.get("url") or ""
-        url = endpoint if endpoint.startswith("http") else base_url.rstrip("/") + "/" + endpoint.lstrip("/")
-        expected = int(t.get("expected_status", 200))
-        headers = t.get("headers") or {}
-        data = t.get("body")
-        json_body = t.get("json")
-        try:
-            resp = session.request(method, url, headers=headers, data=data, json=json_body, timeout=timeout)
-            status = "passed" if resp.status_code == expected else "failed"
-            msg = f"HTTP {method} {url} -> {resp.status_code} (expected {expected})"
-            results.append({"id": t.get("id"), "name": name, "status": status, "message": msg})
-        except Exception as e:
-            results.append({"id": t.get("id"), "name": name, "status": "failed", "message": str(e)})
-    return results
+    if not tests:
+        return []
+    runner = _ApiRunner(base_url, tests, concurrency=concurrency, per_host=per_host)
+
+    def _run(test: Dict) -> Optional[Dict]:
+        if cancel is not None and cancel.is_set():
+            return None
+        result = runner.run(test)
+        if on_result:
+            on_result(result)
+        return result
+
+    try:
+        if runner.concurrency == 1 or len(tests) == 1:
+            results = [_run(t) for t in tests]
+        else:
+            with ThreadPoolExecutor(max_workers=min(runner.concurrency, len(tests)),
+                                    thread_name_prefix="api-test") as executor:
+                results = list(executor.map(_run, tests))
+        return [r for r in results if r is not None]
+    finally:
+        runner.close()
+
 
+UI_TYPES = ("ui", "functional", "smoke", "regression")
+API_TYPES = ("api", "http")
 
-def run_tests(website_url: str, tests: List[Dict]) -> List[Dict]:
+
+def _test_kind(test: Dict) -> Optional[str]:
+    """"ui", "api", or None for a type without a runner. Untyped tests are UI tests."""
+    kind = str(test.get("type", "")).strip().lower()
+    if kind in UI_TYPES or not test.get("type"):
+        return "ui"
+    if kind in API_TYPES:
+        return "api"
+    return None
+
+
+def _unsupported(test: Dict) -> Dict:
+    return skipped_result(test, f"Runner for type '{test.get('type')}' not implemented yet.")
+
+
+def run_tests(website_url: str, tests: List[Dict], workers: Optional[int] = None,
+              report: Optional[Dict] = None, pool=None, on_result=None,
+              cancel: Optional[threading.Event] = None, fail_fast: bool = False) -> List[Dict]:
     """Entry point to run different kinds of tests based on 'type'.
     Routes UI/Functional to Selenium. Routes API tests to requests. Others skipped.
+    `workers` > 1 (or SELENIUM_WORKERS) spreads UI tests across parallel browsers, at most
+    SELENIUM_MAX_WORKERS;
+    `pool` (a DriverPool) supplies warm browsers instead of cold-starting Chrome; the run
+    then uses no more workers than the pool's `max_live`.
+    `on_result` is called per result as tests finish; `cancel` stops the run early.
+
+    UI and API tests run concurrently through scheduler.Scheduler, which honours the
+    optional `depends_on`, `priority`, `group` and `page` fields (see its docstring).
+    Tests depending on a failed or skipped test are skipped; with `fail_fast` the first
+    failure skips everything not yet started. Results are ordered by test id; `report`
+    receives "shards" (one entry per browser) and "schedule".
     """
-    ui_like = ["ui", "functional", "smoke", "regression"]
-    api_like = ["api", "http"]
-    ui_tests = [t for t in tests if str(t.get("type", "")).strip().lower() in ui_like or not t.get("type")]
-    api_tests = [t for t in tests if str(t.get("type", "")).strip().lower() in api_like]
-    other_tests = [t for t in tests if t not in ui_tests and t not in api_tests]
-
-    results = []
-    if ui_tests:
-        results.extend(run_ui_tests(website_url, ui_tests))
-    if api_tests:
-        results.extend(run_api_tests(website_url, api_tests))
-
-    # Mark non-implemented test types as skipped
-    for t in other_tests:
-        results.append({
-            "id": t.get("id"),
-            "name": t.get("name", "Unnamed Test"),
-            "status": "skipped",
-            "message": f"Runner for type '{t.get('type')}' not implemented yet."
-        })
-
-    return results
+    counts = {"ui": 0, "api": 0}
+    kinds = []
+    for t in tests:
+        kind = _test_kind(t)
+        kinds.append(kind)
+        if kind is not None:
+            counts[kind] += 1
+
+    lanes = {}
+    if counts["ui"]:
+        ui_workers = min(resolve_workers(workers), counts["ui"])
+        if pool is not None:
+            ui_workers = min(ui_workers, pool.max_live)
+        lanes["ui"] = Lane("ui", ui_workers,
+                           lambda: _UISession(website_url, pool), lambda session: session.close())
+    api_runner = None
+    if counts["api"]:
+        api_runner = _ApiRunner(website_url, [t for t, kind in zip(tests, kinds) if kind == "api"])
+        lanes["api"] = Lane("api", min(api_runner.concurrency, counts["api"]), lambda: api_runner)
+
+    scheduler = Scheduler(tests, lanes, _test_kind, _unsupported,
+                          fail_fast=fail_fast, on_result=on_result, cancel=cancel,
+                          on_skipped=lambda lane, result: record_skipped(lane or "other", result))
+    try:
+        outcomes = scheduler.run()
+    finally:
+        if api_runner is not None:
+            api_runner.close()
+
+    schedule = scheduler.report()
+    if report is not None:
+        report["shards"] = [{"shard": s["worker"], "tests": s["tests"], "wall_time": s["wall_time"]}
+                            for s in schedule["lanes"].get("ui", [])]
+        report["schedule"] = schedule
+    return merge_by_id(outcomes)
@@ -0,0 +1,76 @@
+import time
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from test_executor import run_api_tests
+
+
+class StandIn:
+    """Local API; /status/<code>?delay=<s> answers <code> after <s> seconds, tracking in-flight requests per Host."""
+
+    def __init__(self):
+        self.active = Counter()
+        self.max_active = Counter()
+        self._lock = threading.Lock()
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                host = self.headers["Host"].split(":")[0]
+                with stand_in._lock:
+                    stand_in.active[host] += 1
+                    stand_in.max_active[host] = max(stand_in.max_active[host], stand_in.active[host])
+                try:
+                    path, _, query = self.path.partition("?delay=")
+                    time.sleep(float(query or 0))
+                    self.send_response(int(path.rsplit("/", 1)[1]))
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                finally:
+                    with stand_in._lock:
+                        stand_in.active[host] -= 1
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def api():
+    server = StandIn()
+    yield server
+    server.close()
+
+
+def test_in_flight_requests_are_limited_per_host(api):
+    tests = [{"id": i, "endpoint": "/status/200?delay=0.05"} for i in range(1, 9)]
+    tests += [{"id": i, "endpoint": f"http://localhost:{api.port}/status/200?delay=0.05"} for i in range(9, 17)]
+
+    results = run_api_tests(f"http://127.0.0.1:{api.port}", tests, concurrency=8, per_host=2)
+
+    assert all(r["status"] == "passed" for r in results)
+    assert api.max_active == {"127.0.0.1": 2, "localhost": 2}
+
+
+def test_results_keep_input_order_whatever_finishes_first(api):
+    # Earlier tests are slower, so they complete last
+    tests = [{"id": i, "endpoint": f"/status/{200 if i % 2 else 404}?delay={0.08 - i * 0.01}",
+              "expected_status": 200} for i in range(1, 7)]
+    completed = []
+
+    results = run_api_tests(f"http://127.0.0.1:{api.port}", tests, concurrency=6, per_host=6,
+                            on_result=lambda r: completed.append(r["id"]))
+
+    assert [r["id"] for r in results] == [1, 2, 3, 4, 5, 6]
+    assert [r["status"] for r in results] == ["passed", "failed"] * 3
+    assert completed != [1, 2, 3, 4, 5, 6]
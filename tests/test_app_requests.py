@@ -0,0 +1,20 @@
+import pytest
+
+import app as app_module
+import run_history
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.delenv("RUN_HISTORY_DB", raising=False)
+    monkeypatch.setattr(run_history, "_history", None)
+    return app_module.app.test_client()
+
+
+@pytest.mark.parametrize("path", ["/api/run-test", "/api/run-test/stream", "/api/jobs"])
+def test_rerun_without_history_is_a_client_error(client, path):
+    response = client.post(path, json={"website_url": "https://example.test", "rerun": True,
+                                       "test_cases": [{"id": 1, "name": "Home"}]})
+
+    assert response.status_code == 400
+    assert "RUN_HISTORY_DB" in response.get_json()["message"]
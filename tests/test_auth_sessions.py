@@ -0,0 +1,137 @@
+import time
+import threading
+
+from selenium.common.exceptions import WebDriverException
+
+from auth_sessions import AuthSessionStore, AuthSnapshot, capture, restore, session_key
+
+KEY = session_key("https://example.test/login", "alice", "secret")
+
+
+def _snapshot(cookies=None):
+    return AuthSnapshot("https://example.test", "https://example.test/home", cookies or [], {}, {})
+
+
+class FakeDriver:
+    """Records the cookie, storage and navigation calls capture/restore make."""
+
+    def __init__(self, url="about:blank", cdp=True):
+        self.current_url = url
+        self.cdp = cdp
+        self.visited = []
+        self.cdp_cookies = None
+        self.added = []
+        self.storage = None
+
+    def get(self, url):
+        self.visited.append(url)
+        self.current_url = url
+
+    def get_cookies(self):
+        return [{"name": "sid", "value": "abc", "path": "/"}]
+
+    def execute_script(self, script, *args):
+        if args:
+            self.storage = args
+            return None
+        return {"local": {"token": "t"}, "session": {"tab": "1"}}
+
+    def execute_cdp_cmd(self, cmd, params):
+        if not self.cdp:
+            raise WebDriverException("no CDP")
+        self.cdp_cookies = params["cookies"]
+        return {}
+
+    def add_cookie(self, cookie):
+        self.added.append(cookie)
+
+
+def test_snapshots_expire_after_the_ttl_or_a_cookie_expiry():
+    store = AuthSessionStore(ttl=60)
+    old = _snapshot()
+    old.created_at -= 61
+    store.put(KEY, old)
+    assert store.get(KEY) is None
+
+    store.put(KEY, _snapshot(cookies=[{"name": "sid", "value": "x", "expiry": time.time() - 1}]))
+    assert store.get(KEY) is None
+
+    fresh = _snapshot()
+    store.put(KEY, fresh)
+    assert store.get(KEY) is fresh
+
+
+def test_expired_snapshots_are_swept_when_another_is_stored():
+    store = AuthSessionStore(ttl=60)
+    stale = _snapshot()
+    stale.created_at -= 61
+    store.put(session_key("https://old.test", "bob", "pw"), stale)
+
+    store.put(KEY, _snapshot())
+    assert store.stats()["snapshots"] == 1
+
+
+def test_concurrent_callers_for_a_key_share_one_login():
+    store = AuthSessionStore()
+    logins = []
+    gate = threading.Event()
+
+    def login():
+        logins.append(1)
+        gate.wait(2)
+        return _snapshot()
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(store.get_or_login(KEY, login)))
+               for _ in range(5)]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    gate.set()
+    for t in threads:
+        t.join()
+
+    assert len(logins) == 1
+    assert sorted(reused for _, reused in results) == [False, True, True, True, True]
+    assert len({id(snapshot) for snapshot, _ in results}) == 1
+    assert store.stats() == {"snapshots": 1, "logins": 1, "reuses": 4}
+    assert store._key_locks == {}
+
+
+def test_key_lock_is_dropped_even_when_login_fails():
+    store = AuthSessionStore()
+
+    def login():
+        raise RuntimeError("login form not found")
+
+    for i in range(3):
+        try:
+            store.get_or_login(session_key(f"https://site{i}.test", "u", "p"), login)
+        except RuntimeError:
+            pass
+
+    assert store._key_locks == {}
+    assert store.stats()["logins"] == 0
+
+
+def test_capture_then_restore_replays_cookies_and_storage_on_the_origin():
+    snapshot = capture(FakeDriver("https://example.test/dashboard"))
+    assert snapshot.origin == "https://example.test"
+    assert snapshot.local_storage == {"token": "t"} and snapshot.session_storage == {"tab": "1"}
+
+    driver = FakeDriver()
+    restore(driver, snapshot)
+
+    assert driver.visited == ["https://example.test/", "https://example.test/dashboard"]
+    assert driver.cdp_cookies == [{"name": "sid", "value": "abc", "path": "/", "secure": False,
+                                   "httpOnly": False, "url": "https://example.test"}]
+    assert driver.storage == ({"token": "t"}, {"tab": "1"})
+
+
+def test_restore_falls_back_to_add_cookie_without_cdp():
+    snapshot = capture(FakeDriver("https://example.test/dashboard"))
+    driver = FakeDriver("https://example.test/other", cdp=False)
+    restore(driver, snapshot)
+
+    assert driver.visited == ["https://example.test/dashboard"]
+    assert driver.added == snapshot.cookies
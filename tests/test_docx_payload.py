@@ -0,0 +1,50 @@
+import io
+
+import pytest
+from docx import Document
+
+from document_parser import embed_tests_payload, load_tests_payload
+
+TESTS = [{"id": 1, "name": "Login", "type": "UI", "selector": "#login"},
+         {"id": 2, "name": "Health", "type": "API", "endpoint": "/health"}]
+
+
+def _export(tests=TESTS):
+    document = Document()
+    for t in TESTS:
+        document.add_heading(t["name"], level=1)
+        document.add_paragraph(f"Type: {t['type']}")
+    embed_tests_payload(document, tests)
+    out = io.BytesIO()
+    document.save(out)
+    out.seek(0)
+    return out
+
+
+def test_exported_docx_loads_back_exactly():
+    assert load_tests_payload(_export()) == TESTS
+
+
+def test_edited_docx_text_ignores_the_payload():
+    document = Document(_export())
+    document.paragraphs[1].text = "Type: API"
+    edited = io.BytesIO()
+    document.save(edited)
+    edited.seek(0)
+
+    assert load_tests_payload(edited) is None
+
+
+@pytest.mark.parametrize("payload", [{"id": 1}, [{"id": 1}, "Login"], [{"name": "no id"}], [{"id": None}]])
+def test_malformed_payload_falls_back_to_parsing(payload):
+    assert load_tests_payload(_export(payload)) is None
+
+
+def test_payload_ids_are_renumbered_with_their_dependencies():
+    tests = [{"id": 3, "name": "Login"}, {"id": "7", "name": "Profile", "depends_on": 3},
+             {"id": 9, "name": "Logout", "depends_on": ["7", 3]}]
+
+    loaded = load_tests_payload(_export(tests))
+
+    assert [t["id"] for t in loaded] == [1, 2, 3]
+    assert loaded[1]["depends_on"] == 1 and loaded[2]["depends_on"] == [2, 1]
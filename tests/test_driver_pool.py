@@ -0,0 +1,51 @@
+import pytest
+from selenium.common.exceptions import WebDriverException
+
+from driver_pool import DriverPool, create_pool_from_env
+
+
+class FakeDriver:
+    """Just enough of a Chrome session for checkout health checks and checkin resets."""
+
+    current_url = "about:blank"
+
+    def __init__(self):
+        self.quit_called = False
+
+    def execute_script(self, script, *args):
+        return 1
+
+    def execute_cdp_cmd(self, cmd, params):
+        return {}
+
+    def delete_all_cookies(self):
+        pass
+
+    def set_window_size(self, width, height):
+        pass
+
+    def get(self, url):
+        self.current_url = url
+
+    def quit(self):
+        self.quit_called = True
+
+
+def test_checkout_times_out_when_every_browser_is_in_use():
+    pool = DriverPool(min_idle=0, max_live=1, checkout_timeout=0.05, factory=FakeDriver)
+    driver = pool.checkout()
+
+    with pytest.raises(WebDriverException, match="No browser available"):
+        pool.checkout()
+
+    pool.checkin(driver)
+    assert pool.checkout() is driver
+    assert pool.stats()["live"] == 1
+
+
+def test_default_max_live_covers_the_largest_run(monkeypatch):
+    monkeypatch.setenv("DRIVER_POOL_SIZE", "2")
+    monkeypatch.setenv("SELENIUM_MAX_WORKERS", "6")
+    monkeypatch.delenv("DRIVER_POOL_MAX", raising=False)
+
+    assert create_pool_from_env().max_live == 6
@@ -0,0 +1,18 @@
+import xml.etree.ElementTree as ET
+
+from exporters import iter_junit
+from metrics import PhaseTimer, record_test
+
+
+def test_junit_classname_from_runner_and_errors_counted():
+    results = [record_test("api", {"id": 1, "name": "Health", "status": "passed"}, PhaseTimer()),
+               {"id": 2, "name": "Login", "status": "failed", "message": "Timeout", "runner": "ui"},
+               {"id": 3, "name": "Export", "status": "unsupported", "message": "No runner"},
+               {"id": 4, "name": "Search", "status": "skipped", "runner": "ui"}]
+
+    suite = ET.fromstring("".join(iter_junit(results))).find("testsuite")
+
+    assert (suite.get("failures"), suite.get("errors"), suite.get("skipped")) == ("1", "1", "1")
+    cases = suite.findall("testcase")
+    assert [c.get("classname") for c in cases] == ["bugzy.api", "bugzy.ui", "bugzy.test", "bugzy.ui"]
+    assert [child.tag for c in cases for child in c] == ["failure", "error", "skipped"]
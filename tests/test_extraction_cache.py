@@ -0,0 +1,100 @@
+import io
+from types import SimpleNamespace
+
+import pytest
+
+import document_parser
+from extraction_cache import ExtractionCache, hash_upload
+
+
+class Upload(io.BytesIO):
+    """An uploaded file as Flask hands it over: a stream with a filename."""
+
+    def __init__(self, data, filename="spec.pdf"):
+        super().__init__(data)
+        self.filename = filename
+
+
+@pytest.fixture
+def parser(monkeypatch):
+    """parse_file_for_tests with a fresh cache and counting stand-ins for extraction and the LLM."""
+    calls = {"extract": 0, "parse": 0}
+    cache = ExtractionCache()
+
+    def extract_and_parse(file, use_cache=True, report=None):
+        calls["extract"] += 1
+        if calls.get("fail"):
+            raise RuntimeError("pdfplumber could not open the file")
+        return f"text of {hash_upload(file)[:8]}", [{"id": 1, "name": "Login"}]
+
+    def parse_document_for_tests(file_content, use_cache=True, report=None):
+        calls["parse"] += 1
+        return [{"id": 1, "name": "Login (re-parsed)"}]
+
+    monkeypatch.setattr(document_parser, "get_extraction_cache", lambda: cache)
+    monkeypatch.setattr(document_parser, "get_llm", lambda: SimpleNamespace(model="m"))
+    monkeypatch.setattr(document_parser, "_extract_and_parse", extract_and_parse)
+    monkeypatch.setattr(document_parser, "parse_document_for_tests", parse_document_for_tests)
+    return SimpleNamespace(calls=calls, cache=cache, parse=document_parser.parse_file_for_tests)
+
+
+def test_identical_uploads_hit_by_content_hash(parser):
+    first, second = {}, {}
+    assert parser.parse(Upload(b"%PDF same bytes"), report=first)[1] == [{"id": 1, "name": "Login"}]
+    text, tests = parser.parse(Upload(b"%PDF same bytes", filename="renamed.pdf"), report=second)
+
+    assert first == {"extraction_cache": "miss"}
+    assert second == {"extraction_cache": "hit", "tests_cache": "hit"}
+    assert tests == [{"id": 1, "name": "Login"}]
+    assert parser.calls == {"extract": 1, "parse": 0}
+
+    parser.parse(Upload(b"%PDF other bytes"))
+    assert parser.calls["extract"] == 2
+
+
+def test_bypass_cache_reuses_the_text_but_parses_again(parser):
+    parser.parse(Upload(b"%PDF same bytes"))
+    report = {}
+    _, tests = parser.parse(Upload(b"%PDF same bytes"), use_cache=False, report=report)
+
+    assert report == {"extraction_cache": "hit"}
+    assert tests == [{"id": 1, "name": "Login (re-parsed)"}]
+    assert parser.calls == {"extract": 1, "parse": 1}
+
+
+def test_failed_extraction_caches_nothing(parser):
+    parser.calls["fail"] = True
+    with pytest.raises(RuntimeError):
+        parser.parse(Upload(b"%PDF broken"))
+
+    assert parser.cache.stats()["entries"] == 0
+    parser.calls["fail"] = False
+    report = {}
+    parser.parse(Upload(b"%PDF broken"), report=report)
+    assert report["extraction_cache"] == "miss"
+
+
+def test_cached_tests_are_per_model_and_copied():
+    cache = ExtractionCache()
+    tests = [{"id": 1, "name": "Login"}]
+    cache.put("pdf:abc", "text", tests, model="m")
+    tests[0]["name"] = "mutated"
+
+    assert cache.get_tests("pdf:abc", "other-model") is None
+    cached = cache.get_tests("pdf:abc", "m")
+    assert cached == [{"id": 1, "name": "Login"}]
+    cached[0]["name"] = "mutated"
+    assert cache.get_tests("pdf:abc", "m")[0]["name"] == "Login"
+
+
+def test_cache_is_bounded_by_entries_and_bytes():
+    cache = ExtractionCache(max_entries=2, max_bytes=10)
+    cache.put("a", "aaaa")
+    cache.put("b", "bbbb")
+    cache.get_text("a")
+    cache.put("c", "cccc")
+    assert (cache.get_text("a"), cache.get_text("b"), cache.get_text("c")) == ("aaaa", None, "cccc")
+
+    cache.put("big", "x" * 11)
+    assert cache.get_text("big") is None
+    assert cache.stats()["bytes"] <= 10
@@ -0,0 +1,82 @@
+import time
+import threading
+
+import pytest
+
+from job_manager import JobManager, JobQueueFull
+
+
+def _wait(job, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not job.finished and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return job
+
+
+def test_results_page_by_offset_in_completion_order():
+    def runner(website_url, tests, on_result=None, cancel=None):
+        results = [{"id": t["id"], "status": "passed"} for t in reversed(tests)]
+        for r in results:
+            on_result(r)
+        return sorted(results, key=lambda r: r["id"])
+
+    job = _wait(JobManager(runner).submit("https://example.test", [{"id": i} for i in range(1, 5)]))
+
+    first = job.to_dict(since=0)
+    assert first["status"] == "completed"
+    assert [r["id"] for r in first["results"]] == [4, 3, 2, 1]
+    assert [r["id"] for r in job.to_dict(since=2)["results"]] == [2, 1]
+
+
+def test_cancel_queued_job_never_starts_and_full_queue_rejects():
+    release = threading.Event()
+    started = []
+
+    def runner(website_url, tests, on_result=None, cancel=None):
+        started.append(tests[0]["id"])
+        release.wait(5)
+        return []
+
+    manager = JobManager(runner, workers=1, queue_size=1)
+    running = manager.submit("https://example.test", [{"id": 1}])
+    while not started:
+        time.sleep(0.01)
+    queued = manager.submit("https://example.test", [{"id": 2}])
+    with pytest.raises(JobQueueFull):
+        manager.submit("https://example.test", [{"id": 3}])
+
+    assert manager.cancel(queued.id).status == "cancelled"
+    release.set()
+    _wait(running)
+    time.sleep(0.05)
+    assert started == [1]
+
+
+def test_cancelled_job_frees_its_queue_slot():
+    release = threading.Event()
+    started = []
+
+    def runner(website_url, tests, on_result=None, cancel=None):
+        started.append(tests[0]["id"])
+        release.wait(5)
+        return []
+
+    manager = JobManager(runner, workers=1, queue_size=2)
+    running = manager.submit("https://example.test", [{"id": 1}])
+    while not started:
+        time.sleep(0.01)
+    first = manager.submit("https://example.test", [{"id": 2}])
+    manager.submit("https://example.test", [{"id": 3}])
+    with pytest.raises(JobQueueFull):
+        manager.submit("https://example.test", [{"id": 4}])
+
+    manager.cancel(first.id)
+    assert manager.stats()["pending"] == 1
+    last = manager.submit("https://example.test", [{"id": 5}])
+    assert manager.stats()["pending"] == 2
+
+    release.set()
+    _wait(running)
+    _wait(last)
+    assert started == [1, 3, 5]
+    assert manager.stats()["pending"] == 0
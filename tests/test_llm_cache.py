@@ -0,0 +1,33 @@
+from llm_cache import LLMCache
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = LLMCache(max_entries=2)
+    cache.put("m", "a", "A")
+    cache.put("m", "b", "B")
+    assert cache.get("m", "a") == "A"
+    cache.put("m", "c", "C")
+
+    assert cache.get("m", "b") is None
+    assert (cache.get("m", "a"), cache.get("m", "c")) == ("A", "C")
+    assert cache.get("other-model", "a") is None
+
+
+def test_disk_tier_survives_a_restart(tmp_path):
+    path = str(tmp_path / "llm.db")
+    LLMCache(db_path=path).put("m", "prompt", "answer")
+
+    cache = LLMCache(db_path=path)
+    assert cache.get("m", "prompt") == "answer"
+    assert cache.stats()["disk_hits"] == 1
+
+    cache.invalidate("m", "prompt")
+    assert LLMCache(db_path=path).get("m", "prompt") is None
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = LLMCache(ttl=-1, db_path=str(tmp_path / "llm.db"))
+    cache.put("m", "prompt", "answer")
+
+    assert cache.get("m", "prompt") is None
+    assert cache.stats()["misses"] == 1
@@ -0,0 +1,153 @@
+import json
+import time
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+
+import llm_client
+from llm_client import LLMClient, LLMError, TokenBucket
+
+
+def _completion(text):
+    return json.dumps({"choices": [{"message": {"content": text}}]}).encode("utf-8")
+
+
+class StandIn:
+    """Local /chat/completions server; `reply(n)` gives (status, headers, body) for the n-th request."""
+
+    def __init__(self, reply, delay=0.0):
+        self.reply = reply
+        self.delay = delay
+        self.requests = 0
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with stand_in._lock:
+                    stand_in.requests += 1
+                    n = stand_in.requests
+                    stand_in.active += 1
+                    stand_in.max_active = max(stand_in.max_active, stand_in.active)
+                try:
+                    time.sleep(stand_in.delay)
+                    status, headers, body = stand_in.reply(n)
+                    self.send_response(status)
+                    for key, value in headers.items():
+                        self.send_header(key, value)
+                    self.send_header("Content-Length", headers.get("X-Length", str(len(body))))
+                    self.end_headers()
+                    self.wfile.write(body)
+                finally:
+                    with stand_in._lock:
+                        stand_in.active -= 1
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stand_in():
+    servers = []
+
+    def start(reply, delay=0.0):
+        servers.append(StandIn(reply, delay))
+        return servers[-1]
+
+    yield start
+    for server in servers:
+        server.close()
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record backoff sleeps instead of waiting, along with the jitter ranges drawn."""
+    recorded = {"sleeps": [], "ranges": []}
+
+    def uniform(low, high):
+        recorded["ranges"].append((low, high))
+        return random.uniform(low, high)
+
+    monkeypatch.setattr(llm_client, "time", SimpleNamespace(
+        monotonic=time.monotonic, sleep=lambda seconds: recorded["sleeps"].append(seconds)))
+    monkeypatch.setattr(llm_client, "random", SimpleNamespace(uniform=uniform))
+    return recorded
+
+
+def _client(url, **kwargs):
+    options = {"rate_per_sec": 0, "backoff_base": 0.5, "backoff_max": 20.0}
+    options.update(kwargs)
+    return LLMClient("key", "model", base_url=url, **options)
+
+
+def test_retries_are_bounded_and_jittered(stand_in, sleeps):
+    server = stand_in(lambda n: (503, {}, b"busy"))
+
+    with pytest.raises(LLMError) as error:
+        _client(server.url, max_retries=3).complete("hi")
+
+    assert error.value.status_code == 503
+    assert server.requests == 4
+    assert sleeps["ranges"] == [(0, 1.0), (0, 2.0), (0, 4.0)]
+    assert all(0 <= s <= high for s, (_, high) in zip(sleeps["sleeps"], sleeps["ranges"]))
+
+
+def test_retry_after_is_honoured_then_success(stand_in, sleeps):
+    server = stand_in(lambda n: (429, {"Retry-After": "7"}, b"slow down") if n == 1 else (200, {}, _completion("ok")))
+
+    assert _client(server.url, backoff_base=0.01).complete("hi") == "ok"
+    assert server.requests == 2
+    assert sleeps["sleeps"] == [7.0]
+
+
+def test_in_flight_requests_are_capped(stand_in):
+    server = stand_in(lambda n: (200, {}, _completion("ok")), delay=0.05)
+    client = _client(server.url, max_in_flight=2)
+
+    threads = [threading.Thread(target=client.complete, args=("hi",)) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert server.requests == 6
+    assert server.max_active == 2
+
+
+def test_token_bucket_spaces_out_requests():
+    bucket = TokenBucket(rate=20, capacity=1)
+    start = time.monotonic()
+    for _ in range(5):
+        assert bucket.acquire()
+
+    assert time.monotonic() - start >= 0.18
+    empty = TokenBucket(rate=1, capacity=1)
+    empty.acquire()
+    assert empty.acquire(timeout=0.05) is False
+
+
+def test_mid_stream_disconnect_raises_llm_error(stand_in):
+    frames = b'data: {"choices": [{"delta": {"content": "Hel"}}]}\n\n' * 40
+    server = stand_in(lambda n: (200, {"Content-Type": "text/event-stream", "X-Length": "65536"}, frames))
+
+    received = []
+    with pytest.raises(LLMError, match="Stream interrupted"):
+        for delta in _client(server.url).stream("hi"):
+            received.append(delta)
+
+    assert received and set(received) == {"Hel"}
+    assert server.requests == 1
@@ -0,0 +1,79 @@
+import time
+
+from metrics import PhaseTimer, REGISTRY, Registry, phase, record_skipped, record_test, timing
+
+
+def _lines(text, prefix):
+    return [line for line in text.splitlines() if line.startswith(prefix)]
+
+
+def test_histogram_buckets_are_cumulative_with_sum_and_count():
+    registry = Registry()
+    seconds = registry.histogram("demo_seconds", "Demo.", ["runner"], buckets=(0.1, 1, 10))
+    for value in (0.05, 0.5, 0.5, 20):
+        seconds.observe(value, runner="ui")
+
+    text = registry.render()
+    assert "# TYPE demo_seconds histogram" in text
+    assert _lines(text, "demo_seconds_bucket") == [
+        'demo_seconds_bucket{runner="ui",le="0.1"} 1',
+        'demo_seconds_bucket{runner="ui",le="1"} 3',
+        'demo_seconds_bucket{runner="ui",le="10"} 3',
+        'demo_seconds_bucket{runner="ui",le="+Inf"} 4',
+    ]
+    assert _lines(text, "demo_seconds_sum") == ['demo_seconds_sum{runner="ui"} 21.050000']
+    assert _lines(text, "demo_seconds_count") == ['demo_seconds_count{runner="ui"} 4']
+
+
+def test_collector_errors_are_reported_inline():
+    registry = Registry()
+    registry.add_collector(lambda: 1 / 0)
+    assert registry.render().startswith("# collector error: division by zero")
+
+
+def test_phase_timer_attributes_time_to_the_innermost_phase():
+    timer = PhaseTimer()
+    with timing(timer):
+        with phase("navigate"):
+            time.sleep(0.02)
+            with phase("settle"):
+                time.sleep(0.03)
+    with phase("ignored"):  # no timer on this thread any more
+        pass
+
+    phases = timer.as_dict()
+    assert set(phases) == {"navigate", "settle"}
+    assert 0.015 <= phases["navigate"] < 0.045
+    assert phases["settle"] >= 0.025
+    assert sum(phases.values()) <= timer.elapsed()
+
+
+def test_record_test_and_record_skipped_feed_the_registry():
+    timer = PhaseTimer()
+    with timer.phase("request"):
+        time.sleep(0.01)
+    result = record_test("metrics-test", {"id": 1, "status": "passed"}, timer)
+    record_test("metrics-test", {"id": 2, "status": "failed"}, PhaseTimer())
+    record_skipped("metrics-test", {"id": 3, "status": "skipped"})
+
+    assert result["runner"] == "metrics-test" and result["timings"]["request"] >= 0.01
+    text = REGISTRY.render()
+    assert _lines(text, 'bugzy_tests_total{runner="metrics-test"') == [
+        'bugzy_tests_total{runner="metrics-test",status="failed"} 1',
+        'bugzy_tests_total{runner="metrics-test",status="passed"} 1',
+        'bugzy_tests_total{runner="metrics-test",status="skipped"} 1',
+    ]
+    # skipped tests do not reach the duration histogram
+    assert _lines(text, 'bugzy_test_duration_seconds_count{runner="metrics-test"}') == [
+        'bugzy_test_duration_seconds_count{runner="metrics-test"} 2']
+    assert _lines(text, 'bugzy_test_phase_seconds_count{runner="metrics-test",phase="request"}') == [
+        'bugzy_test_phase_seconds_count{runner="metrics-test",phase="request"} 1']
+    assert 'bugzy_test_duration_seconds_bucket{runner="metrics-test",le="+Inf"} 2' in text
+
+
+def test_metrics_endpoint_serves_the_registry():
+    import app as app_module
+
+    response = app_module.app.test_client().get("/metrics")
+    assert response.status_code == 200
+    assert "# TYPE bugzy_tests_total counter" in response.get_data(as_text=True)
@@ -0,0 +1,241 @@
+import time
+
+import pytest
+from selenium.common.exceptions import JavascriptException, TimeoutException
+from selenium.webdriver.common.by import By
+
+import page_probe
+import test_executor
+from page_probe import PageIndex, find_text, resolve_first, wait_for_settle
+from test_executor import _assert_page
+
+
+class FakeDriver:
+    """Answers page_probe's scripts from a Python model of the page instead of a browser."""
+
+    def __init__(self):
+        self.present = {}        # (kind, value) -> element
+        self.settled_ms = None   # None: no settle tracking installed
+        self.calls = []
+        self.document = 0        # bumped by navigate(); the index observer lives per document
+        self.dom_version = 0
+        self.fields = []         # (field metadata, element) pairs for the index snapshot
+        self.settle_states = []  # what each settle call reports; an Exception is raised instead
+        self.settle_args = []
+        self.url = "https://example.test/login"
+        self.html = "<html><body><h1>Welcome back</h1><a href='/reset'>Forgot?</a></body></html>"
+
+    def execute_script(self, script, *args):
+        self.calls.append(script)
+        if script is page_probe._RESOLVE_JS:
+            for i, (kind, value) in enumerate(args[0]):
+                if (kind, value) in self.present:
+                    return [i, self.present[(kind, value)]]
+            return None if self.settled_ms is None else [-1, self.settled_ms]
+        if script is page_probe._INDEX_JS:
+            token = f"doc{self.document}:{self.dom_version}"
+            if token == args[0]:
+                return None
+            return {"token": token, "url": f"https://example.test/{self.document}",
+                    "fields": [meta for meta, _ in self.fields], "elements": [el for _, el in self.fields]}
+        if script is page_probe._FIND_TEXT_JS:
+            found = []
+            for needle, scope in args[0]:
+                needle = needle.lower()
+                hay = self.url.lower() if scope != "html" and needle in self.url.lower() else (
+                    self.html.lower() if scope != "url" else "")
+                at = hay.find(needle)
+                found.append(None if at < 0 else hay[max(0, at - 40):at + len(needle) + 40])
+            return found
+        raise AssertionError("unexpected script")
+
+    def execute_async_script(self, script, *args):
+        assert script is page_probe._SETTLE_JS
+        self.settle_args.append(args)
+        state = self.settle_states.pop(0)
+        if isinstance(state, Exception):
+            raise state
+        return state
+
+    def navigate(self):
+        self.document += 1
+        self.dom_version = 0
+
+    def find_elements(self, by, value):
+        self.calls.append((by, value))
+        element = self.present.get((by, value))
+        return [element] if element else []
+
+
+def test_resolve_first_returns_the_highest_priority_candidate_in_one_call():
+    driver = FakeDriver()
+    driver.present = {("css", "#submit"): "submit-el", ("xpath", "//button"): "button-el"}
+
+    hit = resolve_first(driver, [(By.ID, "missing"), (By.XPATH, "//button"), (By.CSS_SELECTOR, "#submit")])
+
+    assert hit == (1, "button-el")
+    assert driver.calls == [page_probe._RESOLVE_JS]
+
+
+def test_resolve_first_respects_the_timeout():
+    driver = FakeDriver()
+    start = time.monotonic()
+
+    with pytest.raises(TimeoutException, match="within 0.3s"):
+        resolve_first(driver, [(By.CSS_SELECTOR, "#never")], timeout=0.3, poll=0.05, give_up=0)
+
+    elapsed = time.monotonic() - start
+    assert 0.3 <= elapsed < 0.6
+    assert 4 <= len(driver.calls) <= 8
+
+
+def test_resolve_first_gives_up_early_on_a_settled_page_only_when_enabled():
+    driver = FakeDriver()
+    driver.settled_ms = 2500
+
+    with pytest.raises(TimeoutException, match="settled for 2.5s"):
+        resolve_first(driver, [(By.CSS_SELECTOR, "#never")], timeout=5, give_up=2)
+    assert len(driver.calls) == 1
+
+
+def test_unsupported_strategies_fall_back_to_find_elements():
+    driver = FakeDriver()
+    driver.present = {(By.LINK_TEXT, "Sign in"): "link-el"}
+
+    assert resolve_first(driver, [(By.CSS_SELECTOR, "#x"), (By.LINK_TEXT, "Sign in")], timeout=0) == (1, "link-el")
+    assert page_probe._RESOLVE_JS not in driver.calls
+
+
+def _field(tag="input", type="text", id="", name="", placeholder="", label="", visible=True):
+    return {"tag": tag, "type": type, "id": id, "name": name, "placeholder": placeholder, "label": label,
+            "text": "", "visible": visible, "checked": False}
+
+
+def test_page_index_reuses_the_snapshot_until_the_page_changes():
+    driver = FakeDriver()
+    driver.fields = [(_field(name="email", label="Email address"), "email-el")]
+    index = PageIndex(driver)
+
+    assert index.refresh() is True
+    assert index.refresh() is False
+    assert index.find(["email"])["element"] == "email-el"
+    assert index.builds == 1
+
+    driver.dom_version += 1  # the observer saw a mutation
+    driver.fields.append((_field(type="password", id="pw", placeholder="Password"), "pw-el"))
+    assert index.find(["password"])["element"] == "pw-el"
+    assert index.builds == 2
+
+    driver.navigate()
+    driver.fields = [(_field(name="q", placeholder="Search"), "search-el")]
+    assert index.refresh() is True
+    assert index.url == "https://example.test/1"
+    assert index.find(["email"]) is None
+    assert index.builds == 3
+
+
+def test_page_index_prefers_label_matches_and_visible_fields():
+    driver = FakeDriver()
+    driver.fields = [(_field(name="user", visible=False), "hidden-user"),
+                     (_field(id="user-box"), "user-box"),
+                     (_field(name="login", label="User"), "labelled"),
+                     (_field(tag="button", type="submit", label="User"), "button")]
+    index = PageIndex(driver)
+    index.refresh()
+
+    assert index.best_match(["user"])["element"] == "labelled"
+    assert index.best_match(["user-box", "nothing"])["element"] == "user-box"
+    assert index.find_many({"user": ["user"], "phone": ["phone"]}) == {"user": index.fields[2]}
+
+
+def test_wait_for_settle_passes_quiet_window_budget_and_ready_state():
+    driver = FakeDriver()
+    driver.settle_states = [{"settled": True}]
+
+    assert wait_for_settle(driver, quiet=0.25, timeout=2, ready_state="interactive") is True
+    quiet_ms, budget_ms, ready = driver.settle_args[0]
+    assert (quiet_ms, ready) == (250, "interactive")
+    assert 1900 <= budget_ms <= 2000
+
+
+def test_wait_for_settle_retries_in_the_new_document_within_the_budget():
+    driver = FakeDriver()
+    driver.settle_states = [JavascriptException("document unloaded"), {"settled": False}, {"settled": True}]
+
+    assert wait_for_settle(driver, quiet=0.1, timeout=5, poll=0.01) is True
+    budgets = [budget for _, budget, _ in driver.settle_args]
+    assert len(budgets) == 3 and budgets == sorted(budgets, reverse=True)
+
+
+def test_wait_for_settle_reports_a_page_that_never_goes_quiet():
+    driver = FakeDriver()
+
+    def busy(script, quiet, budget, ready):
+        time.sleep(budget / 1000)
+        return {"settled": False, "pending": 1}
+
+    driver.execute_async_script = busy
+    start = time.monotonic()
+    assert wait_for_settle(driver, quiet=0.1, timeout=0.2) is False
+    assert time.monotonic() - start < 0.4
+
+
+def test_settle_settings_come_from_the_environment(monkeypatch):
+    monkeypatch.setenv("SELENIUM_SETTLE_QUIET_MS", "150")
+    monkeypatch.setenv("SELENIUM_SETTLE_TIMEOUT", "3")
+    monkeypatch.delenv("SELENIUM_SETTLE_GIVE_UP", raising=False)
+    monkeypatch.delenv("SELENIUM_SETTLE_ACTION_TIMEOUT", raising=False)
+
+    assert page_probe.settle_settings() == {"quiet": 0.15, "timeout": 3.0, "action_timeout": 1.0, "give_up": 0.0}
+
+    # An action budget above the navigation one is capped to it
+    monkeypatch.setenv("SELENIUM_SETTLE_ACTION_TIMEOUT", "10")
+    assert page_probe.settle_settings()["action_timeout"] == 3.0
+
+
+def test_session_settle_policy_is_read_once_and_caps_post_action_waits(monkeypatch):
+    monkeypatch.setenv("SELENIUM_SETTLE_TIMEOUT", "5")
+    monkeypatch.setenv("SELENIUM_SETTLE_ACTION_TIMEOUT", "1")
+    monkeypatch.setenv("SELENIUM_PAGELOAD_STRATEGY", "eager")
+    policy = test_executor._settle_policy()
+
+    def reread():
+        raise AssertionError("profile re-read during the session")
+
+    monkeypatch.setattr(test_executor, "_load_profile", reread)
+    driver = FakeDriver()
+    driver.settle_states = [{"settled": True}, {"settled": True}]
+    with test_executor._settling_with(policy):
+        test_executor._settle(driver)
+        test_executor._settle(driver, action=True)
+
+    (_, navigate_ms, ready), (_, action_ms, _) = driver.settle_args
+    assert ready == "interactive"
+    assert 4000 < navigate_ms <= 5000
+    assert 900 < action_ms <= 1000
+
+
+def test_find_text_sends_every_check_in_one_call():
+    driver = FakeDriver()
+
+    found = find_text(driver, [("LOGIN", "url"), ("login", "html"), ("welcome", "page"), ("reset", "url")])
+
+    assert driver.calls == [page_probe._FIND_TEXT_JS]
+    assert found[0] == "https://example.test/login"
+    assert found[1] is None and found[3] is None
+    assert "welcome back" in found[2]
+    assert find_text(driver, []) == []
+
+
+def test_assertions_map_to_url_and_html_scopes():
+    driver = FakeDriver()
+
+    matched = _assert_page(driver, {"url_contains": "/login", "text_contains": ["Welcome"],
+                                    "not_text_contains": "Error"}, {"reset": (["reset"], "page")})
+    assert "/reset" in matched["reset"]
+    assert len(driver.calls) == 1
+
+    with pytest.raises(AssertionError, match="URL did not contain expected fragment: welcome"):
+        _assert_page(driver, {"url_contains": "welcome"})
+    with pytest.raises(AssertionError, match="Page contained unexpected text: Forgot"):
+        _assert_page(driver, {"not_text_contains": ["Forgot"]})
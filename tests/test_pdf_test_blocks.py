@@ -0,0 +1,67 @@
+import io
+
+from document_parser import read_file_content
+from test_case_text import parse_test_blocks
+
+
+class Upload(io.BytesIO):
+    """Stands in for the werkzeug FileStorage the upload endpoints receive."""
+
+    def __init__(self, data: bytes, filename: str):
+        super().__init__(data)
+        self.filename = filename
+
+
+def _pdf(pages):
+    """Minimal PDF with one line of Helvetica text per entry of each page."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for lines in pages:
+        ops = ["BT /F1 10 Tf 14 TL 50 780 Td"]
+        for line in lines:
+            ops.append("(%s) Tj T*" % line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)"))
+        ops.append("ET")
+        stream = "\n".join(ops).encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects))
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % k for k in kids), len(kids))
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+def test_every_page_of_a_multi_page_pdf_is_parsed():
+    pages = []
+    for page in range(40):
+        lines = []
+        for test_id in (2 * page + 1, 2 * page + 2):
+            lines += [f"ID: {test_id} - Check {test_id}", f"Description: Step {test_id}", "Type: UI",
+                      f"Selector: #item-{test_id}"]
+        pages.append(lines)
+
+    text = read_file_content(Upload(_pdf(pages), "cases.pdf"))
+    assert text.count("\f") == 39
+
+    tests = parse_test_blocks(text)
+    assert [t["id"] for t in tests] == list(range(1, 81))
+    assert all("\f" not in value for t in tests for value in t.values() if isinstance(value, str))
+    assert tests[2] == {"id": 3, "name": "Check 3", "description": "Step 3", "type": "UI", "selector": "#item-3"}
+
+
+def test_form_feed_before_a_field_line():
+    tests = parse_test_blocks("ID: 1 - First\nDescription: spans\n\fa page\n\fType: API\n\fSelector: /x")
+    assert tests == [{"id": 1, "name": "First", "description": "spans\n\fa page", "type": "API", "selector": "/x"}]
@@ -0,0 +1,50 @@
+from run_history import RunHistory, run_with_history
+
+SITE = "https://example.test/app"
+
+
+class Runner:
+    """Stands in for run_tests: passes every test except the ids in `failing`."""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.calls = []
+
+    def __call__(self, website_url, tests, report=None, on_result=None):
+        self.calls.append([t["id"] for t in tests])
+        return [{"id": t["id"], "name": t["name"], "status": "failed" if t["id"] in self.failing else "passed"}
+                for t in tests]
+
+
+def _suite():
+    return [{"id": 1, "name": "Home", "selector": "#home"},
+            {"id": 2, "name": "Search", "selector": "#search"},
+            {"id": 3, "name": "Results", "selector": "#results", "depends_on": 2},
+            {"id": 4, "name": "Footer", "selector": "footer"}]
+
+
+def test_rerun_reuses_passing_results_and_runs_failures_with_dependents(tmp_path):
+    history = RunHistory(str(tmp_path / "history.db"))
+    run_with_history(Runner(failing={2}), SITE, _suite(), history)
+
+    runner = Runner()
+    report = {}
+    results = run_with_history(runner, SITE, _suite(), history, rerun=True, report=report)
+
+    assert runner.calls == [[2, 3]]
+    assert [r["id"] for r in results] == [1, 2, 3, 4]
+    assert [bool(r.get("reused")) for r in results] == [True, False, False, True]
+    assert all(r["status"] == "passed" for r in results)
+    assert report["history"]["reused"] == 2
+
+
+def test_editing_a_test_makes_it_run_again(tmp_path):
+    history = RunHistory(str(tmp_path / "history.db"))
+    run_with_history(Runner(), SITE, _suite(), history)
+
+    suite = _suite()
+    suite[3]["selector"] = "footer.site"
+    runner = Runner()
+    run_with_history(runner, SITE, suite, history, rerun=True)
+
+    assert runner.calls == [[4]]
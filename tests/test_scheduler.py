@@ -0,0 +1,161 @@
+import time
+import threading
+
+from scheduler import Lane, Scheduler, WorkerUnavailable, skipped_result
+
+
+def _unsupported(test):
+    return skipped_result(test, "unsupported")
+
+
+class Worker:
+    """Stands in for a browser session: records what it ran, optionally fails to open."""
+
+    def __init__(self, log, fails=False, delay=0.0):
+        self.log = log
+        self.fails = fails
+        self.delay = delay
+
+    def run(self, test):
+        if self.fails:
+            raise WorkerUnavailable("No browser available within 1.0s")
+        time.sleep(self.delay)
+        self.log.append((id(self), test["id"]))
+        return {"id": test["id"], "name": test.get("name", ""), "status": test.get("outcome", "passed")}
+
+
+def _schedule(tests, workers=1, opener=None, **kwargs):
+    log = []
+    opener = opener or (lambda: Worker(log))
+    scheduler = Scheduler(tests, {"ui": Lane("ui", workers, opener)}, lambda t: "ui", _unsupported, **kwargs)
+    return scheduler, scheduler.run(), log
+
+
+def test_workers_without_a_browser_leave_their_tests_to_the_live_one():
+    log = []
+    opened = []
+    lock = threading.Lock()
+
+    def opener():
+        with lock:
+            opened.append(1)
+            return Worker(log, fails=len(opened) > 1, delay=0.005)
+
+    tests = [{"id": i} for i in range(1, 13)]
+    scheduler, results, _ = _schedule(tests, workers=3, opener=opener)
+
+    assert [r["status"] for r in results] == ["passed"] * 12
+    assert sorted(test_id for _, test_id in log) == list(range(1, 13))
+    assert sorted(s["tests"] for s in scheduler.report()["lanes"]["ui"]) == [0, 0, 12]
+
+
+def test_lane_fails_every_test_when_no_worker_can_open():
+    tests = [{"id": i} for i in range(1, 7)]
+    _, results, _ = _schedule(tests, workers=3, opener=lambda: Worker([], fails=True))
+
+    assert [r["status"] for r in results] == ["failed"] * 6
+    assert all(r["message"] == "No browser available within 1.0s" for r in results)
+
+
+def test_priority_first_then_the_page_the_worker_is_on():
+    tests = [{"id": 1, "page": "/a"}, {"id": 2, "page": "/b"}, {"id": 3, "page": "/a"},
+             {"id": 4, "page": "/b", "priority": 1}, {"id": 5}, {"id": 6, "page": "/b"}]
+    _, _, log = _schedule(tests)
+
+    assert [test_id for _, test_id in log] == [4, 2, 5, 6, 1, 3]
+
+
+def test_failed_dependency_skips_its_dependents_transitively():
+    tests = [{"id": 1, "outcome": "failed"}, {"id": 2, "depends_on": 1}, {"id": 3, "depends_on": [2]},
+             {"id": 4, "depends_on": 99}, {"id": 5, "depends_on": 4}]
+    scheduler, results, log = _schedule(tests, workers=2)
+
+    assert [r["status"] for r in results] == ["failed", "skipped", "skipped", "passed", "passed"]
+    assert results[2]["message"] == "Skipped: depends on test 2 (skipped)"
+    assert sorted(test_id for _, test_id in log) == [1, 4, 5]
+    assert scheduler.report()["unknown_dependencies"] == ["99"]
+
+
+def test_dependency_cycle_is_skipped():
+    tests = [{"id": 1, "depends_on": 2}, {"id": 2, "depends_on": 1}, {"id": 3}]
+    scheduler, results, _ = _schedule(tests)
+
+    assert [r["status"] for r in results] == ["skipped", "skipped", "passed"]
+    assert scheduler.report()["cycles"] == 2
+
+
+def test_group_runs_in_order_on_one_worker():
+    tests = [{"id": i, "group": "checkout" if i % 2 else None} for i in range(1, 21)]
+    log = []
+    _, results, _ = _schedule(tests, workers=4, opener=lambda: Worker(log, delay=0.002))
+
+    grouped = [(worker, test_id) for worker, test_id in log if test_id % 2]
+    assert [test_id for _, test_id in grouped] == list(range(1, 21, 2))
+    assert len({worker for worker, _ in grouped}) == 1
+    assert all(r["status"] == "passed" for r in results)
+
+
+def test_fail_fast_skips_everything_not_started():
+    tests = [{"id": 1}, {"id": 2, "outcome": "failed"}, {"id": 3}, {"id": 4}]
+    scheduler, results, log = _schedule(tests, fail_fast=True)
+
+    assert [r["status"] for r in results] == ["passed", "failed", "skipped", "skipped"]
+    assert results[3]["message"] == "Skipped: fail-fast after test 2 failed"
+    assert [test_id for _, test_id in log] == [1, 2]
+    assert scheduler.report()["stopped"].startswith("Skipped: fail-fast")
+
+
+def test_cancel_stops_before_the_next_test():
+    cancel = threading.Event()
+    log = []
+
+    class Cancelling(Worker):
+        def run(self, test):
+            result = super().run(test)
+            if test["id"] == 2:
+                cancel.set()
+            return result
+
+    tests = [{"id": i} for i in range(1, 6)]
+    scheduler, results, _ = _schedule(tests, opener=lambda: Cancelling(log), cancel=cancel)
+
+    assert [r and r["status"] for r in results] == ["passed", "passed", None, None, None]
+    assert scheduler.report()["stopped"] == "cancelled"
+
+
+def test_group_claimed_by_a_worker_without_a_browser_moves_to_a_live_one():
+    log = []
+    opened = []
+    lock = threading.Lock()
+
+    def opener():
+        with lock:
+            opened.append(1)
+            return Worker(log, fails=len(opened) != 2, delay=0.002)
+
+    tests = [{"id": i, "group": f"g{i % 3}"} for i in range(1, 16)]
+    _, results, _ = _schedule(tests, workers=3, opener=opener)
+
+    assert all(r["status"] == "passed" for r in results)
+    for group in range(3):
+        assert [t for _, t in log if t % 3 == group] == [i for i in range(1, 16) if i % 3 == group]
+
+
+def test_result_callbacks_run_without_holding_up_other_workers():
+    third_ran = threading.Event()
+    waited = []
+
+    class Signalling(Worker):
+        def run(self, test):
+            if test["id"] == 3:
+                third_ran.set()
+            return super().run(test)
+
+    def on_result(result):
+        if result["id"] == 1:
+            waited.append(third_ran.wait(2))
+
+    tests = [{"id": 1}, {"id": 2}, {"id": 3}]
+    _schedule(tests, workers=2, opener=lambda: Signalling([], delay=0.01), on_result=on_result)
+
+    assert waited == [True]
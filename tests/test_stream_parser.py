@@ -0,0 +1,52 @@
+import json
+import random
+
+from test_case_generation import JSONArrayStreamParser, iter_test_cases
+
+TESTS = [
+    {"id": "TC-1", "name": "Login {ok}", "description": "Type \"admin\" then press [Enter]", "type": "ui"},
+    {"id": "TC-2", "name": "Health", "description": "GET /health returns {\"ok\": true}", "type": "API",
+     "headers": {"Accept": "application/json"}, "steps": [["open", "/"], ["click", "#a\\\\b"]]},
+    {"id": 7, "name": "Back\\slash", "description": "Ends with a backslash \\", "type": "smoke"},
+]
+
+
+def _split(text, seed):
+    """Cut `text` into random chunks (1 to 7 characters)."""
+    rng = random.Random(seed)
+    chunks, i = [], 0
+    while i < len(text):
+        size = rng.randint(1, 7)
+        chunks.append(text[i:i + size])
+        i += size
+    return chunks
+
+
+def _feed(text, seed):
+    parser = JSONArrayStreamParser()
+    return [item for chunk in _split(text, seed) for item in parser.feed(chunk)]
+
+
+def test_objects_survive_any_chunking():
+    text = "Here are the tests:\n```json\n" + json.dumps(TESTS, indent=2) + "\n```\nLet me know [if] {more}."
+    for seed in range(50):
+        assert _feed(text, seed) == TESTS
+
+
+def test_wrapper_object_yields_only_the_array_items():
+    text = json.dumps({"meta": {"model": "x"}, "tests": TESTS, "summary": {"count": 3}})
+    for seed in range(20):
+        assert _feed(text, seed) == TESTS
+
+
+def test_malformed_items_are_skipped():
+    parser = JSONArrayStreamParser()
+    assert parser.feed('[{"name": "a"}, {"name": oops}, {"name": "b"}]') == [{"name": "a"}, {"name": "b"}]
+
+
+def test_iter_test_cases_numbers_items_and_tolerates_string_ids():
+    tests = list(iter_test_cases(_split(json.dumps(TESTS), 3)))
+
+    assert [t["id"] for t in tests] == [1, 2, 3]
+    assert [t["type"] for t in tests] == ["UI", "API", "UI"]
+    assert tests[0]["name"] == "Login {ok}"
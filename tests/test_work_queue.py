@@ -0,0 +1,44 @@
+import time
+
+import pytest
+
+from distributed import plan_shards
+from work_queue import ShardQueue, SQLiteShardQueue
+
+
+def test_stale_claim_is_requeued_and_its_late_results_dropped(tmp_path):
+    queue = SQLiteShardQueue(str(tmp_path / "queue.db"), max_attempts=2)
+    queue.submit("run", "https://example.test", [[{"id": 1}], [{"id": 2}]], {})
+
+    first = queue.claim("worker-a")
+    second = queue.claim("worker-b")
+    assert (first.seq, second.seq) == (0, 1)
+    assert queue.claim("worker-c") is None
+
+    time.sleep(0.02)
+    assert queue.heartbeat(second)
+    assert queue.requeue_stale(0.01) == 1
+    retry = queue.claim("worker-c")
+    assert (retry.id, retry.attempt) == (first.id, 2)
+
+    assert not queue.push_result(first, {"id": 1, "status": "passed"})
+    assert queue.push_result(retry, {"id": 1, "status": "failed"})
+    assert queue.complete(retry) and queue.complete(second)
+    assert [r[3]["status"] for r in queue.results("run")] == ["failed"]
+    assert sorted(queue.states("run")) == ["done", "done"]
+
+
+def test_plan_shards_keeps_dependency_and_group_clusters_together():
+    tests = [{"id": 1}, {"id": 2, "depends_on": 4}, {"id": 3, "group": "g"}, {"id": 4}, {"id": 5, "group": "g"}]
+    shards = plan_shards(tests, 2)
+
+    assert [[t["id"] for t in shard] for shard in shards] == [[1], [2, 4], [3, 5]]
+
+
+def test_backend_missing_part_of_the_interface_cannot_be_instantiated():
+    class Partial(ShardQueue):
+        def submit(self, run_id, website_url, shards, options):
+            return []
+
+    with pytest.raises(TypeError, match="abstract"):
+        Partial()
@@ -0,0 +1,259 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Shard lifecycle: queued -> running -> done; a stale or errored running shard goes back to
+# queued until it has used up its attempts (then failed); cancel_run() moves the rest to cancelled.
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+
+class Shard:
+    """A slice of one run handed to a worker. `attempt` and `worker` identify the claim."""
+
+    __slots__ = ("id", "run_id", "seq", "website_url", "tests", "options", "attempt", "worker")
+
+    def __init__(self, id: str, run_id: str, seq: int, website_url: str, tests: List[Dict], options: Dict,
+                 attempt: int = 0, worker: Optional[str] = None):
+        self.id = id
+        self.run_id = run_id
+        self.seq = seq
+        self.website_url = website_url
+        self.tests = tests
+        self.options = options
+        self.attempt = attempt
+        self.worker = worker
+
+
+class ShardQueue(ABC):
+    """
+    Backend interface for distributed runs. A coordinator submits a run's shards and polls
+    results/status; workers claim shards, heartbeat while running them and push results.
+
+    Claims are (shard, attempt, worker): once a shard is re-queued, calls made under an
+    older claim return False and its results are dropped, so a worker that was presumed
+    dead cannot overwrite the retry. Implementations must be safe to share between threads.
+    """
+
+    @abstractmethod
+    def submit(self, run_id: str, website_url: str, shards: List[List[Dict]], options: Dict) -> List[str]:
+        ...
+
+    @abstractmethod
+    def claim(self, worker: str) -> Optional[Shard]:
+        ...
+
+    @abstractmethod
+    def heartbeat(self, shard: Shard) -> bool:
+        """Refresh the claim; False if the shard was cancelled or handed to someone else."""
+
+    @abstractmethod
+    def push_result(self, shard: Shard, result: Dict) -> bool:
+        ...
+
+    @abstractmethod
+    def complete(self, shard: Shard) -> bool:
+        ...
+
+    @abstractmethod
+    def fail(self, shard: Shard, error: str) -> None:
+        """Give the shard back after a worker-side error (re-queued while attempts remain)."""
+
+    @abstractmethod
+    def requeue_stale(self, stale_after: float) -> int:
+        """Re-queue running shards whose last heartbeat is older than `stale_after` seconds."""
+
+    @abstractmethod
+    def results(self, run_id: str, after: int = 0) -> List[Tuple[int, str, int, Dict]]:
+        """(cursor, shard_id, attempt, result) rows pushed since cursor `after`, oldest first."""
+
+    @abstractmethod
+    def states(self, run_id: str) -> List[str]:
+        """State of each shard of the run; cheap enough to poll."""
+
+    @abstractmethod
+    def shards(self, run_id: str) -> List[Dict]:
+        """One status dict per shard of the run: id, seq, state, attempt, worker, tests, started, finished, error."""
+
+    @abstractmethod
+    def cancel_run(self, run_id: str) -> None:
+        ...
+
+    @abstractmethod
+    def purge_run(self, run_id: str) -> None:
+        ...
+
+    @abstractmethod
+    def stats(self) -> Dict[str, int]:
+        ...
+
+
+class SQLiteShardQueue(ShardQueue):
+    """
+    ShardQueue in a SQLite file, usable by any number of processes on the machine (or on a
+    filesystem with working locks). Claims run in BEGIN IMMEDIATE transactions so two workers
+    never take the same shard; WAL mode lets the coordinator poll while workers write.
+    """
+
+    def __init__(self, path: str, max_attempts: int = 3):
+        self.path = path
+        self.max_attempts = max(1, max_attempts)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS shards ("
+            "id TEXT PRIMARY KEY, run_id TEXT NOT NULL, seq INTEGER NOT NULL, website_url TEXT NOT NULL, "
+            "tests TEXT NOT NULL, options TEXT NOT NULL, state TEXT NOT NULL, attempt INTEGER NOT NULL, "
+            "worker TEXT, heartbeat REAL, created REAL NOT NULL, started REAL, finished REAL, error TEXT)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS shards_state ON shards(state, created, seq)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS shards_run ON shards(run_id)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "cursor INTEGER PRIMARY KEY AUTOINCREMENT, run_id TEXT NOT NULL, shard_id TEXT NOT NULL, "
+            "attempt INTEGER NOT NULL, result TEXT NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS results_run ON results(run_id, cursor)")
+
+    def _write(self, sql: str, params: Tuple = ()) -> int:
+        with self._lock:
+            return self._db.execute(sql, params).rowcount
+
+    def submit(self, run_id: str, website_url: str, shards: List[List[Dict]], options: Dict) -> List[str]:
+        now = time.time()
+        rows = [(uuid.uuid4().hex, run_id, seq, website_url, json.dumps(tests), json.dumps(options), QUEUED, 0, now)
+                for seq, tests in enumerate(shards)]
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.executemany(
+                    "INSERT INTO shards(id, run_id, seq, website_url, tests, options, state, attempt, created) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return [row[0] for row in rows]
+
+    def claim(self, worker: str) -> Optional[Shard]:
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT id, run_id, seq, website_url, tests, options, attempt FROM shards "
+                    "WHERE state = ? ORDER BY created, seq LIMIT 1", (QUEUED,)).fetchone()
+                if row is not None:
+                    self._db.execute(
+                        "UPDATE shards SET state = ?, attempt = attempt + 1, worker = ?, heartbeat = ?, started = ? "
+                        "WHERE id = ?", (RUNNING, worker, now, now, row[0]))
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        return Shard(row[0], row[1], row[2], row[3], json.loads(row[4]), json.loads(row[5]), row[6] + 1, worker)
+
+    def heartbeat(self, shard: Shard) -> bool:
+        return self._write("UPDATE shards SET heartbeat = ? WHERE id = ? AND attempt = ? AND worker = ? AND state = ?",
+                           (time.time(), shard.id, shard.attempt, shard.worker, RUNNING)) == 1
+
+    def push_result(self, shard: Shard, result: Dict) -> bool:
+        return self._write(
+            "INSERT INTO results(run_id, shard_id, attempt, result) SELECT ?, ?, ?, ? WHERE EXISTS ("
+            "SELECT 1 FROM shards WHERE id = ? AND attempt = ? AND worker = ? AND state = ?)",
+            (shard.run_id, shard.id, shard.attempt, json.dumps(result), shard.id, shard.attempt, shard.worker,
+             RUNNING)) == 1
+
+    def complete(self, shard: Shard) -> bool:
+        return self._write("UPDATE shards SET state = ?, finished = ? WHERE id = ? AND attempt = ? AND worker = ? "
+                           "AND state = ?", (DONE, time.time(), shard.id, shard.attempt, shard.worker, RUNNING)) == 1
+
+    def fail(self, shard: Shard, error: str) -> None:
+        self._write(
+            "UPDATE shards SET state = CASE WHEN attempt >= ? THEN ? ELSE ? END, finished = ?, error = ?, "
+            "worker = NULL WHERE id = ? AND attempt = ? AND worker = ? AND state = ?",
+            (self.max_attempts, FAILED, QUEUED, time.time(), error, shard.id, shard.attempt, shard.worker, RUNNING))
+
+    def requeue_stale(self, stale_after: float) -> int:
+        return self._write(
+            "UPDATE shards SET state = CASE WHEN attempt >= ? THEN ? ELSE ? END, worker = NULL, "
+            "error = 'worker stopped sending heartbeats', finished = CASE WHEN attempt >= ? THEN ? END "
+            "WHERE state = ? AND heartbeat < ?",
+            (self.max_attempts, FAILED, QUEUED, self.max_attempts, time.time(), RUNNING, time.time() - stale_after))
+
+    def results(self, run_id: str, after: int = 0) -> List[Tuple[int, str, int, Dict]]:
+        with self._lock:
+            rows = self._db.execute("SELECT cursor, shard_id, attempt, result FROM results "
+                                    "WHERE run_id = ? AND cursor > ? ORDER BY cursor", (run_id, after)).fetchall()
+        return [(cursor, shard_id, attempt, json.loads(result)) for cursor, shard_id, attempt, result in rows]
+
+    def states(self, run_id: str) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._db.execute("SELECT state FROM shards WHERE run_id = ?", (run_id,))]
+
+    def shards(self, run_id: str) -> List[Dict]:
+        with self._lock:
+            rows = self._db.execute("SELECT id, seq, state, attempt, worker, tests, started, finished, error "
+                                    "FROM shards WHERE run_id = ? ORDER BY seq", (run_id,)).fetchall()
+        return [{"id": r[0], "seq": r[1], "state": r[2], "attempt": r[3], "worker": r[4], "tests": json.loads(r[5]),
+                 "started": r[6], "finished": r[7], "error": r[8]} for r in rows]
+
+    def cancel_run(self, run_id: str) -> None:
+        self._write("UPDATE shards SET state = ?, finished = ? WHERE run_id = ? AND state IN (?, ?)",
+                    (CANCELLED, time.time(), run_id, QUEUED, RUNNING))
+
+    def purge_run(self, run_id: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM results WHERE run_id = ?", (run_id,))
+            self._db.execute("DELETE FROM shards WHERE run_id = ?", (run_id,))
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._db.execute("SELECT state, COUNT(*) FROM shards GROUP BY state").fetchall()
+        counts = {state: 0 for state in (QUEUED, RUNNING) + FINISHED_STATES}
+        counts.update(dict(rows))
+        return counts
+
+
+def _sqlite_from_url(url: str) -> ShardQueue:
+    # sqlite:///relative.db or sqlite:////absolute/path.db
+    return SQLiteShardQueue(url[len("sqlite:///"):], max_attempts=int(os.getenv("WORKER_MAX_ATTEMPTS", "3")))
+
+
+# URL scheme -> factory; a Redis-like backend registers its own scheme with register_backend()
+BACKENDS: Dict[str, Callable[[str], ShardQueue]] = {"sqlite": _sqlite_from_url}
+
+
+def register_backend(scheme: str, factory: Callable[[str], ShardQueue]) -> None:
+    BACKENDS[scheme] = factory
+
+
+def open_queue(url: str) -> ShardQueue:
+    scheme = url.split(":", 1)[0].lower()
+    if scheme not in BACKENDS:
+        raise ValueError(f"Unsupported work queue URL '{url}' (known schemes: {', '.join(sorted(BACKENDS))})")
+    return BACKENDS[scheme](url)
+
+
+_queue: Optional[ShardQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_work_queue() -> Optional[ShardQueue]:
+    """Process-wide queue configured by WORK_QUEUE_URL; None when distributed runs are off."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            url = os.getenv("WORK_QUEUE_URL", "")
+            if not url:
+                return None
+            _queue = open_queue(url)
+        return _queue